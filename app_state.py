@@ -1,5 +1,5 @@
 import os
-import configparser
+import threading
 
 import flet as ft
 
@@ -18,7 +18,9 @@ class AppState:
         os.makedirs(self.config_folder, exist_ok=True)
 
         self.config_path = os.path.join(self.config_folder, "config.ini")
-        self.config = configparser.ConfigParser()
+        # In-memory root and per-user config.ini, written back by config_service
+        self.config_store = config_service.get_store(self.config_folder)
+        self.user_config_store: config_service.ConfigStore | None = None
 
         locales_dir = os.path.join(os.path.dirname(__file__), "locales")
         self.translator = Translator(language_code=LANG[1][0], locales_dir=locales_dir)
@@ -39,6 +41,18 @@ class AppState:
 
         # Per-account storage: {broker_idx: {"df", "file", "path", "len_df_init", "edited_flag"}}
         self.accounts: dict[int, dict] = {}
+        # Background loading: indexes still being parsed, and a callback(idx) run as each one is published
+        self.accounts_pending: set[int] = set()
+        self.on_account_loaded = None
+        # Ledgers that failed to load: {broker_idx: error message}, reported through on_account_error(idx, msg)
+        self.account_errors: dict[int, str] = {}
+        self.on_account_error = None
+        self._accounts_lock = threading.Lock()
+        self._accounts_ready = threading.Event()
+        self._accounts_ready.set()
+        self._accounts_generation = 0
+        # Last Home values per selection, persisted so Home can render before the ledgers load
+        self.home_snapshot: dict[str, dict] = {}
 
         # Per-page selection
         self.home_selection: str = "overview"  # "overview" or str(broker_idx)
@@ -87,14 +101,10 @@ class AppState:
 
     def load_config(self):
         """Read root config.ini for global settings, then load active user's per-user config."""
-        self.config = configparser.ConfigParser()
-        if os.path.exists(self.config_path):
-            self.config.read(self.config_path)
-            if "Language" in self.config and "Code" in self.config["Language"]:
-                self.lang_code = self.config["Language"]["Code"]
-            if "Theme" in self.config:
-                self.theme_mode = self.config.get("Theme", "mode", fallback="system")
-                self.color_seed = self.config.get("Theme", "color", fallback="blue")
+        self.config_store = config_service.get_store(self.config_folder)
+        self.lang_code = self.config_store.get("Language", "code", fallback=self.lang_code)
+        self.theme_mode = self.config_store.get("Theme", "mode", fallback=self.theme_mode)
+        self.color_seed = self.config_store.get("Theme", "color", fallback=self.color_seed)
 
         if self.lang_code:
             self.translator.load_language(self.lang_code)
@@ -114,10 +124,7 @@ class AppState:
             os.makedirs(self.config_res_folder, exist_ok=True)
 
             # Load per-user settings
-            user_config = configparser.ConfigParser()
-            user_config_path = os.path.join(self.user_config_folder, "config.ini")
-            if os.path.exists(user_config_path):
-                user_config.read(user_config_path)
+            user_config = self.user_config_store = config_service.get_store(self.user_config_folder)
             if user_config.has_section("Brokers"):
                 try:
                     self.brokers = {int(k): v for k, v in user_config.items("Brokers")}
@@ -147,6 +154,7 @@ class AppState:
                 self._split_ignores = set()
         else:
             self.active_user_name = None
+            self.user_config_store = None
             self.user_config_folder = None
             self.config_res_folder = None
             self.brokers = {}
@@ -161,15 +169,77 @@ class AppState:
             create_defaults(self.config_res_folder, broker_name)
 
     def load_all_accounts(self):
-        """Load all broker accounts into self.accounts."""
-        from services import account_service
-        self.accounts = {}
-        for idx in sorted(self.brokers.keys()):
+        """Load all broker accounts into self.accounts, parsing the ledgers in parallel."""
+        self.load_accounts_background()
+        self.wait_for_accounts()
+
+    def load_accounts_background(self):
+        """Start loading every broker account on the worker pool and return at once.
+
+        Each account is published into self.accounts as soon as its ledger is
+        parsed, and then on_account_loaded(idx) is called. A ledger that
+        cannot be read is recorded in account_errors and reported through
+        on_account_error(idx, message). self.accounts is replaced rather than
+        mutated, so readers iterating it are never disturbed. A newer call
+        supersedes the accounts still loading.
+        """
+        from services import account_service, job_service
+        with self._accounts_lock:
+            self._accounts_generation += 1
+            generation = self._accounts_generation
+            self.accounts = {}
+            self.account_errors = {}
+            self.accounts_pending = set(self.brokers)
+            if self.accounts_pending:
+                self._accounts_ready.clear()
+            else:
+                self._accounts_ready.set()
+        brokers = dict(self.brokers)
+        res_folder = self.config_res_folder
+        if self.user_config_folder:
+            self.home_snapshot = account_service.load_home_snapshot(self.user_config_folder)
+
+        def worker(token, idx):
+            acc = error = None
             try:
-                acc = account_service.load_single_account(self.brokers, self.config_res_folder, idx)
-                self.accounts[idx] = acc
+                acc = account_service.load_single_account(brokers, res_folder, idx)
             except FileNotFoundError:
                 pass
+            except Exception as ex:
+                error = str(ex) or type(ex).__name__
+            self._publish_account(generation, idx, acc, error)
+
+        for idx in sorted(brokers):
+            job_service.submit(f"accounts.load.{idx}", worker, idx, pool="ledgers")
+
+    def _publish_account(self, generation: int, idx: int, acc: dict | None, error: str | None = None):
+        with self._accounts_lock:
+            if generation != self._accounts_generation:
+                return
+            if acc is not None:
+                self.accounts = dict(sorted({**self.accounts, idx: acc}.items()))
+            if error is not None:
+                self.account_errors = {**self.account_errors, idx: error}
+            self.accounts_pending.discard(idx)
+            if not self.accounts_pending:
+                self._accounts_ready.set()
+            on_error = self.on_account_error
+            callback = self.on_account_loaded
+        if error is not None and on_error is not None:
+            on_error(idx, error)
+        if callback is not None:
+            callback(idx)
+
+    def wait_for_accounts(self, timeout: float | None = None) -> bool:
+        """Block until no account is loading; False on timeout."""
+        return self._accounts_ready.wait(timeout)
+
+    def save_home_snapshot(self, selection: str, values: dict):
+        """Persist the Home values of selection for the next startup."""
+        from services import account_service
+        self.home_snapshot = {**self.home_snapshot, selection: values}
+        if self.user_config_folder:
+            account_service.save_home_snapshot(self.user_config_folder, self.home_snapshot)
 
     def get_account(self, idx: int) -> dict | None:
         return self.accounts.get(idx)
@@ -0,0 +1,76 @@
+"""Benchmark: vectorized LTTB / min-max downsampling vs. the former pure-Python LTTB.
+
+Run from the repository root:  python -m benchmarks.bench_downsample
+"""
+import time
+
+import numpy as np
+
+from services.chart_service import _downsample_series
+
+
+def _legacy_lttb(data, max_points=200):
+    n = len(data)
+    if n <= max_points:
+        return data, list(range(n))
+    sampled = [data[0]]
+    sampled_indices = [0]
+    bucket_size = (n - 2) / (max_points - 2)
+    a = 0
+    for i in range(max_points - 2):
+        avg_x = 0
+        avg_y = 0
+        avg_range_start = int((i + 1) * bucket_size) + 1
+        avg_range_end = min(int((i + 2) * bucket_size) + 1, n)
+        avg_range_length = avg_range_end - avg_range_start
+        if avg_range_length > 0:
+            for j in range(avg_range_start, avg_range_end):
+                avg_x += j
+                avg_y += data[j]
+            avg_x /= avg_range_length
+            avg_y /= avg_range_length
+        else:
+            avg_x = avg_range_start
+            avg_y = data[avg_range_start] if avg_range_start < n else data[-1]
+        range_offs = int(i * bucket_size) + 1
+        range_to = int((i + 1) * bucket_size) + 1
+        max_area = -1
+        max_area_point = range_offs
+        for j in range(range_offs, min(range_to, n)):
+            area = abs((a - avg_x) * (data[j] - data[a]) - (a - j) * (avg_y - data[a]))
+            if area > max_area:
+                max_area = area
+                max_area_point = j
+        sampled.append(data[max_area_point])
+        sampled_indices.append(max_area_point)
+        a = max_area_point
+    sampled.append(data[-1])
+    sampled_indices.append(n - 1)
+    return sampled, sampled_indices
+
+
+def _time(fn, repeat=3):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3, result
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'points':>10} {'legacy LTTB':>12} {'LTTB':>9} {'LTTB x4':>9} {'min/max':>9}  same indices")
+    for n in (10_000, 100_000, 1_000_000):
+        series = 10_000 + np.cumsum(rng.normal(size=(n, 4)), axis=0)
+        values = series[:, 0].tolist()
+        legacy_ms, (_, legacy_idx) = _time(lambda: _legacy_lttb(values, 150), repeat=1)
+        lttb_ms, (_, idx) = _time(lambda: _downsample_series(series[:, 0], 150))
+        multi_ms, _ = _time(lambda: _downsample_series(series, 150))
+        minmax_ms, _ = _time(lambda: _downsample_series(series[:, 0], 150, mode="minmax"))
+        print(f"{n:>10,} {legacy_ms:>10.1f}ms {lttb_ms:>7.1f}ms {multi_ms:>7.1f}ms {minmax_ms:>7.1f}ms  "
+              f"{legacy_idx == idx}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Benchmark: consolidated ledger updates vs. re-concatenating every account.
+
+Also checks that the consolidated ledger keeps the same rows as the former
+concat + sort, including for ledgers already filtered down to their trades,
+whose first trade sits at row 0.
+
+Run from the repository root:  python -m benchmarks.bench_ledger
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from services.ledger_service import consolidated
+from utils.account import get_tickers
+from utils.columns import COLUMNS
+
+_TRADES = ["Buy", "Sell", "Split"]
+
+
+def _ledger(rng, account, n):
+    rows = {col: [np.nan] * (n + 1) for col in COLUMNS}
+    days = np.sort(rng.integers(0, 5000, n))
+    rows["date"] = ["01-01-2000"] + [
+        (pd.Timestamp("2005-01-01") + pd.Timedelta(days=int(d))).strftime("%d-%m-%Y") for d in days
+    ]
+    rows["account"] = [account] * (n + 1)
+    rows["operation"] = [np.nan] + rng.choice(_TRADES + ["Deposit"], n).tolist()
+    rows["ticker"] = [np.nan] + rng.choice(["VWCE.DE", "AAPL", "MSFT", "SWDA.MI"], n).tolist()
+    rows["curr"] = [np.nan] + ["EUR"] * n
+    rows["qt_held"] = [np.nan] + rng.integers(0, 5, n).astype(float).tolist()
+    return pd.DataFrame(rows)
+
+
+def _legacy(data):
+    dfs = []
+    for _, df in data:
+        df = df.copy()
+        df["date"] = pd.to_datetime(df["date"], dayfirst=True, errors="coerce")
+        dfs.append(df)
+    final = pd.concat(dfs, ignore_index=True).sort_values(by="date", kind="mergesort")
+    return final.iloc[len(data):].reset_index(drop=True)
+
+
+def _time(fn, repeat=3):
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3, result
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'rows':>8} {'concat':>9} {'append':>9}  same rows  filtered tickers")
+    for n in (1_000, 10_000, 50_000):
+        data = [(acc, _ledger(rng, f"A{acc}", n)) for acc in range(1, 4)]
+        consolidated(data)
+        grown = [(acc, df) for acc, df in data]
+        extra = _ledger(rng, "A1", 1).iloc[1:].assign(date="31-12-2030")
+        grown[0] = (1, pd.concat([data[0][1], extra], ignore_index=True))
+
+        legacy_ms, legacy = _time(lambda: _legacy(grown))
+        append_ms, frame = _time(lambda: consolidated(grown), repeat=1)
+        same = (np.array_equal(frame["_date"].to_numpy(), legacy["date"].to_numpy())
+                and frame[["account", "ticker"]].equals(legacy[["account", "ticker"]]))
+
+        # Filtered ledgers start with a trade at row 0: it must not be taken for the opening row
+        filtered = [(acc, df[df["operation"].isin(_TRADES)]) for acc, df in grown]
+        same_tickers = sorted(get_tickers(None, filtered)[0]) == sorted(get_tickers(None, grown)[0])
+        print(f"{n:>8,} {legacy_ms:>7.1f}ms {append_ms:>7.1f}ms  {same!s:>9}  {same_tickers}")
+
+
+if __name__ == "__main__":
+    main()
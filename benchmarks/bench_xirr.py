@@ -0,0 +1,60 @@
+"""Benchmark: vectorized XIRR vs. the former generator-based secant solver.
+
+Run from the repository root:  python -m benchmarks.bench_xirr
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+import utils.newton as newton
+from services.analysis_service import xirr, xirr_batch
+
+
+def _legacy_xirr(cash_flows, flows_dates, annualization=365, x0=0.1, x1=0.2, max_iter=100):
+    days = [(data - flows_dates[0]).days for data in flows_dates]
+    years = np.array(days) / annualization
+
+    def npv_formula(rate):
+        return sum(cf / (1 + rate) ** t for cf, t in zip(cash_flows, years))
+
+    try:
+        return newton.secant(npv_formula, x0=x0, x1=x1, max_iter=max_iter)
+    except (ZeroDivisionError, RuntimeError):
+        return np.nan
+
+
+def _make_series(n_flows, rng):
+    dates = list(pd.Timestamp("2010-01-01") + pd.to_timedelta(np.sort(rng.integers(0, 5000, n_flows)), unit="D"))
+    flows = list(-rng.uniform(100, 1000, n_flows))
+    flows[-1] = -sum(flows) * 1.6
+    return flows, dates
+
+
+def _timeit(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(f"{'flows':>8} {'legacy [ms]':>12} {'vectorized [ms]':>16} {'speedup':>8}")
+    for n_flows in (100, 1_000, 5_000, 20_000):
+        flows, dates = _make_series(n_flows, rng)
+        t_old = _timeit(lambda: _legacy_xirr(flows, dates))
+        t_new = _timeit(lambda: xirr(flows, dates))
+        print(f"{n_flows:>8} {t_old * 1e3:>12.2f} {t_new * 1e3:>16.2f} {t_old / t_new:>7.1f}x")
+
+    series = [_make_series(2_000, rng) for _ in range(50)]
+    t_loop = _timeit(lambda: [_legacy_xirr(f, d) for f, d in series], repeat=1)
+    t_batch = _timeit(lambda: xirr_batch(series), repeat=3)
+    print(f"\n50 series x 2000 flows: legacy loop {t_loop * 1e3:.1f} ms, "
+          f"batch {t_batch * 1e3:.1f} ms ({t_loop / t_batch:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
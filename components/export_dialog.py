@@ -0,0 +1,67 @@
+import asyncio
+
+import flet as ft
+
+from components.snack import show_snack
+from services import export_service
+
+
+def show_export_dialog(page: ft.Page, translator, file_picker: ft.FilePicker, base_name: str, df, **write_kwargs):
+    """Ask for an export format, then save df as base_name + extension.
+
+    write_kwargs are passed to export_service.write_frame (order, transform,
+    index). With a single available format the dialog is skipped.
+    """
+    formats = export_service.available_formats()
+
+    async def export(fmt):
+        await save_export(page, translator, file_picker, base_name, df, fmt, **write_kwargs)
+
+    if len(formats) == 1:
+        page.run_task(export, formats[0])
+        return
+
+    def on_pick(fmt):
+        page.pop_dialog()
+        page.run_task(export, fmt)
+
+    dlg = ft.AlertDialog(
+        title=ft.Text(translator.get("components.export_format")),
+        content=ft.Column([
+            ft.ListTile(
+                title=ft.Text(export_service.EXPORT_LABELS[fmt]),
+                subtitle=ft.Text(base_name + export_service.EXPORT_FORMATS[fmt], size=11),
+                on_click=lambda _, f=fmt: on_pick(f),
+            )
+            for fmt in formats
+        ], tight=True, spacing=0),
+        actions=[ft.TextButton(translator.get("components.cancel"), on_click=lambda _: page.pop_dialog())],
+    )
+    page.show_dialog(dlg)
+
+
+async def save_export(page: ft.Page, translator, file_picker: ft.FilePicker, base_name: str, df, fmt, **write_kwargs):
+    """Save df in format fmt through file_picker.
+
+    On desktop the picker only returns a path, and the file is streamed to
+    it chunk by chunk off the UI thread. On web and mobile the platform
+    saves the bytes handed to the picker, so the export is built in memory
+    (compressed formats keep it small).
+    """
+    file_name = base_name + export_service.EXPORT_FORMATS[fmt]
+    extension = export_service.EXPORT_FORMATS[fmt].rsplit(".", 1)[-1]
+    try:
+        if page.web or page.platform.is_mobile():
+            data = await asyncio.to_thread(export_service.export_bytes, df, fmt, **write_kwargs)
+            path = await file_picker.save_file(file_name=file_name, allowed_extensions=[extension], src_bytes=data)
+        else:
+            path = await file_picker.save_file(file_name=file_name, allowed_extensions=[extension])
+            if not path:
+                return
+            await asyncio.to_thread(export_service.export_file, path, df, fmt, **write_kwargs)
+    except Exception as ex:
+        show_snack(page, str(ex), error=True)
+        return
+    # Confirm only saves the picker reported: a cancelled picker returns no path
+    if path:
+        show_snack(page, translator.get("transactions.export_success"))
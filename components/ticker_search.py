@@ -1,8 +1,6 @@
-import threading
-import time
-
 import flet as ft
 
+from services import job_service
 from services.market_data import search_tickers
 
 
@@ -14,8 +12,7 @@ class TickerSearchField:
         self._page = page
         self._on_select = on_select
         self._type_filter = type_filter  # e.g. "etf", "equity", or None for no filter
-        self._req_id = 0
-        self._lock = threading.Lock()
+        self._job_key = f"ticker_search.{id(self)}"
         self._picking = False
 
         expand = kwargs.pop("expand", False)
@@ -91,38 +88,34 @@ class TickerSearchField:
     def _on_change(self, e):
         text = (e.control.value or "").strip()
         if len(text) < 2:
+            job_service.cancel(self._job_key)
             self._hide()
             return
-        with self._lock:
-            self._req_id += 1
-            req_id = self._req_id
-
-        def worker():
-            time.sleep(0.3)
-            with self._lock:
-                if req_id != self._req_id:
-                    return
+
+        # Each keystroke supersedes the previous search; the wait debounces typing
+        def worker(token):
+            if token.wait(0.3):
+                return
             try:
                 results = search_tickers(text, quotes_count=5)
             except Exception:
                 results = []
-            with self._lock:
-                if req_id != self._req_id:
-                    return
+            token.raise_if_cancelled()
             if not results:
                 self._hide()
                 return
             self._show_results(results)
 
-        self._page.run_thread(worker)
+        job_service.submit(self._job_key, worker)
 
     def _on_blur(self, e):
         # Delay hide so a suggestion click can fire first
-        def _delayed():
-            time.sleep(0.15)
+        def _delayed(token):
+            if token.wait(0.15):
+                return
             if not self._picking:
                 self._hide()
-        self._page.run_thread(_delayed)
+        job_service.submit(f"{self._job_key}.blur", _delayed)
 
     def _show_results(self, results):
         if self._type_filter:
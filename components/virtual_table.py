@@ -0,0 +1,93 @@
+import flet as ft
+
+
+class VirtualTable:
+    """Paged DataTable over a precomputed matrix of cell strings.
+
+    Only the rows of the current page exist as controls: page_size DataRows
+    are created once per set of columns and reused, and paging just rewrites
+    the values of their Text cells, so the page update sends the changed
+    strings instead of a new table.
+    """
+
+    def __init__(self, page: ft.Page, *, page_size: int = 20, empty_text: str = ""):
+        self._page = page
+        self._page_size = page_size
+        self._headers = None
+        self._rows = []
+        self._slots = []
+        self.page_index = 0
+
+        self._table = ft.DataTable(
+            columns=[ft.DataColumn(ft.Text(""))],
+            rows=[],
+            horizontal_lines=ft.BorderSide(1, ft.Colors.GREY_300),
+            column_spacing=12,
+        )
+        self._table_row = ft.Row([self._table], scroll=ft.ScrollMode.ALWAYS)
+        self._empty = ft.Text(empty_text, size=16, visible=False)
+        self._prev_btn = ft.IconButton(ft.Icons.CHEVRON_LEFT, on_click=self._on_prev_page)
+        self._next_btn = ft.IconButton(ft.Icons.CHEVRON_RIGHT, on_click=self._on_next_page)
+        self._page_label = ft.Text("", size=13)
+        self._pagination = ft.Row(
+            [self._prev_btn, self._page_label, self._next_btn],
+            alignment=ft.MainAxisAlignment.CENTER, spacing=4, visible=False,
+        )
+
+        self.control = ft.Column(
+            [self._table_row, self._empty, self._pagination], spacing=5,
+            horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+        )
+
+    @property
+    def page_count(self):
+        return max(1, (len(self._rows) + self._page_size - 1) // self._page_size)
+
+    def set_data(self, headers, rows, reset_page=True):
+        """Show rows, a sequence of equal-length sequences of strings, under headers.
+
+        The row controls are rebuilt only when the headers change; otherwise
+        the visible cells are updated in place. The page is kept, clamped to
+        the new row count, unless reset_page.
+        """
+        headers = list(headers)
+        if headers != self._headers:
+            self._headers = headers
+            self._table.columns = [
+                ft.DataColumn(ft.Text(h, size=11, weight=ft.FontWeight.BOLD)) for h in headers
+            ]
+            self._slots = [
+                ft.DataRow(cells=[ft.DataCell(ft.Text("", size=10)) for _ in headers])
+                for _ in range(self._page_size)
+            ]
+        self._rows = rows
+        if reset_page:
+            self.page_index = 0
+        self.show_page(self.page_index)
+
+    def show_page(self, index):
+        """Fill the row slots with the rows of page index (clamped to the valid pages)."""
+        self.page_index = max(0, min(index, self.page_count - 1))
+        start = self.page_index * self._page_size
+        visible = self._rows[start:start + self._page_size]
+        for slot, values in zip(self._slots, visible):
+            for cell, value in zip(slot.cells, values):
+                cell.content.value = value
+        self._table.rows = self._slots[:len(visible)]
+
+        self._table_row.visible = bool(visible)
+        self._empty.visible = not visible
+        self._pagination.visible = self.page_count > 1
+        self._page_label.value = f"{self.page_index + 1} / {self.page_count}"
+        self._prev_btn.disabled = self.page_index == 0
+        self._next_btn.disabled = self.page_index >= self.page_count - 1
+
+    def _on_prev_page(self, e):
+        if self.page_index > 0:
+            self.show_page(self.page_index - 1)
+            self._page.update()
+
+    def _on_next_page(self, e):
+        if self.page_index < self.page_count - 1:
+            self.show_page(self.page_index + 1)
+            self._page.update()
@@ -60,7 +60,12 @@ def _do_restart(page: ft.Page):
         return
 
     state.ensure_defaults()
-    state.load_all_accounts()
+    state.on_account_error = lambda idx, error: show_snack(
+        page, state.translator.get("home.account_load_error", name=state.brokers.get(idx, idx), error=error),
+        error=True,
+    )
+    # Home renders from the last snapshot while the ledgers load in parallel
+    state.load_accounts_background()
     _rebuild_page(page, state)
 
 
@@ -75,9 +80,16 @@ def main(page: ft.Page):
         "show_user_creation": _show_user_creation,
         "show_broker_onboarding": _show_broker_onboarding,
     }
+    page.on_app_lifecycle_state_change = _on_lifecycle_change
     _do_restart(page)
 
 
+def _on_lifecycle_change(e: ft.AppLifecycleStateChangeEvent):
+    # Mobile OSes may kill a backgrounded app without running exit handlers
+    if e.state in (ft.AppLifecycleState.HIDE, ft.AppLifecycleState.PAUSE, ft.AppLifecycleState.DETACH):
+        config_service.flush_all()
+
+
 def _show_language_picker(page: ft.Page, state: AppState):
     t = state.translator
     options = [
@@ -1,8 +1,19 @@
+import itertools
+import json
 import os
+import threading
 import pandas as pd
 
+from services import analysis_service
 from utils.columns import rename_from_legacy
 from utils.constants import REPORT_PREFIX
+from utils.ledger_index import KEY_FIELDS, LedgerIndex
+
+# Process-wide counter: every loaded or modified ledger gets a version never used before
+_ledger_versions = itertools.count(1)
+# Per-user file with the last Home values, shown while the ledgers load
+HOME_SNAPSHOT = "home_snapshot.json"
+_snapshot_lock = threading.Lock()
 
 
 def load_single_account(brokers: dict, save_folder: str, account_idx: int) -> dict:
@@ -21,14 +32,79 @@ def load_single_account(brokers: dict, save_folder: str, account_idx: int) -> di
         "path": path,
         "len_df_init": len(df),
         "edited_flag": False,
+        "version": next(_ledger_versions),
     }
 
 
+def load_home_snapshot(user_folder: str) -> dict:
+    """Last Home values saved per selection, or {} if missing or unreadable."""
+    try:
+        with open(os.path.join(user_folder, HOME_SNAPSHOT), encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return snapshot if isinstance(snapshot, dict) else {}
+
+
+def save_home_snapshot(user_folder: str, snapshot: dict):
+    """Write the Home snapshot atomically (temporary file + replace)."""
+    path = os.path.join(user_folder, HOME_SNAPSHOT)
+    tmp = path + ".tmp"
+    with _snapshot_lock:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp, path)
+
+
 def save_account(df: pd.DataFrame, path: str):
     """Save account DataFrame to its internal config path."""
     df.to_csv(path, index=False)
 
 
+def update_account(acc: dict, df: pd.DataFrame):
+    """Replace the ledger of an account, bump its version and save it.
+
+    Cached analysis results computed on the previous ledger are dropped; the
+    search index follows rows appended or removed at the end of the ledger.
+    """
+    acc["index"] = _follow_ledger(acc.get("index"), acc["df"], df)
+    acc["df"] = df
+    acc["version"] = next(_ledger_versions)
+    save_account(df, acc["path"])
+    analysis_service.invalidate_results(acc["acc_idx"])
+
+
+def get_ledger_index(acc: dict) -> LedgerIndex:
+    """Search index of the account ledger, built on first use."""
+    index = acc.get("index")
+    if index is None:
+        index = acc["index"] = LedgerIndex(acc["df"])
+    return index
+
+
+def _same_rows(old: pd.DataFrame, new: pd.DataFrame, n: int) -> bool:
+    """Whether the first n rows of two ledgers agree on the indexed columns."""
+    cols = [c for c in ("date", "asset_name", *KEY_FIELDS) if c in old.columns]
+    if any(c not in new.columns for c in cols):
+        return False
+    return (old[cols].iloc[:n].reset_index(drop=True).astype(object)
+            .equals(new[cols].iloc[:n].reset_index(drop=True).astype(object)))
+
+
+def _follow_ledger(index, old: pd.DataFrame, new: pd.DataFrame):
+    """Update index from the old ledger to the new one, or None to rebuild it on next use."""
+    if index is None or len(index) != len(old):
+        return None
+    n = min(len(old), len(new))
+    if not _same_rows(old, new, n):
+        return None
+    if len(new) > n:
+        index.append(new.iloc[n:])
+    else:
+        index.truncate(n)
+    return index
+
+
 def delete_account_files(broker_name: str, save_folder: str):
     """Delete CSV files for a given broker."""
     filename = REPORT_PREFIX + broker_name + ".csv"
@@ -1,35 +1,220 @@
+import threading
 import pandas as pd
 import numpy as np
-from datetime import datetime
+from collections import OrderedDict
+from datetime import date, datetime
 from itertools import chain
 
-from services.market_data import download_close, fetch_ticker_name
+from services.ledger_service import consolidated
+from services.market_data import fetch_ticker_name
+from services.returns_service import FX_TICKER, get_close_matrix, get_returns_matrix, get_moments, market_data_epoch
 from utils.date_utils import get_pf_date
 from utils.account import portfolio_history, get_asset_value, get_tickers, aggregate_positions
 from utils.other_utils import round_half_up
 from utils.constants import DATE_FORMAT
 import utils.newton as newton
+import utils.qmc as qmc
 
 
-def xirr(cash_flows, flows_dates, annualization=365, x0=0.1, x1=0.2, max_iter=100):
-    days = [(data - flows_dates[0]).days for data in flows_dates]
-    years = np.array(days) / annualization
+_TRADING_DAYS = 252
+_RISK_FREE_RATE = 0.02
+_ROLLING_WINDOWS = (21, 63, 252)
 
-    def npv_formula(rate):
-        return sum(
-            cf / (1 + rate) ** t
-            for cf, t in zip(cash_flows, years)
-        )
+_RESULT_CACHE_SIZE = 32
+_result_lock = threading.Lock()
+# key: (kind, ledger, params, language, market-data epoch) -> result dict
+_result_cache = OrderedDict()
+# key -> Event set when the computation in progress for that key ends
+_result_pending = {}
+
+
+def ledger_key(accounts, acc_indices):
+    """Identify the ledgers an analysis runs on: (account index, ledger version) pairs."""
+    return tuple((idx, accounts[idx]["version"]) for idx in sorted(acc_indices))
+
+
+def memoized(kind, ledger, params, translator, compute, *args, **kwargs):
+    """Return the cached result of compute(*args, **kwargs), computing it on a miss.
+
+    Results are keyed by analysis kind, ledger versions (see ledger_key),
+    params (a hashable tuple of every parameter that changes the result), the
+    language and the market-data epoch, with LRU eviction. A call made while
+    the same result is being computed waits for it instead of computing it
+    twice. Exceptions are not cached. Results are shared between callers and must not be modified.
+    """
+    key = _result_key(kind, ledger, params, translator)
+    while True:
+        with _result_lock:
+            if key in _result_cache:
+                _result_cache.move_to_end(key)
+                return _result_cache[key]
+            pending = _result_pending.get(key)
+            if pending is None:
+                _result_pending[key] = threading.Event()
+                break
+        # The same analysis is already running (e.g. a background precompute): wait for it
+        pending.wait()
 
     try:
-        xirr_rate = newton.secant(npv_formula, x0=x0, x1=x1, max_iter=max_iter)
-        return xirr_rate
-    except (ZeroDivisionError, RuntimeError):
-        return np.nan
+        result = compute(*args, **kwargs)
+        with _result_lock:
+            _result_put(key, result)
+    finally:
+        with _result_lock:
+            _result_pending.pop(key).set()
+    return result
+
+
+def _result_key(kind, ledger, params, translator):
+    return kind, ledger, params, translator.language_code, market_data_epoch()
+
+
+def _result_put(key, result):
+    _result_cache[key] = result
+    _result_cache.move_to_end(key)
+    while len(_result_cache) > _RESULT_CACHE_SIZE:
+        _result_cache.popitem(last=False)
+
+
+def cached_result(kind, ledger, params, translator):
+    """The result memoized() holds for these arguments, or None."""
+    key = _result_key(kind, ledger, params, translator)
+    with _result_lock:
+        if key in _result_cache:
+            _result_cache.move_to_end(key)
+            return _result_cache[key]
+    return None
+
+
+def store_result(kind, ledger, params, translator, result):
+    """Cache a result computed outside memoized() (e.g. by a progressive computation)."""
+    with _result_lock:
+        _result_put(_result_key(kind, ledger, params, translator), result)
+
+
+def invalidate_results(acc_idx=None):
+    """Drop cached results computed on an account's ledger (all results when acc_idx is None)."""
+    if acc_idx is None:
+        clear_rolling_correlations()
+    with _result_lock:
+        if acc_idx is None:
+            _result_cache.clear()
+            return
+        for key in [k for k in _result_cache if any(idx == acc_idx for idx, _ in k[1])]:
+            del _result_cache[key]
+
+
+def warm_cache(translator, data):
+    """Download the prices of every ticker traded in data, from the first transaction to today.
+
+    Analyses over any narrower range or subset of these tickers are then
+    served from the shared price cache (see returns_service.get_close_matrix).
+    Returns the first transaction date, or None when data has no transactions.
+    """
+    dates = consolidated(data)["_date"].dropna()
+    if dates.empty:
+        return None
+    first_date = dates.min().normalize()
+
+    total_tickers, _ = get_tickers(translator, data)
+    tickers = sorted(set(t[0] for t in total_tickers))
+    if tickers:
+        get_close_matrix(tickers + [FX_TICKER], first_date, pd.Timestamp(date.today()) + pd.Timedelta(days=1))
+    return first_date.date()
+
+
+_XIRR_BRACKET = np.expm1(np.linspace(np.log(0.01), np.log(101.0), 64))
+
+
+def _flow_matrix(flow_series, annualization):
+    """Pack (cash_flows, flows_dates) pairs into zero-padded (S, L) arrays of flows and year fractions."""
+    n_series = len(flow_series)
+    if np.isscalar(annualization):
+        annualization = [annualization] * n_series
+    max_len = max((len(cf) for cf, _ in flow_series), default=0)
+
+    cf_matrix = np.zeros((n_series, max_len))
+    years_matrix = np.zeros((n_series, max_len))
+    for i, ((cash_flows, flows_dates), ann) in enumerate(zip(flow_series, annualization)):
+        if len(cash_flows) == 0:
+            continue
+        dates = pd.DatetimeIndex(flows_dates)
+        days = np.asarray((dates - dates[0]).days, dtype=float)
+        cf_matrix[i, :len(cash_flows)] = np.asarray(cash_flows, dtype=float)
+        years_matrix[i, :len(cash_flows)] = days / ann
+    return cf_matrix, years_matrix
+
+
+def _npv(cf_matrix, years_matrix, rates):
+    """NPV of each row of cf_matrix at the matching rate."""
+    discount = np.exp(-years_matrix * np.log1p(rates)[:, None])
+    return (cf_matrix * discount).sum(axis=1)
+
+
+def _npv_prime(cf_matrix, years_matrix, rates):
+    """Analytic derivative of _npv with respect to the rate."""
+    log_base = np.log1p(rates)[:, None]
+    discount = np.exp(-(years_matrix + 1) * log_base)
+    return -(cf_matrix * years_matrix * discount).sum(axis=1)
+
+
+def xirr_batch(flow_series, annualization=365, x0=0.1, max_iter=100):
+    """Solve XIRR for many flow series in one vectorized pass.
 
+    flow_series: list of (cash_flows, flows_dates) pairs.
+    annualization: scalar or one value per series.
 
-def compute_summary(translator, brokers, data, ref_date, dt_str):
+    Newton's method with the analytic NPV derivative runs on all series at
+    once; series where it fails fall back to Brent's method on a bracket
+    found by scanning a rate grid. Returns an array with NaN where no root exists.
     """
+    n_series = len(flow_series)
+    if n_series == 0:
+        return np.array([])
+
+    cf_matrix, years_matrix = _flow_matrix(flow_series, annualization)
+
+    rates, converged = newton.newton_vec(
+        lambda r: _npv(cf_matrix, years_matrix, r),
+        lambda r: _npv_prime(cf_matrix, years_matrix, r),
+        np.full(n_series, x0),
+        max_iter=max_iter,
+        lower=-1.0,
+    )
+
+    for i in np.flatnonzero(~converged):
+        cf_row = cf_matrix[i:i + 1]
+        years_row = years_matrix[i:i + 1]
+        with np.errstate(all="ignore"):
+            grid_npv = _npv(np.repeat(cf_row, len(_XIRR_BRACKET), axis=0),
+                            np.repeat(years_row, len(_XIRR_BRACKET), axis=0),
+                            _XIRR_BRACKET)
+        sign_change = np.flatnonzero(np.sign(grid_npv[:-1]) * np.sign(grid_npv[1:]) < 0)
+        if len(sign_change) == 0:
+            rates[i] = np.nan
+            continue
+        k = sign_change[0]
+
+        def npv_formula(rate):
+            return float(_npv(cf_row, years_row, np.array([rate]))[0])
+
+        try:
+            rates[i] = newton.brent(npv_formula, _XIRR_BRACKET[k], _XIRR_BRACKET[k + 1])
+        except (ValueError, RuntimeError):
+            rates[i] = np.nan
+
+    return rates
+
+
+def xirr(cash_flows, flows_dates, annualization=365, x0=0.1, max_iter=100):
+    return float(xirr_batch([(cash_flows, flows_dates)], annualization, x0=x0, max_iter=max_iter)[0])
+
+
+def compute_summary(translator, brokers, data, ref_date, dt_str, benchmarks=None):
+    """
+    benchmarks: optional list of tickers the portfolio TWRR is compared with
+        (in each benchmark's own quote currency).
+
     Returns dict:
     {
         "accounts": [{ acc_idx, broker_name, nav, current_liq, asset_value,
@@ -37,6 +222,8 @@ def compute_summary(translator, brokers, data, ref_date, dt_str):
         "portfolio": { nav, current_liq, asset_value, historic_liq, pl, pl_unrealized,
                        xirr_full, xirr_ann, twrr_full, twrr_ann, volatility, sharpe_ratio },
         "pf_history": DataFrame or None,
+        "rolling_metrics": { window: DataFrame } or None,   # see rolling_risk_metrics
+        "benchmark": dict or None,                          # see benchmark_statistics
         "min_date": datetime or None,
     }
     """
@@ -52,6 +239,9 @@ def compute_summary(translator, brokers, data, ref_date, dt_str):
     first_dates = []
     accounts_with_positions = 0
     account_results = []
+    xirr_series = []     # (cash_flows, flows_dates) pairs solved in one batch
+    xirr_days = []
+    xirr_targets = []    # account result index, or None for the portfolio
 
     for account in data:
         df_copy = account[1].copy()
@@ -72,17 +262,15 @@ def compute_summary(translator, brokers, data, ref_date, dt_str):
         flows_dates = cashflow_df["date"].tolist()
         flows_dates.append(ref_date)
 
-        xirr_full = np.nan
-        xirr_ann = np.nan
-
         if positions:
             asset_value = round_half_up(sum(pos["value"] for pos in positions))
             pl_unrealized = pl + sum([pos["value"] - pos["pmc"] * pos["quantity"] for pos in positions])
             flows = flows[:-1]
             nav = nav + round_half_up(asset_value)
             flows.append(nav)
-            xirr_full = xirr(flows, flows_dates, annualization=(ref_date - flows_dates[0]).days)
-            xirr_ann = xirr(flows, flows_dates)
+            xirr_series.append((flows, flows_dates))
+            xirr_days.append((ref_date - flows_dates[0]).days)
+            xirr_targets.append(len(account_results))
             accounts_with_positions += 1
 
         total_flows.append(flows)
@@ -106,8 +294,8 @@ def compute_summary(translator, brokers, data, ref_date, dt_str):
             "historic_liq": historic_liq,
             "pl": round_half_up(pl),
             "pl_unrealized": round_half_up(pl_unrealized),
-            "xirr_full": xirr_full,
-            "xirr_ann": xirr_ann,
+            "xirr_full": np.nan,
+            "xirr_ann": np.nan,
             "positions": positions or [],
         })
 
@@ -120,6 +308,8 @@ def compute_summary(translator, brokers, data, ref_date, dt_str):
     twrr_ann = np.nan
     volatility = np.nan
     sharpe_ratio = np.nan
+    rolling_metrics = None
+    benchmark = None
 
     if first_dates:
         min_date = min(first_dates)
@@ -134,27 +324,40 @@ def compute_summary(translator, brokers, data, ref_date, dt_str):
         )
         combined_flows.sort(key=lambda x: x[0])
         all_dates, all_flows = zip(*combined_flows)
-        all_dates = list(all_dates)
-        all_flows = list(all_flows)
-        days_xirr = (ref_date - all_dates[0]).days
-        xirr_total_full = xirr(all_flows, all_dates, annualization=days_xirr)
-        xirr_total_ann = xirr(all_flows, all_dates)
+        xirr_series.append((list(all_flows), list(all_dates)))
+        xirr_days.append((ref_date - all_dates[0]).days)
+        xirr_targets.append(None)
+
+        # Full-period and annualized XIRR for every account and the portfolio in one batch
+        n_xirr = len(xirr_series)
+        rates = xirr_batch(xirr_series * 2, annualization=xirr_days + [365] * n_xirr)
+        for target, rate_full, rate_ann in zip(xirr_targets, rates[:n_xirr], rates[n_xirr:]):
+            if target is None:
+                xirr_total_full, xirr_total_ann = float(rate_full), float(rate_ann)
+            else:
+                account_results[target]["xirr_full"] = float(rate_full)
+                account_results[target]["xirr_ann"] = float(rate_ann)
 
         # TWRR
         if pf_history_df is not None and not pf_history_df.empty:
-            trading_days = 252
+            trading_days = _TRADING_DAYS
             days_twrr = len(pf_history_df)
             twrr_total = pf_history_df["cumulative_twrr"].iloc[-1]
             twrr_ann = (1 + twrr_total) ** (trading_days / days_twrr) - 1
 
             # Sharpe
-            risk_free_rate = 0.02
+            risk_free_rate = _RISK_FREE_RATE
             risk_free_daily = (1 + risk_free_rate) ** (1 / trading_days) - 1
             excess_returns = pf_history_df["daily_twrr"] - risk_free_daily
             sharpe_ratio = np.sqrt(trading_days) * (excess_returns.mean() / excess_returns.std())
 
             volatility = pf_history_df["daily_twrr"].std() * np.sqrt(trading_days)
 
+            rolling_metrics = rolling_risk_metrics(pf_history_df["daily_twrr"], risk_free_rate=risk_free_rate)
+
+            if benchmarks:
+                benchmark = _benchmark_comparison(translator, pf_history_df, benchmarks, risk_free_rate)
+
     return {
         "accounts": account_results,
         "portfolio": {
@@ -173,10 +376,265 @@ def compute_summary(translator, brokers, data, ref_date, dt_str):
             "has_positions": accounts_with_positions > 0,
         },
         "pf_history": pf_history_df,
+        "rolling_metrics": rolling_metrics,
+        "benchmark": benchmark,
         "min_date": min_date,
     }
 
 
+def rolling_risk_metrics(daily_returns, windows=_ROLLING_WINDOWS, risk_free_rate=_RISK_FREE_RATE,
+                         trading_days=_TRADING_DAYS):
+    """Annualized rolling volatility, downside deviation, Sharpe and Sortino ratios.
+
+    One cumulative sum of the excess returns, their squares and their squared
+    negative parts serves every window length: each window is then a
+    difference of two prefix sums. A window containing a missing return is NaN,
+    as with pandas rolling(window).
+
+    Returns dict: { window: DataFrame[volatility, downside_deviation, sharpe, sortino] },
+    each indexed like daily_returns.
+    """
+    returns = np.asarray(daily_returns, dtype=float)
+    valid = np.isfinite(returns)
+    risk_free_daily = (1 + risk_free_rate) ** (1 / trading_days) - 1
+    excess = np.where(valid, returns - risk_free_daily, 0.0)
+    # Variances are taken around the full-sample mean to keep the prefix sums well conditioned
+    centered = np.where(valid, excess - excess[valid].mean() if valid.any() else 0.0, 0.0)
+
+    stacked = np.column_stack([valid, excess, centered, centered ** 2, np.minimum(excess, 0.0) ** 2])
+    prefix = np.vstack([np.zeros(stacked.shape[1]), np.cumsum(stacked, axis=0)])
+
+    index = getattr(daily_returns, "index", None)
+    annualization = np.sqrt(trading_days)
+    metrics = {}
+    for window in windows:
+        columns = {name: np.full(len(returns), np.nan)
+                   for name in ("volatility", "downside_deviation", "sharpe", "sortino")}
+        if window <= len(returns) and window > 1:
+            count, sum_excess, sum_centered, sum_sq, sum_down = (prefix[window:] - prefix[:-window]).T
+            with np.errstate(divide="ignore", invalid="ignore"):
+                mean_excess = sum_excess / window
+                std = np.sqrt(np.maximum(sum_sq - sum_centered ** 2 / window, 0.0) / (window - 1))
+                downside = np.sqrt(sum_down / window)
+                full = count == window
+                columns["volatility"][window - 1:] = np.where(full, std * annualization, np.nan)
+                columns["downside_deviation"][window - 1:] = np.where(full, downside * annualization, np.nan)
+                columns["sharpe"][window - 1:] = np.where(full, annualization * mean_excess / std, np.nan)
+                columns["sortino"][window - 1:] = np.where(full, annualization * mean_excess / downside, np.nan)
+        metrics[window] = pd.DataFrame(columns, index=index)
+    return metrics
+
+
+_BENCHMARK_METRICS = ("beta", "alpha", "correlation", "tracking_error", "information_ratio",
+                      "up_capture", "down_capture")
+
+
+def _benchmark_metrics(sums, trading_days):
+    """Regression and capture statistics from the (..., 12, B) sums built in benchmark_statistics."""
+    (n, sum_p, sum_b, sum_pc, sum_bc, sum_pp, sum_bb, sum_pb,
+     up_p, up_b, down_p, down_b) = np.moveaxis(sums, -2, 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_p = sum_p / n
+        mean_b = sum_b / n
+        var_p = (sum_pp - sum_pc * sum_pc / n) / (n - 1)
+        var_b = (sum_bb - sum_bc * sum_bc / n) / (n - 1)
+        cov = (sum_pb - sum_pc * sum_bc / n) / (n - 1)
+        beta = cov / var_b
+        tracking_error = np.sqrt(np.maximum(var_p + var_b - 2 * cov, 0.0) * trading_days)
+        return {
+            "beta": beta,
+            "alpha": trading_days * (mean_p - beta * mean_b),
+            "correlation": cov / np.sqrt(var_p * var_b),
+            "tracking_error": tracking_error,
+            "information_ratio": trading_days * (mean_p - mean_b) / tracking_error,
+            "up_capture": up_p / up_b,
+            "down_capture": down_p / down_b,
+        }
+
+
+def benchmark_statistics(portfolio_returns, benchmark_returns, windows=_ROLLING_WINDOWS,
+                         risk_free_rate=_RISK_FREE_RATE, trading_days=_TRADING_DAYS):
+    """Beta, Jensen's alpha, tracking error, information ratio and up/down capture.
+
+    portfolio_returns is a Series of daily returns and benchmark_returns a
+    DataFrame (one column per benchmark) on the same dates. All the moments
+    the regression needs are stacked for every benchmark and prefix-summed
+    once; the full-period figures and every rolling window are differences
+    of those sums. Days where either return is missing are left out, and a
+    rolling window is NaN unless it holds window complete days.
+
+    Returns dict:
+    {
+        "metrics": DataFrame,   # index benchmark, columns _BENCHMARK_METRICS
+        "rolling": { benchmark: { window: DataFrame[_BENCHMARK_METRICS] } },
+    }
+    """
+    p = np.asarray(portfolio_returns, dtype=float)[:, None]
+    b = benchmark_returns.to_numpy(dtype=float)
+    valid = np.isfinite(p) & np.isfinite(b)
+    risk_free_daily = (1 + risk_free_rate) ** (1 / trading_days) - 1
+    p_excess = np.where(valid, p - risk_free_daily, 0.0)
+    b_excess = np.where(valid, b - risk_free_daily, 0.0)
+    count = np.maximum(valid.sum(axis=0), 1)
+    # Co-moments are taken around the full-sample means to keep the prefix sums well conditioned
+    p_centered = np.where(valid, p_excess - p_excess.sum(axis=0) / count, 0.0)
+    b_centered = np.where(valid, b_excess - b_excess.sum(axis=0) / count, 0.0)
+    up = valid & (b > 0)
+    down = valid & (b < 0)
+
+    stacked = np.stack([
+        valid.astype(float), p_excess, b_excess, p_centered, b_centered,
+        p_centered * p_centered, b_centered * b_centered, p_centered * b_centered,
+        np.where(up, p, 0.0), np.where(up, b, 0.0), np.where(down, p, 0.0), np.where(down, b, 0.0),
+    ], axis=1)
+    prefix = np.concatenate([np.zeros((1,) + stacked.shape[1:]), np.cumsum(stacked, axis=0)])
+
+    columns = list(benchmark_returns.columns)
+    full = _benchmark_metrics(prefix[-1], trading_days)
+    metrics = pd.DataFrame({name: full[name] for name in _BENCHMARK_METRICS}, index=columns)
+
+    n_rows = len(p)
+    rolling = {ticker: {} for ticker in columns}
+    for window in windows:
+        values = {name: np.full((n_rows, len(columns)), np.nan) for name in _BENCHMARK_METRICS}
+        if 2 < window <= n_rows:
+            sums = prefix[window:] - prefix[:-window]
+            window_metrics = _benchmark_metrics(sums, trading_days)
+            complete = sums[:, 0, :] == window
+            for name in _BENCHMARK_METRICS:
+                values[name][window - 1:] = np.where(complete, window_metrics[name], np.nan)
+        for k, ticker in enumerate(columns):
+            rolling[ticker][window] = pd.DataFrame(
+                {name: values[name][:, k] for name in _BENCHMARK_METRICS},
+                index=benchmark_returns.index,
+            )
+
+    return {"metrics": metrics, "rolling": rolling}
+
+
+def _benchmark_comparison(translator, pf_history_df, benchmarks, risk_free_rate):
+    """Align the benchmarks' prices on the portfolio dates and compare the returns."""
+    dates = pd.DatetimeIndex(pd.to_datetime(pf_history_df["Date"]))
+    matrix = get_returns_matrix(benchmarks, dates[0] - pd.Timedelta(days=10),
+                                dates[-1] + pd.Timedelta(days=1), common_dates=False)
+    columns = matrix["prices"].columns if matrix is not None else []
+    missing = [ticker for ticker in benchmarks if ticker not in columns]
+    if missing:
+        raise RuntimeError(translator.get("operations.stock.ticker_nodata", ticker=missing[0]))
+
+    # Benchmark returns over the same trading days as the portfolio TWRR
+    prices = matrix["prices"][benchmarks]
+    prices = prices.reindex(prices.index.union(dates)).ffill().reindex(dates)
+    benchmark_returns = prices.pct_change(fill_method=None)
+
+    result = benchmark_statistics(
+        pf_history_df["daily_twrr"].to_numpy(), benchmark_returns, risk_free_rate=risk_free_rate
+    )
+    result["tickers"] = list(benchmarks)
+    return result
+
+
+# Rolling correlation rows are cached up to this many bytes, in LRU order
+_ROLLING_CORR_CACHE_BYTES = 32 * 2**20
+_rolling_corr_lock = threading.Lock()
+# key: (tickers, start, end, window, asset, market-data epoch) -> (dates, columns, row)
+_rolling_corr_cache = OrderedDict()
+_rolling_corr_bytes = 0
+
+
+def _windowed_sum(values, window):
+    """Sum over the trailing window along axis 0, via one cumulative sum."""
+    cumulative = np.cumsum(values, axis=0)
+    out = cumulative[window - 1:].copy()
+    out[1:] -= cumulative[:-window]
+    return out
+
+
+def rolling_correlation_tensor(returns_df, window, rows=None):
+    """Rolling Pearson correlation of columns of returns_df with every column.
+
+    All pairs are computed in one pass over cumulative sums of the returns,
+    their squares and cross-products. NaN returns (e.g. before a ticker's
+    first price) are excluded pairwise, and a window is valid only when it
+    holds window observations of both columns, as in pandas rolling().corr().
+    rows restricts the first axis to those column positions (all columns when
+    None), which keeps memory at O(T * len(rows) * N).
+    Returns an array of shape (T, len(rows), N); the first window - 1 rows are NaN.
+    """
+    values = returns_df.to_numpy(dtype=float)
+    n_rows, n_cols = values.shape
+    rows = np.arange(n_cols) if rows is None else np.asarray(rows, dtype=int)
+    tensor = np.full((n_rows, len(rows), n_cols), np.nan)
+    if n_rows < window:
+        return tensor
+
+    valid = ~np.isnan(values)
+    # Centering on the full-sample mean keeps the cumulative sums well conditioned
+    centered = np.where(valid, values - np.nanmean(values, axis=0), 0.0)
+    mask = valid.astype(float)
+    centered_x, mask_x = centered[:, rows], mask[:, rows]
+
+    count = _windowed_sum(np.einsum("ti,tj->tij", mask_x, mask), window)
+    sum_x = _windowed_sum(np.einsum("ti,tj->tij", centered_x, mask), window)
+    sum_y = _windowed_sum(np.einsum("ti,tj->tij", mask_x, centered), window)
+    sum_xx = _windowed_sum(np.einsum("ti,tj->tij", centered_x * centered_x, mask), window)
+    sum_yy = _windowed_sum(np.einsum("ti,tj->tij", mask_x, centered * centered), window)
+    sum_xy = _windowed_sum(np.einsum("ti,tj->tij", centered_x, centered), window)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cov = sum_xy - sum_x * sum_y / count
+        var_x = sum_xx - sum_x * sum_x / count
+        var_y = sum_yy - sum_y * sum_y / count
+        corr = cov / np.sqrt(var_x * var_y)
+
+    scale = np.nanmax(np.abs(values)) ** 2 if valid.any() else 0.0
+    degenerate = (count < window) | (var_x <= 1e-14 * scale * window) | (var_y <= 1e-14 * scale * window)
+    corr[degenerate] = np.nan
+    tensor[window - 1:] = np.clip(corr, -1.0, 1.0)
+    return tensor
+
+
+def _rolling_corr_lookup(tickers, start_ref_date, end_ref_date, window, asset):
+    """Rolling correlation of asset with every ticker of tickers, cached.
+
+    Returns (dates, columns, row) with row of shape (T, len(columns)), or None
+    when no prices are available; row is None when asset has no prices.
+    """
+    global _rolling_corr_bytes
+    key = (tuple(sorted(tickers)), str(start_ref_date), str(end_ref_date), window, asset, market_data_epoch())
+    with _rolling_corr_lock:
+        if key in _rolling_corr_cache:
+            _rolling_corr_cache.move_to_end(key)
+            return _rolling_corr_cache[key]
+
+    matrix = get_returns_matrix(sorted(tickers), start_ref_date, end_ref_date, common_dates=False)
+    if matrix is None:
+        return None
+    returns_df = matrix["simple_returns"]
+    columns = list(returns_df.columns)
+    if asset not in columns:
+        return returns_df.index, columns, None
+    row = rolling_correlation_tensor(returns_df, window, rows=[columns.index(asset)])[:, 0, :]
+    entry = (returns_df.index, columns, row)
+
+    with _rolling_corr_lock:
+        if row.nbytes <= _ROLLING_CORR_CACHE_BYTES and key not in _rolling_corr_cache:
+            _rolling_corr_cache[key] = entry
+            _rolling_corr_bytes += row.nbytes
+            while _rolling_corr_bytes > _ROLLING_CORR_CACHE_BYTES:
+                _, (_, _, evicted) = _rolling_corr_cache.popitem(last=False)
+                _rolling_corr_bytes -= evicted.nbytes
+    return entry
+
+
+def clear_rolling_correlations():
+    """Drop every cached rolling correlation."""
+    global _rolling_corr_bytes
+    with _rolling_corr_lock:
+        _rolling_corr_cache.clear()
+        _rolling_corr_bytes = 0
+
+
 def compute_correlation(translator, data, start_ref_date, end_ref_date, asset1=None, asset2=None, window=None):
     """
     Returns dict:
@@ -186,22 +644,23 @@ def compute_correlation(translator, data, start_ref_date, end_ref_date, asset1=N
         "active_tickers": list,
     }
     When asset1/asset2/window are None, only simple correlation is computed.
-    When they are provided, only rolling correlation is computed.
+    When they are provided, only rolling correlation is computed. The rolling
+    correlation of asset1 with every held ticker and asset2 is computed at
+    once and cached, so browsing other second assets over the same range and
+    window is a lookup.
     """
-    for account in data:
-        account[1] = account[1][account[1]["operation"].isin(["Buy", "Sell", "Split"])]
-
+    # get_tickers filters the trades itself, on the shared consolidated ledger
     _, active_tickers = get_tickers(translator, data)
     correlation_matrix = None
     rolling_corr = None
 
     if asset1 and asset2 and window:
         # Rolling correlation only
-        close_df, _ = download_close([asset1, asset2], start=start_ref_date, end=end_ref_date)
-        if isinstance(close_df, pd.Series):
-            close_df = close_df.to_frame(name=asset1)
+        universe = set(t[0] for t in active_tickers or []) | {asset1, asset2}
+        lookup = _rolling_corr_lookup(universe, start_ref_date, end_ref_date, window, asset1)
+        columns = lookup[1] if lookup is not None else []
 
-        missing = [t for t in [asset1, asset2] if t not in close_df.columns]
+        missing = [t for t in [asset1, asset2] if t not in columns]
         if missing:
             ticker = missing[0]
             try:
@@ -210,19 +669,16 @@ def compute_correlation(translator, data, start_ref_date, end_ref_date, asset1=N
                 raise
             raise RuntimeError(translator.get("operations.stock.ticker_nodata", ticker=ticker))
 
-        close_df = close_df.ffill()
-        returns_df = close_df.pct_change().dropna()
-        rolling_corr = returns_df[asset1].rolling(window=window).corr(returns_df[asset2])
+        dates, columns, row = lookup
+        rolling_corr = pd.Series(row[:, columns.index(asset2)], index=dates)
     else:
         # Simple correlation only
         if active_tickers:
             active_ticker_names = list(set([t[0] for t in active_tickers]))
-            close_df, _ = download_close(active_ticker_names, start=start_ref_date, end=end_ref_date)
-            if isinstance(close_df, pd.Series):
-                close_df = close_df.to_frame(name=active_ticker_names[0])
-            close_df = close_df.ffill()
-            returns_df = close_df.pct_change().dropna()
-            correlation_matrix = returns_df.corr()
+            moments = get_moments(active_ticker_names, start_ref_date, end_ref_date, returns="simple_returns")
+            if moments is not None:
+                accumulator, columns = moments
+                correlation_matrix = pd.DataFrame(accumulator.correlation(), index=columns, columns=columns)
 
     return {
         "correlation_matrix": correlation_matrix,
@@ -231,56 +687,145 @@ def compute_correlation(translator, data, start_ref_date, end_ref_date, asset1=N
     }
 
 
-def compute_drawdown(translator, data, start_ref_date, end_ref_date):
+def drawdown_analysis(values, dates, top_n=5):
+    """Drawdown series, episodes and Ulcer index of a value or wealth-index series.
+
+    Works in a single vectorized pass: the running maximum gives the drawdown,
+    its sign changes delimit the episodes, and per-episode minima come from
+    segmented reductions, so the cost stays O(n) on long daily histories.
+
+    Returns dict:
+    {
+        "drawdown": ndarray,          # value / running max - 1, <= 0
+        "mdd": float,
+        "episodes": [{ peak, trough, recovery, peak_idx, trough_idx, recovery_idx,
+                       depth, days }],   # top_n deepest; recovery None if still under water
+        "ulcer_index": float,         # RMS of the percentage drawdown
+        "time_under_water": float,    # share of observations below the running max
+    }
+    """
+    values = np.asarray(values, dtype=float)
+    dates = pd.DatetimeIndex(dates)
+    n = len(values)
+    if n == 0:
+        return {"drawdown": values, "mdd": np.nan, "episodes": [],
+                "ulcer_index": np.nan, "time_under_water": np.nan}
+
+    running_max = np.maximum.accumulate(values)
+    drawdown = values / running_max - 1
+    under = drawdown < 0
+
+    edges = np.diff(np.concatenate([[False], under, [False]]).astype(np.int8))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)   # first index back at the running max, or n
+
+    episodes = []
+    if len(starts):
+        depths = np.minimum.reduceat(drawdown, starts)
+        # Episode id of every under-water observation, to locate each trough
+        episode_id = np.cumsum(edges[:-1] == 1) - 1
+        at_trough = under & (drawdown == depths[np.maximum(episode_id, 0)])
+        trough_ids, first_trough = np.unique(episode_id[at_trough], return_index=True)
+        troughs = np.empty(len(starts), dtype=int)
+        troughs[trough_ids] = np.flatnonzero(at_trough)[first_trough]
+
+        for k in np.argsort(depths, kind="stable")[:top_n]:
+            peak_idx = starts[k] - 1
+            recovery_idx = ends[k] if ends[k] < n else None
+            last_idx = recovery_idx if recovery_idx is not None else n - 1
+            episodes.append({
+                "peak": dates[peak_idx],
+                "trough": dates[troughs[k]],
+                "recovery": dates[recovery_idx] if recovery_idx is not None else None,
+                "peak_idx": int(peak_idx),
+                "trough_idx": int(troughs[k]),
+                "recovery_idx": int(recovery_idx) if recovery_idx is not None else None,
+                "depth": float(depths[k]),
+                "days": int((dates[last_idx] - dates[peak_idx]).days),
+            })
+
+    return {
+        "drawdown": drawdown,
+        "mdd": float(drawdown.min()),
+        "episodes": episodes,
+        "ulcer_index": float(np.sqrt(np.mean((drawdown * 100) ** 2))),
+        "time_under_water": float(under.mean()),
+    }
+
+
+def compute_drawdown(translator, data, start_ref_date, end_ref_date, top_n=5):
     """
+    NAV drawdowns include the effect of deposits and withdrawals; the TWRR
+    drawdown is measured on the time-weighted wealth index and isolates the
+    performance of the investments.
+
     Returns dict:
     {
         "pf_history": DataFrame,
         "drawdown": Series,
         "mdd": float,
+        "episodes": list,             # top_n NAV drawdown episodes, see drawdown_analysis
+        "ulcer_index": float,
+        "time_under_water": float,
+        "twrr_drawdown": Series,
+        "twrr_mdd": float,
+        "twrr_ulcer_index": float,
         "has_data": bool,
     }
     """
     data = [account for account in data if len(account[1]) > 1]
 
     if not data:
-        return {"pf_history": None, "drawdown": None, "mdd": None, "has_data": False}
+        return {"pf_history": None, "drawdown": None, "mdd": None, "episodes": [],
+                "ulcer_index": None, "time_under_water": None, "twrr_drawdown": None,
+                "twrr_mdd": None, "twrr_ulcer_index": None, "has_data": False}
 
     pf_history_df = portfolio_history(translator, start_ref_date, end_ref_date, data)
     pf_history_df = pf_history_df.dropna()
-    running_max = pf_history_df["nav"].expanding().max()
-    drawdown = (pf_history_df["nav"] - running_max) / running_max
-    mdd = drawdown.min()
+    dates = pd.to_datetime(pf_history_df["Date"])
+
+    nav = drawdown_analysis(pf_history_df["nav"].to_numpy(), dates, top_n=top_n)
+    twrr = drawdown_analysis((1 + pf_history_df["cumulative_twrr"]).to_numpy(), dates, top_n=0)
 
     return {
         "pf_history": pf_history_df,
-        "drawdown": drawdown,
-        "mdd": mdd,
+        "drawdown": pd.Series(nav["drawdown"], index=pf_history_df.index),
+        "mdd": nav["mdd"],
+        "episodes": nav["episodes"],
+        "ulcer_index": nav["ulcer_index"],
+        "time_under_water": nav["time_under_water"],
+        "twrr_drawdown": pd.Series(twrr["drawdown"], index=pf_history_df.index),
+        "twrr_mdd": twrr["mdd"],
+        "twrr_ulcer_index": twrr["ulcer_index"],
         "has_data": True,
     }
 
 
-def compute_var_mc(translator, data, confidence_interval, projected_days):
-    """
-    Returns dict:
-    {
-        "var": float,
-        "scenario_return": list,
-        "portfolio_value": float,
-        "has_positions": bool,
-    }
+_VAR_START_DATE = "2010-01-01"
+# Filtered HS: days whose mean squared return seeds the EWMA variance, and the variance floor
+_EWMA_SEED_DAYS = 30
+_MIN_VARIANCE = 1e-12
+
+
+def _empty_var_result(portfolio_value=0.0):
+    return {"var": 0.0, "es": 0.0, "var_se": np.nan, "num_simulations": 0,
+            "scenario_return": [], "contributions": {}, "rolling": None,
+            "portfolio_value": portfolio_value, "has_positions": False}
+
+
+def _var_inputs(translator, data):
+    """Current positions, cash and daily log-returns shared by all VaR methods.
+
+    Returns (inputs, empty_result): exactly one of the two is None.
     """
     data = [account for account in data if account[1]["assets_value"].iloc[-1] > 0.0]
 
     if not data:
-        return {"var": 0.0, "scenario_return": [], "portfolio_value": 0.0, "has_positions": False}
+        return None, _empty_var_result()
 
-    start_ref_date = "2010-01-01"
     end_dt = datetime.now()
 
     _, total_tickers = get_tickers(translator, data)
-    usd_tickers = [t[0] for t in total_tickers if t[1] == "USD"]
-    eur_tickers = [t[0] for t in total_tickers if t[1] == "EUR"]
 
     total_positions = []
     total_liquidity = []
@@ -298,103 +843,341 @@ def compute_var_mc(translator, data, confidence_interval, projected_days):
     assets_value = [pos["value"] for pos in aggr_positions]
     asset_tickers = [pos["ticker"] for pos in aggr_positions]
 
-    cash = sum(total_liquidity)
-    portfolio_value = sum(assets_value)
-    weights = np.array(assets_value) / portfolio_value
-    portfolio_value = portfolio_value + cash
+    portfolio_value = sum(assets_value) + sum(total_liquidity)
 
-    tickers_to_download = []
-    if usd_tickers:
-        tickers_to_download.extend(usd_tickers)
-    if eur_tickers:
-        tickers_to_download.extend(eur_tickers)
+    if not asset_tickers:
+        return None, _empty_var_result(portfolio_value)
 
-    if tickers_to_download:
-        tickers_to_download.append("USDEUR=X")
-    else:
-        return {"var": 0.0, "scenario_return": [], "portfolio_value": portfolio_value, "has_positions": False}
+    # Up to the end of today, so every call during the day shares the cached matrix
+    currencies = {t[0]: t[1] for t in total_tickers if t[0] in asset_tickers}
+    var_end = pd.Timestamp(end_dt.date()) + pd.Timedelta(days=1)
+    matrix = get_returns_matrix(asset_tickers, _VAR_START_DATE, var_end, currencies=currencies)
+    if matrix is None:
+        return None, _empty_var_result(portfolio_value)
 
-    close_prices, _ = download_close(tickers_to_download, start=start_ref_date, end=end_dt)
+    log_returns = matrix["log_returns"][asset_tickers]
+    moments, _ = get_moments(asset_tickers, _VAR_START_DATE, var_end, currencies=currencies)
 
-    if isinstance(close_prices, pd.Series):
-        close_prices = close_prices.to_frame(name=tickers_to_download[0])
+    return {
+        "asset_tickers": asset_tickers,
+        "assets_value": np.array(assets_value),
+        "portfolio_value": portfolio_value,
+        "log_returns": log_returns,
+        "moments": moments,
+    }, None
 
-    if close_prices.empty:
-        return {"var": 0.0, "scenario_return": [], "portfolio_value": portfolio_value, "has_positions": False}
 
-    close_prices = close_prices.ffill()
+def compute_var_mc(translator, data, confidence_interval, projected_days,
+                   num_simulations=50000, chunk_size=25000, seed=None,
+                   sampler="mc", antithetic=False, target_rel_se=None):
+    """
+    sampler: "mc" (pseudo-random), "sobol" or "halton" (randomized quasi-Monte Carlo).
+    antithetic: pair every draw z with -z.
+    target_rel_se: stop as soon as the standard error of VaR falls below this
+        fraction of VaR; num_simulations is then only the upper bound.
+
+    Returns dict:
+    {
+        "var": float,
+        "es": float,
+        "var_se": float,          # NaN when a single chunk was simulated
+        "num_simulations": int,   # scenarios actually simulated
+        "scenario_return": ndarray,
+        "histogram": (counts, bin_edges) or None,
+        "contributions": { ticker: float },
+        "rolling": None,
+        "portfolio_value": float,
+        "has_positions": bool,
+        "done": True,
+    }
+    """
+    for result in iter_var_mc(translator, data, confidence_interval, projected_days,
+                              num_simulations=num_simulations, chunk_size=chunk_size, seed=seed,
+                              sampler=sampler, antithetic=antithetic, target_rel_se=target_rel_se):
+        pass
+    return result
+
+
+def iter_var_mc(translator, data, confidence_interval, projected_days,
+                num_simulations=50000, chunk_size=25000, seed=None,
+                sampler="mc", antithetic=False, target_rel_se=None, num_bins=40):
+    """Monte Carlo VaR as a generator of successively refined results.
+
+    Yields one result dict, shaped as compute_var_mc's, after every chunk of
+    scenarios: the running VaR, ES, standard error and contributions over the
+    scenarios simulated so far, and the histogram of their P&L on bins fixed
+    by the first chunk (outliers fall in the outer bins), so consecutive
+    histograms can be drawn on the same axis. The last result has
+    "done": True; a consumer may stop iterating earlier and keep the latest
+    estimate. scenario_return is a view of a buffer the generator keeps
+    filling: copy it to keep it past the next step.
+    """
+    inputs, empty_result = _var_inputs(translator, data)
+    if inputs is None:
+        yield {**empty_result, "histogram": None, "done": True}
+        return
+
+    # Streaming moments: a daily refresh only folds in the new trading days
+    mean_returns = inputs["moments"].mean
+    cov_matrix = inputs["moments"].covariance()
+
+    draw_normals = _normal_sampler(sampler, antithetic, np.random.default_rng(seed))
+    chunks = _simulate_chunks(
+        mean_returns, _cov_factor(cov_matrix), inputs["assets_value"], projected_days,
+        confidence_interval, num_simulations, chunk_size, draw_normals, target_rel_se,
+    )
+    counts = np.zeros(num_bins, dtype=np.int64)
+    bin_edges = None
+    for scenario_return, chunk_pnl, tail_pnl, var_se, done in chunks:
+        if bin_edges is None:
+            low, high = chunk_pnl.min(), chunk_pnl.max()
+            pad = 0.05 * (high - low) if high > low else max(1.0, abs(low))
+            bin_edges = np.linspace(low - pad, high + pad, num_bins + 1)
+        counts += np.histogram(np.clip(chunk_pnl, bin_edges[0], bin_edges[-1]), bins=bin_edges)[0]
+
+        var_value = -np.percentile(scenario_return, 100 * (1 - confidence_interval))
+        es_value = -scenario_return[scenario_return <= -var_value].mean()
+        contributions = _var_contributions(tail_pnl, var_value, confidence_interval, len(scenario_return))
+
+        yield {
+            "var": var_value,
+            "es": es_value,
+            "var_se": var_se,
+            "num_simulations": len(scenario_return),
+            "scenario_return": scenario_return,
+            "histogram": (counts.copy(), bin_edges),
+            "contributions": dict(zip(inputs["asset_tickers"], contributions)),
+            "rolling": None,
+            "portfolio_value": inputs["portfolio_value"],
+            "has_positions": True,
+            "done": done,
+        }
+
+
+def compute_var_hist(translator, data, confidence_interval, projected_days,
+                     lookback=500, filtered=False, ewma_lambda=0.94):
+    """Historical-simulation VaR and expected shortfall.
+
+    Scenarios are the overlapping projected_days log-returns observed in the
+    last `lookback` trading days, applied to today's positions. With
+    filtered=True, returns are first standardized by an EWMA volatility
+    estimate and rescaled to the volatility at the end of each window
+    (filtered historical simulation).
 
-    final_usd_df = pd.DataFrame([])
-    final_eur_df = pd.DataFrame([])
-    indices_to_intersect = []
+    Returns dict:
+    {
+        "var": float,
+        "es": float,
+        "scenario_return": ndarray,   # P&L scenarios of the latest window
+        "rolling": DataFrame,         # Date, VaR, ES for every window end
+        "portfolio_value": float,
+        "has_positions": bool,
+    }
+    """
+    inputs, empty_result = _var_inputs(translator, data)
+    if inputs is None:
+        return empty_result
+
+    log_returns = inputs["log_returns"]
+    window = lookback - projected_days + 1
+    if window < 20 or len(log_returns) < lookback:
+        raise ValueError(translator.get("analysis.var.hist_nodata"))
+
+    pnl_windows, end_rows = _historical_windows(
+        log_returns.to_numpy(), inputs["assets_value"], projected_days, window,
+        ewma_lambda if filtered else None,
+    )
+    var_values, es_values = _windows_var_es(pnl_windows, confidence_interval)
+
+    rolling = pd.DataFrame({
+        "Date": log_returns.index[end_rows],
+        "VaR": var_values,
+        "ES": es_values,
+    })
 
-    exch_df = close_prices["USDEUR=X"].dropna()
-    indices_to_intersect.append(exch_df.index)
+    return {
+        "var": float(var_values[-1]),
+        "es": float(es_values[-1]),
+        "var_se": np.nan,
+        "num_simulations": window,
+        "scenario_return": pnl_windows[-1],
+        "contributions": {},
+        "rolling": rolling,
+        "portfolio_value": inputs["portfolio_value"],
+        "has_positions": True,
+    }
 
-    if eur_tickers:
-        eur_prices_df = close_prices[eur_tickers].dropna(how="all")
-        indices_to_intersect.append(eur_prices_df.index)
-        final_eur_df = eur_prices_df
 
-    if usd_tickers:
-        usd_prices_df = close_prices[usd_tickers].dropna(how="all")
-        indices_to_intersect.append(usd_prices_df.index)
-        final_usd_df = usd_prices_df.mul(exch_df, axis=0)
+def _historical_windows(log_returns, assets_value, projected_days, window,
+                        ewma_lambda=None, block_size=64):
+    """Portfolio P&L scenarios for every rolling lookback window.
 
-    if not indices_to_intersect:
-        common_dates = pd.DatetimeIndex([])
-    else:
-        common_dates = indices_to_intersect[0]
-        for idx in indices_to_intersect[1:]:
-            common_dates = common_dates.intersection(idx)
-
-    dfs_to_concat = []
-    if usd_tickers:
-        dfs_to_concat.append(final_usd_df.loc[common_dates])
-    if eur_tickers:
-        dfs_to_concat.append(final_eur_df.loc[common_dates])
-
-    if dfs_to_concat:
-        prices_df = pd.concat(dfs_to_concat, axis=1)
+    Horizon returns are overlapping projected_days sums computed from a
+    cumulative sum. Returns (pnl_windows, end_rows): pnl_windows[w] holds the
+    `window` scenarios of the w-th window, whose last scenario ends on
+    daily row end_rows[w].
+    """
+    if ewma_lambda is not None:
+        # EWMA variance seeded with the mean square of the first days, rather
+        # than the first squared return alone (often 0 after a holiday), and
+        # floored so zero-variance assets do not divide by zero.
+        # ewma_var[t] is the forecast for day t + 1
+        seed = np.mean(log_returns[:_EWMA_SEED_DAYS] ** 2, axis=0, keepdims=True)
+        ewma_var = (pd.DataFrame(np.vstack([seed, log_returns ** 2]))
+                    .ewm(alpha=1 - ewma_lambda, adjust=False).mean().to_numpy())
+        ewma_var = np.maximum(ewma_var, _MIN_VARIANCE)
+        forecast = ewma_var[:-1]
+        ewma_var = ewma_var[1:]
+        daily = log_returns / np.sqrt(forecast)
     else:
-        return {"var": 0.0, "scenario_return": [], "portfolio_value": portfolio_value, "has_positions": False}
+        daily = log_returns
+
+    cumulative = np.vstack([np.zeros((1, daily.shape[1])), np.cumsum(daily, axis=0)])
+    horizon = cumulative[projected_days:] - cumulative[:-projected_days]
+    end_rows = np.arange(window - 1, len(horizon)) + projected_days - 1
+
+    if ewma_lambda is None:
+        scenario_pnl = np.expm1(horizon) @ assets_value
+        return np.lib.stride_tricks.sliding_window_view(scenario_pnl, window), end_rows
+
+    # Filtered: every window is rescaled by the volatility at its own end,
+    # so per-asset P&L is evaluated per window, in blocks to bound memory
+    horizon_windows = np.lib.stride_tricks.sliding_window_view(horizon, window, axis=0)
+    scale = np.sqrt(ewma_var[end_rows])
+    pnl_windows = np.empty((len(end_rows), window))
+    for start in range(0, len(end_rows), block_size):
+        block = slice(start, start + block_size)
+        scaled = np.expm1(horizon_windows[block] * scale[block][:, :, None])
+        pnl_windows[block] = np.einsum("bnw,n->bw", scaled, assets_value)
+    return pnl_windows, end_rows
+
+
+def _windows_var_es(pnl_windows, confidence_interval):
+    """VaR and expected shortfall of every row of pnl_windows."""
+    alpha = 1 - confidence_interval
+    var_values = -np.percentile(pnl_windows, 100 * alpha, axis=1)
+    k = max(1, int(np.floor(alpha * pnl_windows.shape[1])))
+    worst = np.partition(pnl_windows, k - 1, axis=1)[:, :k]
+    es_values = -worst.mean(axis=1)
+    return var_values, es_values
+
+
+def _cov_factor(cov_matrix):
+    """Lower-triangular factor L with L @ L.T == cov_matrix.
+
+    Falls back to an eigendecomposition with clipped eigenvalues when the
+    covariance is only positive semi-definite (e.g. perfectly correlated assets).
+    """
+    try:
+        return np.linalg.cholesky(cov_matrix)
+    except np.linalg.LinAlgError:
+        eigvals, eigvecs = np.linalg.eigh(cov_matrix)
+        return eigvecs * np.sqrt(np.clip(eigvals, 0.0, None))
+
+
+def _normal_sampler(sampler, antithetic, rng):
+    """Return draw(n, dim) producing one chunk of standard normal draws.
 
-    prices_df = prices_df[asset_tickers]
-    log_returns = np.log(prices_df / prices_df.shift(1)).dropna()
+    Quasi-Monte Carlo chunks are independent randomizations of the same
+    low-discrepancy sequence, so chunks stay i.i.d. replicates of each other.
+    """
+    if sampler == "sobol":
+        def draw(n, dim):
+            return qmc.norm_ppf(qmc.sobol(n, dim, rng))
+    elif sampler == "halton":
+        def draw(n, dim):
+            return qmc.norm_ppf(qmc.halton(n, dim, rng))
+    elif sampler == "mc":
+        def draw(n, dim):
+            return rng.standard_normal((n, dim))
+    else:
+        raise ValueError(f"Unknown sampler: {sampler}")
 
-    def expected_return(tickers, log_returns, weights):
-        means = []
-        for ticker, weight in zip(tickers, weights):
-            ticker_df = log_returns[ticker].copy().dropna()
-            ticker_mean = ticker_df.mean() * weight
-            means.append(ticker_mean)
-        return np.sum(means)
+    if not antithetic:
+        return draw
 
-    def standard_deviation(cov_matrix, weights):
-        variance = weights.T @ cov_matrix @ weights
-        return np.sqrt(variance)
+    def draw_antithetic(n, dim):
+        half = draw((n + 1) // 2, dim)
+        return np.vstack([half, -half])[:n]
+    return draw_antithetic
 
-    cov_matrix = log_returns.cov()
-    portfolio_expected_return = expected_return(asset_tickers, log_returns, weights)
-    portfolio_std_dev = standard_deviation(cov_matrix, weights)
 
-    num_simulations = 50000
-    scenario_return = []
+def _simulate_chunks(mean_returns, cov_factor, assets_value, projected_days,
+                     confidence_interval, num_simulations, chunk_size, draw_normals,
+                     target_rel_se=None, min_chunks=4):
+    """Simulate correlated per-asset horizon P&L in fixed-size chunks.
 
-    for _ in range(num_simulations):
-        z_score = np.random.normal(0, 1)
-        gain_loss = (portfolio_value * portfolio_expected_return * projected_days +
-                     portfolio_value * portfolio_std_dev * z_score * np.sqrt(projected_days))
-        scenario_return.append(gain_loss)
+    Daily log-returns are i.i.d. multivariate normal, so the horizon log-return
+    of each asset is drawn directly as mu * days + sqrt(days) * L @ z.
+    Only the portfolio P&L of every scenario is kept, plus the per-asset P&L
+    of each chunk's left tail, so memory stays bounded by chunk_size x assets.
 
-    var_value = -np.percentile(scenario_return, 100 * (1 - confidence_interval))
+    The standard error of VaR is estimated by batch means over the chunks.
+    With target_rel_se set, simulation stops once at least min_chunks are done
+    and the standard error is below target_rel_se * VaR.
 
-    return {
-        "var": var_value,
-        "scenario_return": scenario_return,
-        "portfolio_value": portfolio_value,
-        "has_positions": True,
-    }
+    Yields (scenario_return, chunk_pnl, tail_pnl, var_se, done) after every
+    chunk: the portfolio P&L simulated so far, that of the last chunk, the
+    tail rows [portfolio_pnl, asset_1_pnl, ..., asset_n_pnl] so far, and
+    whether this is the last chunk.
+    """
+    n_assets = len(assets_value)
+    drift = mean_returns * projected_days
+    scale = cov_factor.T * np.sqrt(projected_days)
+    tail_fraction = min(1.0, 2 * (1 - confidence_interval))
+    percentile = 100 * (1 - confidence_interval)
+
+    scenario_return = np.empty(num_simulations)
+    tails = []
+    chunk_vars = []
+    var_se = np.nan
+    for start in range(0, num_simulations, chunk_size):
+        n = min(chunk_size, num_simulations - start)
+        end = start + n
+        asset_pnl = draw_normals(n, n_assets) @ scale
+        asset_pnl += drift
+        np.expm1(asset_pnl, out=asset_pnl)
+        asset_pnl *= assets_value
+        pnl = asset_pnl @ np.ones(n_assets)
+        scenario_return[start:end] = pnl
+
+        k = min(n, int(np.ceil(n * tail_fraction)) + 1)
+        tail_idx = np.argpartition(pnl, k - 1)[:k]
+        tails.append(np.column_stack([pnl[tail_idx], asset_pnl[tail_idx]]))
+        if len(tails) > 1:
+            tails = [np.vstack(tails)]
+
+        chunk_vars.append(-np.percentile(pnl, percentile))
+        if len(chunk_vars) > 1:
+            var_se = np.std(chunk_vars, ddof=1) / np.sqrt(len(chunk_vars))
+        done = end == num_simulations
+        if target_rel_se is not None and len(chunk_vars) >= min_chunks:
+            var_estimate = -np.percentile(scenario_return[:end], percentile)
+            done = done or var_se <= target_rel_se * abs(var_estimate)
+
+        yield scenario_return[:end], pnl, tails[0], var_se, done
+        if done:
+            return
+
+
+def _var_contributions(tail_pnl, var_value, confidence_interval, num_simulations):
+    """Per-asset Euler contributions to VaR, summing to var_value.
+
+    Each asset's contribution is minus its average P&L over the scenarios
+    ranked closest to the VaR quantile, rescaled so the total matches VaR.
+    """
+    alpha_rank = (1 - confidence_interval) * num_simulations
+    band = max(25, int(0.005 * num_simulations))
+    order = np.argsort(tail_pnl[:, 0])
+    lo = int(max(0, alpha_rank - band))
+    hi = int(min(len(order), alpha_rank + band + 1))
+    window = tail_pnl[order[lo:hi]]
+
+    contributions = -window[:, 1:].mean(axis=0)
+    total = contributions.sum()
+    if total != 0 and np.isfinite(total):
+        contributions *= var_value / total
+    return contributions
 
 
 def compute_allocation(translator, data, ref_date):
@@ -1,10 +1,21 @@
+import threading
+import weakref
+
 import flet as ft
 import flet_charts as fch
 import numpy as np
+import pandas as pd
+
+from utils.clustering import correlation_clusters
+from utils.lod import LodPyramid
+
+_pyramid_lock = threading.Lock()
+# id(source series) -> (weak reference to the source, LodPyramid of its finite rows)
+_pyramids = {}
 
 
-def _date_axis_labels(dates, num_labels=6):
-    """Create evenly-spaced ChartAxisLabels from a list of dates."""
+def _date_axis_labels(dates, num_labels=6, offset=0):
+    """Create evenly-spaced ChartAxisLabels from a list of dates, the first one at x = offset."""
     n = len(dates)
     if n == 0:
         return []
@@ -20,7 +31,7 @@ def _date_axis_labels(dates, num_labels=6):
             text = dt.strftime("%Y-%m-%d")
         else:
             text = str(dt)[:10]
-        labels.append(fch.ChartAxisLabel(value=i, label=text))
+        labels.append(fch.ChartAxisLabel(value=offset + i, label=text))
     return labels
 
 
@@ -42,79 +53,169 @@ def _y_axis_labels(y_min, y_max, num_labels=5, suffix=""):
     return labels
 
 
-def _downsample_series(data, max_points=200):
-    """Downsample data using Largest Triangle Three Buckets algorithm for performance.
+def _bucket_edges(n, n_buckets):
+    """Split points 1..n-2 into n_buckets contiguous buckets of (almost) equal size: bucket i is [edges[i], edges[i + 1])."""
+    edges = (np.arange(n_buckets + 1) * ((n - 2) / n_buckets)).astype(np.int64) + 1
+    edges[-1] = n - 1
+    return edges
+
+
+def _bucket_matrix(n, n_buckets):
+    """Point indices of each bucket (see _bucket_edges), one row per bucket.
 
-    Keeps first, last, and most visually significant points in between.
+    Rows are padded to the widest bucket; mask is False on the padding.
     """
-    n = len(data)
-    if n <= max_points:
-        return data, list(range(n))
-
-    # Always keep first and last
-    sampled = [data[0]]
-    sampled_indices = [0]
-
-    bucket_size = (n - 2) / (max_points - 2)
-
-    a = 0  # Initially point a is the first point
-
-    for i in range(max_points - 2):
-        # Calculate point average for next bucket
-        avg_x = 0
-        avg_y = 0
-        avg_range_start = int((i + 1) * bucket_size) + 1
-        avg_range_end = int((i + 2) * bucket_size) + 1
-        avg_range_end = min(avg_range_end, n)
-        avg_range_length = avg_range_end - avg_range_start
-
-        if avg_range_length > 0:
-            for j in range(avg_range_start, avg_range_end):
-                avg_x += j
-                avg_y += data[j]
-            avg_x /= avg_range_length
-            avg_y /= avg_range_length
-        else:
-            avg_x = avg_range_start
-            avg_y = data[avg_range_start] if avg_range_start < n else data[-1]
+    edges = _bucket_edges(n, n_buckets)
+    width = int(np.diff(edges).max())
+    idx = edges[:-1, None] + np.arange(width)
+    mask = idx < edges[1:, None]
+    return np.minimum(idx, n - 2), mask
 
-        # Get the range for this bucket
-        range_offs = int(i * bucket_size) + 1
-        range_to = int((i + 1) * bucket_size) + 1
 
-        point_a_x = a
-        point_a_y = data[a]
+def _downsample_series(data, max_points=200, mode="lttb"):
+    """Downsample data for plotting, keeping the first and last points.
 
-        max_area = -1
-        max_area_point = range_offs
+    data is a sequence of values, or an (n, k) array of k aligned series that
+    share the same x (the point index) and are sampled at the same indices.
+    mode "lttb" keeps the most visually significant point of each bucket
+    (Largest Triangle Three Buckets; with several series the triangle areas
+    of the series, scaled to a common range, are summed). mode "minmax" keeps the
+    minimum and maximum of every series in each bucket, preserving the
+    envelope of noisy series.
 
-        for j in range(range_offs, min(range_to, n)):
-            # Calculate triangle area
-            area = abs((point_a_x - avg_x) * (data[j] - point_a_y) -
-                      (point_a_x - j) * (avg_y - point_a_y))
-            if area > max_area:
-                max_area = area
-                max_area_point = j
+    Returns (sampled values, sorted list of the kept indices).
+    """
+    values = np.asarray(data, dtype=float)
+    n = len(values)
+    if n <= max_points:
+        return values, list(range(n))
+    y = values.reshape(n, -1)
+
+    if mode == "minmax":
+        n_buckets = max(1, (max_points - 2) // (2 * y.shape[1]))
+        idx, mask = _bucket_matrix(n, n_buckets)
+        bucket_y = y[idx]                                    # (buckets, width, series)
+        low = np.where(mask[:, :, None], bucket_y, np.inf).argmin(axis=1)
+        high = np.where(mask[:, :, None], bucket_y, -np.inf).argmax(axis=1)
+        rows = np.arange(n_buckets)[:, None]
+        kept = np.concatenate([[0, n - 1], idx[rows, low].ravel(), idx[rows, high].ravel()])
+        indices = np.unique(kept)
+        return values[indices], indices.tolist()
+    if mode != "lttb":
+        raise ValueError(f"Unknown downsampling mode: {mode}")
+
+    n_buckets = max_points - 2
+    edges = _bucket_edges(n, n_buckets)
+
+    # Centroid of every bucket; the last bucket looks ahead to the last point
+    mean_x = (edges[:-1] + edges[1:] - 1) / 2
+    mean_y = np.add.reduceat(y[:n - 1], edges[:-1], axis=0) / np.diff(edges)[:, None]
+    next_x = np.append(mean_x[1:], n - 1)
+    next_y = np.vstack([mean_y[1:], y[-1]])
+    # Series are weighted by the inverse range of their bucket centroids, so each counts alike
+    span = np.ptp(mean_y, axis=0)
+    weight = 1 / np.where(span > 0, span, 1)
+
+    # Only the choice of point a is sequential: each step is one vector operation on a bucket
+    x = np.arange(n, dtype=float)
+    selected = np.empty(n_buckets, dtype=np.int64)
+    a = 0
+    for i in range(n_buckets):
+        lo, hi = edges[i], edges[i + 1]
+        # Twice the triangle area (a, j, next centroid), summed over the series
+        a_y = y[a]
+        area = np.abs(
+            (a - next_x[i]) * (y[lo:hi] - a_y) - (a - x[lo:hi])[:, None] * (next_y[i] - a_y)
+        ) @ weight
+        a = lo + int(area.argmax())
+        selected[i] = a
+
+    indices = np.concatenate([[0], selected, [n - 1]])
+    return values[indices], indices.tolist()
+
+
+def _prepare_series(dates, values, max_points=150, mode="lttb", keep=()):
+    """Chart data preparation: sample aligned series column-wise, in one pass.
+
+    dates is a sequence of n dates; values an (n,) or (n, k) array of the
+    series plotted against them. The sample indices are computed once for
+    all series (see _downsample_series), plus any index in keep.
+
+    Returns (indices, date_strings, sampled): the kept indices as a list,
+    their dates as "%Y-%m-%d" strings and the (len(indices), k) sampled values.
+    """
+    values = np.asarray(values, dtype=float)
+    _, indices = _downsample_series(values, max_points=max_points, mode=mode)
+    if keep:
+        indices = sorted(set(indices) | set(keep))
+    date_strings = pd.to_datetime(pd.Index(dates)[indices]).strftime("%Y-%m-%d").tolist()
+    return indices, date_strings, values.reshape(len(values), -1)[indices]
 
-        sampled.append(data[max_area_point])
-        sampled_indices.append(max_area_point)
-        a = max_area_point
 
-    # Always add last point
-    sampled.append(data[-1])
-    sampled_indices.append(n - 1)
+def _cached_pyramid(source, build):
+    """LodPyramid of source, built once by build() and kept while source is alive.
 
-    return sampled, sampled_indices
+    Charts are redrawn from the same result objects when the visible range
+    changes, so the pyramid is keyed by the identity of the source series.
+    """
+    key = id(source)
+    with _pyramid_lock:
+        entry = _pyramids.get(key)
+        if entry is not None and entry[0]() is source:
+            return entry[1]
+    pyramid = build()
+    with _pyramid_lock:
+        _pyramids[key] = (weakref.ref(source, lambda _: _pyramids.pop(key, None)), pyramid)
+    return pyramid
+
+
+def _prepare_window(pyramid, visible_range=None, max_points=150, mode="lttb", keep=()):
+    """Chart data preparation for the dates of visible_range, read from a LodPyramid.
+
+    visible_range is a (start, end) pair of dates, or None for the whole
+    series. The rows come from the finest pyramid level that fits in
+    max_points; a range too long even for the coarsest level is sampled
+    further with _downsample_series. Indices in keep inside the range are
+    added, as in _prepare_series.
+
+    Returns (indices, date_strings, sampled, (lo, hi)), indices being row
+    positions in the whole series and [lo, hi) the rows of the range.
+    """
+    start, end = visible_range or (None, None)
+    rows, lo, hi = pyramid.rows(start, end, max_points=max_points)
+    if len(rows) > max_points:
+        _, picked = _downsample_series(pyramid.values[rows], max_points=max_points, mode=mode)
+        rows = rows[picked]
+    keep = [i for i in keep if lo <= i < hi]
+    if keep:
+        rows = np.union1d(rows, keep)
+    date_strings = pyramid.dates[rows].strftime("%Y-%m-%d").tolist()
+    return rows.tolist(), date_strings, pyramid.values[rows], (lo, hi)
+
+
+def _line_points(indices, ys, tooltips, markers=None):
+    """LineChartDataPoints of one sampled series; markers maps an index to its point marker."""
+    if markers is None:
+        return [
+            fch.LineChartDataPoint(
+                idx, y, tooltip=fch.LineChartDataPointTooltip(text=tip, text_style=ft.TextStyle(size=10)),
+            )
+            for idx, y, tip in zip(indices, ys, tooltips)
+        ]
+    return [
+        fch.LineChartDataPoint(
+            idx, y, point=markers.get(idx, False),
+            tooltip=fch.LineChartDataPointTooltip(text=tip, text_style=ft.TextStyle(size=10)),
+        )
+        for idx, y, tip in zip(indices, ys, tooltips)
+    ]
 
 
-def chart_summary(translator, pf_history, min_date_str, dt_str) -> ft.Control:
-    """NAV line chart with 4 series. Returns a native Flet control."""
-    pf_history = pf_history.dropna().reset_index(drop=True)
-    dates = pf_history["Date"].tolist()
-    n = len(dates)
-    if n == 0:
-        return ft.Text("No data")
+def chart_summary(translator, pf_history, min_date_str, dt_str, visible_range=None) -> ft.Control:
+    """NAV line chart with 4 series, restricted to the (start, end) dates of visible_range if given.
 
+    Returns a native Flet control.
+    """
     series_config = [
         ("nav", "NAV", ft.Colors.BLUE, 2.5, None),
         ("assets_value", "Securities", ft.Colors.RED, 1.5, [8, 4]),
@@ -122,49 +223,42 @@ def chart_summary(translator, pf_history, min_date_str, dt_str) -> ft.Control:
         ("committed_cash", "Committed Cash", ft.Colors.LIGHT_GREEN, 1.0, [4, 4]),
     ]
 
-    # Downsample the NAV series for performance
-    nav_values = [float(pf_history.iloc[i]["nav"]) for i in range(n)]
-    _, sample_indices = _downsample_series(nav_values, max_points=150)
+    # Downsample the four series together, so they share the same dates
+    columns = [col for col, _, _, _, _ in series_config]
+
+    def build():
+        history = pf_history.dropna()
+        return LodPyramid(history["Date"], history[columns].to_numpy(dtype=float))
+
+    pyramid = _cached_pyramid(pf_history, build)
+    sample_indices, date_strs, sampled, (lo, hi) = _prepare_window(pyramid, visible_range)
+    if hi <= lo:
+        return ft.Text("No data")
 
-    all_y = []
     data_series = []
-    first_series = True
-    for col, label, color, width, dash in series_config:
-        points = []
-        for idx in sample_indices:
-            y = float(pf_history.iloc[idx][col])
-            if first_series:
-                dt = dates[idx]
-                date_str = dt.strftime("%Y-%m-%d") if hasattr(dt, "strftime") else str(dt)[:10]
-                tip = fch.LineChartDataPointTooltip(
-                    text=f"{date_str}\n{label}: {y:,.0f}",
-                    text_style=ft.TextStyle(size=10),
-                )
-            else:
-                tip = fch.LineChartDataPointTooltip(
-                    text=f"{label}: {y:,.0f}",
-                    text_style=ft.TextStyle(size=10),
-                )
-            points.append(fch.LineChartDataPoint(idx, y, tooltip=tip))
-            all_y.append(y)
+    for k, (col, label, color, width, dash) in enumerate(series_config):
+        ys = sampled[:, k].tolist()
+        if k == 0:
+            tooltips = [f"{d}\n{label}: {y:,.0f}" for d, y in zip(date_strs, ys)]
+        else:
+            tooltips = [f"{label}: {y:,.0f}" for y in ys]
         data_series.append(fch.LineChartData(
-            points=points,
+            points=_line_points(sample_indices, ys, tooltips),
             color=color,
             stroke_width=width,
             dash_pattern=dash,
             curved=False,
             point=False,
         ))
-        first_series = False
 
-    y_min = min(all_y)
-    y_max = max(all_y)
+    y_min = float(sampled.min())
+    y_max = float(sampled.max())
     y_pad = (y_max - y_min) * 0.05 if y_max != y_min else 1
 
     chart = fch.LineChart(
         data_series=data_series,
-        min_x=0,
-        max_x=n - 1,
+        min_x=lo,
+        max_x=hi - 1,
         min_y=y_min - y_pad,
         max_y=y_max + y_pad,
         expand=True,
@@ -175,7 +269,7 @@ def chart_summary(translator, pf_history, min_date_str, dt_str) -> ft.Control:
         ),
         bottom_axis=fch.ChartAxis(
             label_size=0,
-            labels=_date_axis_labels(dates),
+            labels=_date_axis_labels(pyramid.dates[lo:hi], offset=lo),
             show_min=False,
             show_max=False,
         ),
@@ -215,6 +309,102 @@ def chart_summary(translator, pf_history, min_date_str, dt_str) -> ft.Control:
     )
 
 
+_ROLLING_METRIC_COLORS = [ft.Colors.BLUE, ft.Colors.ORANGE, ft.Colors.GREEN_700, ft.Colors.PURPLE]
+
+
+def chart_rolling_metrics(translator, dates, rolling_metrics, metric) -> ft.Control:
+    """Rolling risk metric line chart, one line per window length.
+
+    rolling_metrics is the { window: DataFrame } dict of analysis_service.rolling_risk_metrics;
+    metric is one of its columns. Returns a native Flet control.
+    """
+    dates = pd.DatetimeIndex(dates)
+    n = len(dates)
+    is_pct = metric in ("volatility", "downside_deviation", "alpha", "tracking_error",
+                        "up_capture", "down_capture")
+    scale = 100 if is_pct else 1
+    suffix = "%" if is_pct else ""
+
+    data_series = []
+    spans = []
+    all_y = []
+    for (window, df), color in zip(sorted(rolling_metrics.items()), _ROLLING_METRIC_COLORS):
+        values = df[metric].to_numpy() * scale
+        valid_idx = np.flatnonzero(np.isfinite(values))
+        if len(valid_idx) == 0:
+            continue
+        sample_pos, date_strs, sampled = _prepare_series(dates[valid_idx], values[valid_idx])
+        label = translator.get("analysis.summary.rolling.window", window=window)
+        ys = sampled[:, 0].tolist()
+        tooltips = [f"{d}\n{label}: {y:.2f}{suffix}" for d, y in zip(date_strs, ys)]
+        data_series.append(fch.LineChartData(
+            points=_line_points(valid_idx[sample_pos].tolist(), ys, tooltips),
+            color=color, stroke_width=1.5, curved=False, point=False,
+        ))
+        all_y.extend(ys)
+        spans.append(ft.TextSpan("■ ", style=ft.TextStyle(color=color, size=10)))
+        spans.append(ft.TextSpan(label + "   ", style=ft.TextStyle(color=ft.Colors.BLACK, size=10)))
+
+    if not data_series:
+        return ft.Text(translator.get("analysis.summary.rolling.nodata"), size=14)
+
+    y_min = min(all_y + [0])
+    y_max = max(all_y + [0])
+    y_pad = (y_max - y_min) * 0.05 if y_max != y_min else 1
+
+    chart = fch.LineChart(
+        data_series=data_series,
+        min_x=0,
+        max_x=n - 1,
+        min_y=y_min - y_pad,
+        max_y=y_max + y_pad,
+        expand=True,
+        border=ft.Border.all(1, ft.Colors.with_opacity(0.3, ft.Colors.ON_SURFACE)),
+        horizontal_grid_lines=fch.ChartGridLines(
+            color=ft.Colors.with_opacity(0.15, ft.Colors.ON_SURFACE),
+            width=1,
+        ),
+        bottom_axis=fch.ChartAxis(
+            label_size=0,
+            labels=_date_axis_labels(dates),
+            show_min=False,
+            show_max=False,
+        ),
+        left_axis=fch.ChartAxis(
+            label_size=0,
+            labels=_y_axis_labels(y_min, y_max, suffix=suffix),
+            show_min=False,
+            show_max=False,
+        ),
+        interactive=True,
+        tooltip=fch.LineChartTooltip(
+            bgcolor="#E0E0E0",
+            border_radius=8,
+            padding=ft.Padding.all(8),
+            max_width=160,
+            fit_inside_horizontally=True,
+            fit_inside_vertically=True,
+        ),
+    )
+
+    title = translator.get(f"analysis.summary.rolling.{metric}")
+    return ft.Container(
+        content=ft.Column([
+            ft.Text(title, size=12, weight=ft.FontWeight.BOLD, color=ft.Colors.BLACK),
+            ft.Text(spans=spans),
+            chart,
+        ], spacing=6, expand=True),
+        bgcolor=ft.Colors.WHITE,
+        border_radius=12,
+        padding=8,
+        height=320,
+        shadow=ft.BoxShadow(
+            spread_radius=1, blur_radius=3,
+            color=ft.Colors.with_opacity(0.1, ft.Colors.BLACK),
+        ),
+    )
+
+
 def _corr_color(value: float) -> str:
     """Map a correlation value (-1 to 1) to a coolwarm-like color."""
     # Clamp
@@ -232,21 +422,70 @@ def _corr_color(value: float) -> str:
     return f"#{r:02x}{g:02x}{b:02x}"
 
 
-def chart_correlation_heatmap(translator, correlation_matrix, start_dt, end_dt) -> ft.Control:
-    """Correlation heatmap as a native Flet grid. Returns a Flet control."""
+# Matrices up to this size are drawn cell by cell; larger ones as cluster tiles
+_HEATMAP_MAX_ASSETS = 20
+_HEATMAP_CLUSTERS = 10
+
+
+def _cluster_tiles(values, labels, clusters):
+    """Mean correlation between and within clusters, with the tile labels and tooltips."""
+    n, k = len(labels), len(clusters)
+    member = np.zeros((n, k))
+    for c, idx in enumerate(clusters):
+        member[idx, c] = 1.0
+    sizes = member.sum(axis=0)
+    # Block sums of the matrix; the unit diagonal is left out of the within-cluster means
+    sums = member.T @ np.nan_to_num(values) @ member - np.diag(sizes)
+    counts = np.outer(sizes, sizes) - np.diag(sizes)
+    means = np.divide(sums, counts, out=np.ones_like(sums), where=counts > 0)
+
+    tickers = [[labels[i] for i in idx] for idx in clusters]
+    names = [ts[0] if len(ts) == 1 else f"{ts[0]} +{len(ts) - 1}" for ts in tickers]
+    members_text = [", ".join(ts[:12]) + (", …" if len(ts) > 12 else "") for ts in tickers]
+    return means, names, tickers, members_text
+
+
+def chart_correlation_heatmap(translator, correlation_matrix, start_dt, end_dt,
+                              on_drill_down=None, on_back=None) -> ft.Control:
+    """Correlation heatmap as a native Flet grid, assets ordered by hierarchical clustering.
+
+    Up to _HEATMAP_MAX_ASSETS assets are drawn cell by cell. Larger matrices
+    are collapsed into tiles of _HEATMAP_CLUSTERS clusters showing the mean
+    correlation between (and, on the diagonal, within) clusters, so the grid
+    stays small whatever the number of assets. Clicking a tile calls
+    on_drill_down(tickers) with the assets of its clusters; on_back, when
+    given, adds a button to return to the enclosing view. Returns a Flet control.
+    """
     labels = list(correlation_matrix.columns)
+    values = correlation_matrix.to_numpy(dtype=float)
+    tiled = len(labels) > _HEATMAP_MAX_ASSETS
+    order, clusters = correlation_clusters(values, _HEATMAP_CLUSTERS if tiled else 1)
+
+    if tiled:
+        values, labels, cluster_tickers, tooltips = _cluster_tiles(values, labels, clusters)
+    else:
+        values = values[np.ix_(order, order)]
+        labels = [labels[i] for i in order]
+        tooltips = labels
     n = len(labels)
 
     cell_size = 64
     label_size = 70
 
+    def tile_click(i, j):
+        if not tiled or on_drill_down is None:
+            return None
+        tickers = cluster_tickers[i] if i == j else cluster_tickers[min(i, j)] + cluster_tickers[max(i, j)]
+        return lambda _: on_drill_down(tickers)
+
     # Build header row: empty corner + column labels
     header_cells = [ft.Container(width=label_size, height=30)]
-    for lbl in labels:
+    for lbl, tip in zip(labels, tooltips):
         header_cells.append(ft.Container(
             content=ft.Text(lbl, size=9, weight=ft.FontWeight.BOLD, text_align=ft.TextAlign.CENTER, color=ft.Colors.BLACK),
             width=cell_size, height=30,
             alignment=ft.alignment.Alignment.CENTER,
+            tooltip=tip if tiled else None,
         ))
     header_row = ft.Row(header_cells, spacing=0)
 
@@ -258,17 +497,19 @@ def chart_correlation_heatmap(translator, correlation_matrix, start_dt, end_dt)
             width=label_size, height=cell_size,
             alignment=ft.alignment.Alignment.CENTER_RIGHT,
             padding=ft.padding.only(right=6),
+            tooltip=tooltips[i] if tiled else None,
         )]
         for j in range(n):
-            val = float(correlation_matrix.iloc[i, j])
+            val = float(values[i, j])
             bg = _corr_color(val)
             row_cells.append(ft.Container(
-                content=ft.Text(f"{val:.3f}", size=11, color=ft.Colors.BLACK,
+                content=ft.Text(f"{val:.2f}" if tiled else f"{val:.3f}", size=11, color=ft.Colors.BLACK,
                                 text_align=ft.TextAlign.CENTER),
                 width=cell_size, height=cell_size,
                 bgcolor=bg,
                 alignment=ft.alignment.Alignment.CENTER,
                 border=ft.border.all(0.5, ft.Colors.with_opacity(0.2, ft.Colors.BLACK)),
+                on_click=tile_click(i, j),
             ))
         data_rows.append(ft.Row(row_cells, spacing=0))
 
@@ -284,6 +525,11 @@ def chart_correlation_heatmap(translator, correlation_matrix, start_dt, end_dt)
         ft.Text(translator.get("analysis.corr.plot_title_simple"), size=10, color=ft.Colors.BLACK),
         *scale_containers,
     ], spacing=4)
+    if tiled:
+        scale.controls.append(ft.Text(translator.get("analysis.corr.cluster_hint"), size=10, color=ft.Colors.BLACK))
+    if on_back is not None:
+        scale.controls.insert(0, ft.TextButton(translator.get("analysis.corr.back"), icon=ft.Icons.ARROW_BACK,
+                                               on_click=on_back))
 
     return ft.Container(
         content=ft.Column([
@@ -301,34 +547,23 @@ def chart_correlation_heatmap(translator, correlation_matrix, start_dt, end_dt)
     )
 
 
-def chart_rolling_correlation(translator, rolling_corr, window, asset1, asset2, start_dt, end_dt) -> ft.Control:
-    """Rolling correlation line chart. Returns a native Flet control."""
-    rolling_corr = rolling_corr.dropna()
-    if rolling_corr.empty:
-        return ft.Text(translator.get("analysis.corr.rolling_nodata"), size=14)
+def chart_rolling_correlation(translator, rolling_corr, window, asset1, asset2, start_dt, end_dt,
+                              visible_range=None) -> ft.Control:
+    """Rolling correlation line chart, restricted to the (start, end) dates of visible_range if given.
 
-    # Capture dates before resetting index
-    orig_dates = rolling_corr.index.tolist()
-    values = rolling_corr.values.tolist()
-    n = len(values)
+    Returns a native Flet control.
+    """
+    def build():
+        corr = rolling_corr.dropna()
+        return LodPyramid(corr.index, corr.to_numpy(dtype=float))
 
     # Downsample for performance
-    sampled_values, sample_indices = _downsample_series(values, max_points=150)
-
-    points = []
-    y_vals = []
-    for idx in sample_indices:
-        y = float(values[idx])
-        dt = orig_dates[idx]
-        date_str = dt.strftime("%Y-%m-%d") if hasattr(dt, "strftime") else str(dt)[:10]
-        points.append(fch.LineChartDataPoint(
-            idx, y,
-            tooltip=fch.LineChartDataPointTooltip(
-                text=f"{date_str}\nCorr: {y:.3f}",
-                text_style=ft.TextStyle(size=10),
-            ),
-        ))
-        y_vals.append(y)
+    pyramid = _cached_pyramid(rolling_corr, build)
+    sample_indices, date_strs, sampled, (lo, hi) = _prepare_window(pyramid, visible_range)
+    if hi <= lo:
+        return ft.Text(translator.get("analysis.corr.rolling_nodata"), size=14)
+    y_vals = sampled[:, 0].tolist()
+    points = _line_points(sample_indices, y_vals, [f"{d}\nCorr: {y:.3f}" for d, y in zip(date_strs, y_vals)])
 
     # Main correlation line
     corr_line = fch.LineChartData(
@@ -342,8 +577,8 @@ def chart_rolling_correlation(translator, rolling_corr, window, asset1, asset2,
     # Zero reference line
     zero_line = fch.LineChartData(
         points=[
-            fch.LineChartDataPoint(0, 0, show_tooltip=False),
-            fch.LineChartDataPoint(n - 1, 0, show_tooltip=False),
+            fch.LineChartDataPoint(lo, 0, show_tooltip=False),
+            fch.LineChartDataPoint(hi - 1, 0, show_tooltip=False),
         ],
         color=ft.Colors.RED,
         stroke_width=1,
@@ -359,8 +594,8 @@ def chart_rolling_correlation(translator, rolling_corr, window, asset1, asset2,
 
     chart = fch.LineChart(
         data_series=[corr_line, zero_line],
-        min_x=0,
-        max_x=n - 1,
+        min_x=lo,
+        max_x=hi - 1,
         min_y=max(y_min - y_pad, -1.0),
         max_y=min(y_max + y_pad, 1.0),
         expand=True,
@@ -371,7 +606,7 @@ def chart_rolling_correlation(translator, rolling_corr, window, asset1, asset2,
         ),
         bottom_axis=fch.ChartAxis(
             label_size=0,
-            labels=_date_axis_labels(orig_dates),
+            labels=_date_axis_labels(pyramid.dates[lo:hi], offset=lo),
             show_min=False,
             show_max=False,
         ),
@@ -420,45 +655,42 @@ def chart_rolling_correlation(translator, rolling_corr, window, asset1, asset2,
     )
 
 
-def chart_drawdown(translator, pf_history, drawdown_series, mdd, start_dt, end_dt) -> ft.Control:
-    """Drawdown line chart. Returns a native Flet control."""
-    pf_history = pf_history.dropna().reset_index(drop=True)
-    drawdown_pct = drawdown_series.reset_index(drop=True) * 100
-    dates = pf_history["Date"].tolist()
-    n = len(dates)
-    if n == 0:
+def chart_drawdown(translator, pf_history, drawdown_series, mdd, start_dt, end_dt, episodes=None,
+                   visible_range=None) -> ft.Control:
+    """Drawdown line chart, optionally marking the troughs and recoveries of episodes.
+
+    visible_range restricts the chart to its (start, end) dates; the markers
+    outside it are not drawn. Returns a native Flet control.
+    """
+    def build():
+        return LodPyramid(pf_history.dropna()["Date"], drawdown_series.to_numpy(dtype=float) * 100)
+
+    pyramid = _cached_pyramid(drawdown_series, build)
+    if len(pyramid.dates) == 0:
         return ft.Text("No data")
 
     mdd_pct = mdd * 100
 
-    # Downsample for performance
-    dd_values = [float(drawdown_pct.iloc[i]) for i in range(n)]
-    mdd_idx = int(drawdown_pct.idxmin())
-    _, sample_indices = _downsample_series(dd_values, max_points=150)
-    if mdd_idx not in sample_indices:
-        sample_indices.append(mdd_idx)
-        sample_indices.sort()
+    mdd_idx = int(np.nanargmin(pyramid.values[:, 0]))
+    episode_markers = {}
+    for episode in episodes or []:
+        episode_markers.setdefault(episode["trough_idx"], fch.ChartCirclePoint(color=ft.Colors.ORANGE, radius=4))
+        if episode["recovery_idx"] is not None:
+            episode_markers.setdefault(episode["recovery_idx"], fch.ChartCirclePoint(color=ft.Colors.GREEN, radius=4))
+    markers = {**episode_markers, mdd_idx: fch.ChartCirclePoint(color=ft.Colors.RED, radius=5)}
+
+    # Downsample for performance, keeping the deepest and shallowest point of every bucket
+    sample_indices, date_strs, sampled, (lo, hi) = _prepare_window(
+        pyramid, visible_range, mode="minmax", keep=markers.keys(),
+    )
+    if hi <= lo:
+        return ft.Text("No data")
+    y_vals = sampled[:, 0].tolist()
 
     # Drawdown line
-    points = []
-    y_vals = []
-    for idx in sample_indices:
-        y = float(drawdown_pct.iloc[idx])
-        dt = dates[idx]
-        date_str = dt.strftime("%Y-%m-%d") if hasattr(dt, "strftime") else str(dt)[:10]
-        pt_marker = (
-            fch.ChartCirclePoint(color=ft.Colors.RED, radius=5)
-            if idx == mdd_idx else False
-        )
-        points.append(fch.LineChartDataPoint(
-            idx, y,
-            point=pt_marker,
-            tooltip=fch.LineChartDataPointTooltip(
-                text=f"{date_str}\nDD: {y:.1f}%",
-                text_style=ft.TextStyle(size=10),
-            ),
-        ))
-        y_vals.append(y)
+    points = _line_points(
+        sample_indices, y_vals, [f"{d}\nDD: {y:.1f}%" for d, y in zip(date_strs, y_vals)], markers=markers,
+    )
 
     dd_line = fch.LineChartData(
         points=points,
@@ -471,8 +703,8 @@ def chart_drawdown(translator, pf_history, drawdown_series, mdd, start_dt, end_d
     # Zero reference line
     zero_line = fch.LineChartData(
         points=[
-            fch.LineChartDataPoint(0, 0, show_tooltip=False),
-            fch.LineChartDataPoint(n - 1, 0, show_tooltip=False),
+            fch.LineChartDataPoint(lo, 0, show_tooltip=False),
+            fch.LineChartDataPoint(hi - 1, 0, show_tooltip=False),
         ],
         color=ft.Colors.with_opacity(0.5, ft.Colors.GREY),
         stroke_width=1,
@@ -480,15 +712,15 @@ def chart_drawdown(translator, pf_history, drawdown_series, mdd, start_dt, end_d
         point=False,
     )
 
-    y_min = mdd_pct - 2.5
+    y_min = min(float(np.nanmin(sampled)), 0.0) - 2.5
     y_max = 2.5
 
     mdd_label = translator.get("analysis.drawdown.legend", mdd=mdd_pct)
 
     chart = fch.LineChart(
         data_series=[dd_line, zero_line],
-        min_x=0,
-        max_x=n - 1,
+        min_x=lo,
+        max_x=hi - 1,
         min_y=y_min,
         max_y=y_max,
         expand=True,
@@ -499,7 +731,7 @@ def chart_drawdown(translator, pf_history, drawdown_series, mdd, start_dt, end_d
         ),
         bottom_axis=fch.ChartAxis(
             label_size=0,
-            labels=_date_axis_labels(dates),
+            labels=_date_axis_labels(pyramid.dates[lo:hi], offset=lo),
             show_min=False,
             show_max=False,
         ),
@@ -527,7 +759,14 @@ def chart_drawdown(translator, pf_history, drawdown_series, mdd, start_dt, end_d
         ft.TextSpan("Zero   ", style=ft.TextStyle(color=ft.Colors.BLACK, size=10)),
         ft.TextSpan("● ", style=ft.TextStyle(color=ft.Colors.RED, size=14)),
         ft.TextSpan(mdd_label, style=ft.TextStyle(color=ft.Colors.BLACK, size=10)),
-    ])
+    ] + ([
+        ft.TextSpan("   ● ", style=ft.TextStyle(color=ft.Colors.ORANGE, size=14)),
+        ft.TextSpan(translator.get("analysis.drawdown.legend_trough") + "   ",
+                    style=ft.TextStyle(color=ft.Colors.BLACK, size=10)),
+        ft.TextSpan("● ", style=ft.TextStyle(color=ft.Colors.GREEN, size=14)),
+        ft.TextSpan(translator.get("analysis.drawdown.legend_recovery"),
+                    style=ft.TextStyle(color=ft.Colors.BLACK, size=10)),
+    ] if episode_markers else []))
 
     return ft.Container(
         content=ft.Column([legend, chart], spacing=6, expand=True),
@@ -542,33 +781,63 @@ def chart_drawdown(translator, pf_history, drawdown_series, mdd, start_dt, end_d
     )
 
 
-def chart_var_mc(translator, scenario_return, var_value, ci, days) -> ft.Control:
-    """VaR Monte Carlo histogram. Returns a native Flet BarChart control."""
-    scenario_return = np.array(scenario_return)
-    if len(scenario_return) == 0:
-        return ft.Text("No data")
+def _var_bar_color(bin_center, var_value):
+    # Bars at or below -VaR red, rest gray
+    return ft.Colors.RED_300 if bin_center <= -var_value else "#BDBDBD"
 
-    # Compute histogram bins (reduced for performance)
-    num_bins = 40
-    counts, bin_edges = np.histogram(scenario_return, bins=num_bins, density=True)
+
+def _var_density(histogram):
+    counts, bin_edges = histogram
+    total = counts.sum()
     bin_width = bin_edges[1] - bin_edges[0]
+    density = counts / (total * bin_width) if total else np.zeros(len(counts))
+    return density, (bin_edges[:-1] + bin_edges[1:]) / 2
+
+
+def _var_legend_spans(translator, var_value, ci, es_value):
+    var_legend = translator.get("analysis.var.legend", ci=ci, var=var_value)
+    legend_spans = [
+        ft.TextSpan(translator.get("analysis.var.axes") + "       ", style=ft.TextStyle(color=ft.Colors.BLACK, size=10)),
+        ft.TextSpan("■ ", style=ft.TextStyle(color=ft.Colors.RED_300, size=10)),
+        ft.TextSpan(var_legend, style=ft.TextStyle(color=ft.Colors.BLACK, size=10)),
+    ]
+    if es_value is not None:
+        legend_spans.append(ft.TextSpan(
+            "\n" + translator.get("analysis.var.legend_es", es=es_value),
+            style=ft.TextStyle(color=ft.Colors.BLACK, size=10),
+        ))
+    return legend_spans
+
+
+def chart_var_mc(translator, scenario_return, var_value, ci, days, es_value=None, histogram=None) -> ft.Control:
+    """VaR scenario histogram (Monte Carlo or historical). Returns a native Flet BarChart control.
+
+    histogram: optional precomputed (counts, bin_edges) of scenario_return, e.g. the
+    running histogram of a progressive Monte Carlo; see update_chart_var_mc.
+    """
+    if histogram is None:
+        scenario_return = np.array(scenario_return)
+        if len(scenario_return) == 0:
+            return ft.Text("No data")
+        # Compute histogram bins (reduced for performance)
+        histogram = np.histogram(scenario_return, bins=40)
+
+    density, bin_centers = _var_density(histogram)
+    num_bins = len(density)
 
     # Create bar groups
     groups = []
-    max_count = float(counts.max()) if len(counts) > 0 else 1
-    var_threshold = -var_value
+    max_count = float(density.max()) if num_bins > 0 else 1
 
-    for i, count in enumerate(counts):
-        bin_center = (bin_edges[i] + bin_edges[i + 1]) / 2
-        # Color bars at or below -VaR red, rest gray
-        color = ft.Colors.RED_300 if bin_center <= var_threshold else "#BDBDBD"
+    for i, count in enumerate(density):
+        bin_center = bin_centers[i]
         groups.append(fch.BarChartGroup(
             x=i,
             rods=[fch.BarChartRod(
                 from_y=0,
                 to_y=float(count),
                 width=max(2, 400 / num_bins),
-                color=color,
+                color=_var_bar_color(bin_center, var_value),
                 border_radius=0,
                 tooltip=fch.BarChartRodTooltip(
                     text=f"{bin_center:,.2f}€",
@@ -582,17 +851,14 @@ def chart_var_mc(translator, scenario_return, var_value, ci, days) -> ft.Control
     x_step = max(1, num_bins // (num_x_labels - 1))
     x_labels = []
     for i in range(0, num_bins, x_step):
-        val = (bin_edges[i] + bin_edges[i + 1]) / 2
         x_labels.append(fch.ChartAxisLabel(
             value=i,
             label=ft.Container(
-                ft.Text(f"{val:,.0f}", size=9),
+                ft.Text(f"{bin_centers[i]:,.0f}", size=9),
                 padding=ft.padding.only(top=4),
             ),
         ))
 
-    var_legend = translator.get("analysis.var.legend", ci=ci, var=var_value)
-
     chart = fch.BarChart(
         groups=groups,
         group_spacing=0,
@@ -627,11 +893,7 @@ def chart_var_mc(translator, scenario_return, var_value, ci, days) -> ft.Control
         ),
     )
 
-    legend = ft.Text(spans=[
-        ft.TextSpan(translator.get("analysis.var.axes") + "       ", style=ft.TextStyle(color=ft.Colors.BLACK, size=10)),
-        ft.TextSpan("■ ", style=ft.TextStyle(color=ft.Colors.RED_300, size=10)),
-        ft.TextSpan(var_legend, style=ft.TextStyle(color=ft.Colors.BLACK, size=10)),
-    ])
+    legend = ft.Text(spans=_var_legend_spans(translator, var_value, ci, es_value))
 
     return ft.Container(
         content=ft.Column([legend, chart], spacing=6, expand=True),
@@ -646,6 +908,24 @@ def chart_var_mc(translator, scenario_return, var_value, ci, days) -> ft.Control
     )
 
 
+def update_chart_var_mc(control, translator, histogram, var_value, ci, es_value=None):
+    """Refresh a chart_var_mc control in place with a newer histogram on the same bins.
+
+    Only bar heights, colors, the y-range and the legend change, so the next
+    page update sends a small diff instead of a new chart.
+    """
+    legend, chart = control.content.controls
+    density, bin_centers = _var_density(histogram)
+    for group, count, bin_center in zip(chart.groups, density, bin_centers):
+        rod = group.rods[0]
+        rod.to_y = float(count)
+        rod.color = _var_bar_color(bin_center, var_value)
+    max_count = float(density.max()) if len(density) > 0 else 1
+    chart.max_y = max_count * 1.1
+    chart.left_axis.labels = _y_axis_labels(0, max_count * 1.1, num_labels=3)
+    legend.spans = _var_legend_spans(translator, var_value, ci, es_value)
+
+
 _ALLOC_COLORS = {
     "Stock": ft.Colors.BLUE,
     "ETF-S": ft.Colors.LIGHT_BLUE_200,
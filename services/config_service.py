@@ -1,115 +1,190 @@
+import atexit
 import configparser
 import io
+import json
 import os
 import shutil
+import threading
+import uuid
 import zipfile
-
-
-def _load_config(config_folder: str):
-    """Read config.ini and return (path, ConfigParser)."""
-    path = os.path.join(config_folder, "config.ini")
-    config = configparser.ConfigParser()
-    if os.path.exists(path):
-        config.read(path)
-    return path, config
-
-
-def _save_config(path: str, config: configparser.ConfigParser):
-    """Write config back to disk."""
-    with open(path, "w", encoding="utf-8") as f:
-        config.write(f)
-
-
-def _ensure_section(config: configparser.ConfigParser, section: str):
-    if not config.has_section(section):
-        config.add_section(section)
+import zlib
+from datetime import datetime
+
+# Seconds of quiet after a change before a config file is written
+_FLUSH_DELAY = 0.5
+
+
+class ConfigStore:
+    """In-memory copy of one config.ini, written back behind the callers.
+
+    The file is parsed once; reads are answered from memory, and changes
+    mark the store dirty and restart a short timer, so a burst of changes
+    costs a single write, off the UI thread. The file is replaced
+    atomically (temporary file + os.replace), so an interrupted write
+    leaves the previous version.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._config = configparser.ConfigParser()
+        if os.path.exists(path):
+            self._config.read(path)
+        self._lock = threading.RLock()
+        # Held across serialize + write so that flushes reach the disk in order
+        self._write_lock = threading.Lock()
+        self._timer = None
+        self._dirty = False
+        self._closed = False
+
+    def get(self, section: str, option: str, fallback=None):
+        with self._lock:
+            return self._config.get(section, option, fallback=fallback)
+
+    def has_section(self, section: str) -> bool:
+        with self._lock:
+            return self._config.has_section(section)
+
+    def items(self, section: str) -> list[tuple[str, str]]:
+        with self._lock:
+            return self._config.items(section) if self._config.has_section(section) else []
+
+    def update(self, section: str, values: dict, replace: bool = False):
+        """Set options of section (created if missing); replace drops its other options."""
+        with self._lock:
+            if replace and self._config.has_section(section):
+                self._config.remove_section(section)
+            if not self._config.has_section(section):
+                self._config.add_section(section)
+            for option, value in values.items():
+                self._config.set(section, str(option), value)
+            self._changed()
+
+    def remove_section(self, section: str):
+        with self._lock:
+            if self._config.remove_section(section):
+                self._changed()
+
+    def _changed(self):
+        self._dirty = True
+        if self._timer is not None:
+            self._timer.cancel()
+        self._timer = threading.Timer(_FLUSH_DELAY, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def flush(self):
+        """Write pending changes now, if any."""
+        with self._write_lock:
+            with self._lock:
+                if not self._dirty or self._closed:
+                    return
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                buf = io.StringIO()
+                self._config.write(buf)
+                self._dirty = False
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(buf.getvalue())
+            os.replace(tmp, self.path)
+
+    def discard(self):
+        """Drop pending changes and stop writing, e.g. before the folder is deleted."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._dirty = False
+            self._closed = True
+
+
+_stores_lock = threading.Lock()
+# normalized config folder -> ConfigStore of its config.ini
+_stores = {}
+
+
+def get_store(config_folder: str) -> ConfigStore:
+    """The shared ConfigStore of config_folder/config.ini, loaded on first use."""
+    key = os.path.normcase(os.path.abspath(config_folder))
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = ConfigStore(os.path.join(config_folder, "config.ini"))
+        return store
+
+
+def flush_all():
+    """Write the pending changes of every config store."""
+    with _stores_lock:
+        stores = list(_stores.values())
+    for store in stores:
+        store.flush()
+
+
+def _discard_stores(folder: str):
+    """Forget the stores of folder and its subfolders, dropping their pending changes."""
+    root = os.path.normcase(os.path.abspath(folder))
+    with _stores_lock:
+        for key in list(_stores):
+            if key == root or key.startswith(root + os.sep):
+                _stores.pop(key).discard()
+
+
+atexit.register(flush_all)
 
 
 def save_language(config_folder: str, lang_code: str):
-    path, config = _load_config(config_folder)
-    _ensure_section(config, "Language")
-    config.set("Language", "code", lang_code)
-    _save_config(path, config)
+    get_store(config_folder).update("Language", {"code": lang_code})
 
 
 def save_theme(config_folder: str, mode: str, color: str):
-    path, config = _load_config(config_folder)
-    _ensure_section(config, "Theme")
-    config.set("Theme", "mode", mode)
-    config.set("Theme", "color", color)
-    _save_config(path, config)
+    get_store(config_folder).update("Theme", {"mode": mode, "color": color})
 
 
 def save_watchlist(config_folder: str, tickers: list[str]):
-    path, config = _load_config(config_folder)
-    _ensure_section(config, "Watchlist")
-    config.set("Watchlist", "tickers", ",".join(tickers))
-    _save_config(path, config)
+    get_store(config_folder).update("Watchlist", {"tickers": ",".join(tickers)})
 
 
 def save_brokers(config_folder: str, brokers: dict[int, str], reset: bool = False):
-    path, config = _load_config(config_folder)
-    if reset and config.has_section("Brokers"):
-        config.remove_section("Brokers")
-    _ensure_section(config, "Brokers")
-    if reset:
-        for key in list(config["Brokers"].keys()):
-            config.remove_option("Brokers", key)
-    for idx, name in brokers.items():
-        config.set("Brokers", str(idx), name)
-    _save_config(path, config)
+    get_store(config_folder).update("Brokers", brokers, replace=reset)
 
 
 def save_home_hidden(config_folder: str, hidden: bool):
-    path, config = _load_config(config_folder)
-    _ensure_section(config, "Home")
-    config.set("Home", "hidden", str(hidden).lower())
-    _save_config(path, config)
+    get_store(config_folder).update("Home", {"hidden": str(hidden).lower()})
 
 
 def save_home_pnl_mode(config_folder: str, mode: int):
-    path, config = _load_config(config_folder)
-    _ensure_section(config, "Home")
-    config.set("Home", "pnl_mode", str(mode))
-    _save_config(path, config)
+    get_store(config_folder).update("Home", {"pnl_mode": str(mode)})
 
 
 def save_split_ignores(config_folder: str, ignores: set[str]):
     """Persist a set of ignored split identifiers (strings like 'TICKER|YYYY-MM-DD' or 'TICKER|*')."""
-    path, config = _load_config(config_folder)
-    _ensure_section(config, "SplitIgnores")
-    for key in list(config["SplitIgnores"].keys()):
-        config.remove_option("SplitIgnores", key)
-    if ignores:
-        config.set("SplitIgnores", "entries", ",".join(sorted(ignores)))
-    _save_config(path, config)
+    values = {"entries": ",".join(sorted(ignores))} if ignores else {}
+    get_store(config_folder).update("SplitIgnores", values, replace=True)
 
 
 def load_split_ignores(config_folder: str) -> set[str]:
-    _, config = _load_config(config_folder)
-    raw = config.get("SplitIgnores", "entries", fallback="")
+    raw = get_store(config_folder).get("SplitIgnores", "entries", fallback="")
     if not raw:
         return set()
     return {s.strip() for s in raw.split(",") if s.strip()}
 
 
 def save_tx_filter(config_folder: str, mode: str, value: int):
-    path, config = _load_config(config_folder)
-    _ensure_section(config, "Transactions")
-    config.set("Transactions", "filter_mode", mode)
-    config.set("Transactions", "filter_value", str(value))
-    _save_config(path, config)
+    get_store(config_folder).update("Transactions", {"filter_mode": mode, "filter_value": str(value)})
 
 
 def load_tx_filter(config_folder: str) -> tuple[str, int]:
-    _, config = _load_config(config_folder)
-    if not config.has_section("Transactions"):
+    store = get_store(config_folder)
+    if not store.has_section("Transactions"):
         return "count", 5
-    mode = config.get("Transactions", "filter_mode", fallback="count")
+    mode = store.get("Transactions", "filter_mode", fallback="count")
     if mode not in ("count", "days"):
         mode = "count"
     try:
-        value = int(config.get("Transactions", "filter_value", fallback="5"))
+        value = int(store.get("Transactions", "filter_value", fallback="5"))
         if value <= 0:
             raise ValueError
     except (ValueError, TypeError):
@@ -118,21 +193,18 @@ def load_tx_filter(config_folder: str) -> tuple[str, int]:
 
 
 def save_tx_columns(config_folder: str, visible_cols: list[str]):
-    path, config = _load_config(config_folder)
-    _ensure_section(config, "Transactions")
-    config.set("Transactions", "visible_columns", ",".join(visible_cols))
-    _save_config(path, config)
+    get_store(config_folder).update("Transactions", {"visible_columns": ",".join(visible_cols)})
 
 
 def load_tx_columns(config_folder: str) -> list[str] | None:
-    _, config = _load_config(config_folder)
-    raw = config.get("Transactions", "visible_columns", fallback=None)
+    raw = get_store(config_folder).get("Transactions", "visible_columns", fallback=None)
     if raw is None:
         return None
     return [c.strip() for c in raw.split(",") if c.strip()]
 
 
 def reset_application(config_folder: str):
+    _discard_stores(config_folder)
     if os.path.exists(config_folder):
         shutil.rmtree(config_folder)
 
@@ -140,32 +212,19 @@ def reset_application(config_folder: str):
 # ── Multi-user management ────────────────────────────────────
 
 def save_users(config_folder: str, users: dict[int, str]):
-    path, config = _load_config(config_folder)
-    _ensure_section(config, "Users")
-    for key in list(config["Users"].keys()):
-        config.remove_option("Users", key)
-    for idx, name in users.items():
-        config.set("Users", str(idx), name)
-    _save_config(path, config)
+    get_store(config_folder).update("Users", users, replace=True)
 
 
 def load_users(config_folder: str) -> dict[int, str]:
-    _, config = _load_config(config_folder)
-    if not config.has_section("Users"):
-        return {}
-    return {int(k): v for k, v in config.items("Users")}
+    return {int(k): v for k, v in get_store(config_folder).items("Users")}
 
 
 def save_active_user(config_folder: str, user_idx: int):
-    path, config = _load_config(config_folder)
-    _ensure_section(config, "Active")
-    config.set("Active", "user", str(user_idx))
-    _save_config(path, config)
+    get_store(config_folder).update("Active", {"user": str(user_idx)})
 
 
 def load_active_user(config_folder: str) -> int | None:
-    _, config = _load_config(config_folder)
-    raw = config.get("Active", "user", fallback=None)
+    raw = get_store(config_folder).get("Active", "user", fallback=None)
     return int(raw) if raw else None
 
 
@@ -180,6 +239,7 @@ def get_user_res_folder(config_folder: str, username: str) -> str:
 def delete_user(config_folder: str, users: dict[int, str], user_idx: int):
     username = users[user_idx]
     user_folder = get_user_folder(config_folder, username)
+    _discard_stores(user_folder)
     if os.path.exists(user_folder):
         shutil.rmtree(user_folder)
     del users[user_idx]
@@ -187,29 +247,23 @@ def delete_user(config_folder: str, users: dict[int, str], user_idx: int):
 
 
 def needs_user_migration(config_folder: str) -> bool:
-    _, config = _load_config(config_folder)
-    return config.has_section("Brokers") and not config.has_section("Users")
+    store = get_store(config_folder)
+    return store.has_section("Brokers") and not store.has_section("Users")
 
 
 def migrate_to_multi_user(config_folder: str, username: str):
-    path, config = _load_config(config_folder)
+    store = get_store(config_folder)
 
     user_folder = get_user_folder(config_folder, username)
     user_res = get_user_res_folder(config_folder, username)
     os.makedirs(user_res, exist_ok=True)
 
     # Move per-user sections into a separate config.ini
-    user_config = configparser.ConfigParser()
+    user_store = get_store(user_folder)
     for section in ("Brokers", "Watchlist", "Transactions", "Home"):
-        if config.has_section(section):
-            user_config.add_section(section)
-            for k, v in config.items(section):
-                user_config.set(section, k, v)
-            config.remove_section(section)
-
-    user_config_path = os.path.join(user_folder, "config.ini")
-    with open(user_config_path, "w", encoding="utf-8") as f:
-        user_config.write(f)
+        if store.has_section(section):
+            user_store.update(section, dict(store.items(section)))
+            store.remove_section(section)
 
     # Move resources/ contents into user subfolder
     old_res = os.path.join(config_folder, "resources")
@@ -219,115 +273,316 @@ def migrate_to_multi_user(config_folder: str, username: str):
         shutil.rmtree(old_res)
 
     # Add [Users] and [Active] to root config
-    _ensure_section(config, "Users")
-    config.set("Users", "1", username)
-    _ensure_section(config, "Active")
-    config.set("Active", "user", "1")
-    _save_config(path, config)
+    store.update("Users", {"1": username})
+    store.update("Active", {"user": "1"})
+    # One-off restructuring: write it through rather than behind
+    user_store.flush()
+    store.flush()
 
 
 # ── Backup export / import ─────────────────────────────────────
 
 _CRITICAL_COLUMNS = {"date", "account", "operation", "product"}
+# Written into every backup; the copy in the config folder is the base of differential backups
+BACKUP_MANIFEST = "backup_manifest.json"
+_COPY_BLOCK = 1 << 20
+
+
+def _backup_source(source):
+    """A ZipFile over source: a path, a binary file object or the archive bytes."""
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    return zipfile.ZipFile(source)
 
 
-def export_backup(config_folder: str) -> bytes:
-    buf = io.BytesIO()
-    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
-        for dirpath, _, filenames in os.walk(config_folder):
-            for fname in filenames:
-                full = os.path.join(dirpath, fname)
-                arcname = os.path.relpath(full, config_folder)
-                zf.write(full, arcname)
-    return buf.getvalue()
+def _is_journal(arcname: str) -> bool:
+    return arcname.endswith(".csv")
 
 
-def validate_backup(zip_bytes: bytes, t) -> tuple[bool, str]:
+def _file_crc(path: str) -> int:
+    crc = 0
+    with open(path, "rb") as f:
+        while block := f.read(_COPY_BLOCK):
+            crc = zlib.crc32(block, crc)
+    return crc
+
+
+def _file_unchanged(path: str, entry: dict) -> bool:
+    """Whether the file at path still holds the content recorded in a manifest entry.
+
+    A different size means a change and the same size and mtime mean none;
+    otherwise (e.g. after a restore rewrote the file) the CRC decides.
+    """
     try:
-        zf = zipfile.ZipFile(io.BytesIO(zip_bytes))
-    except Exception:
-        return False, t.get("settings.account.import_error")
+        st = os.stat(path)
+    except OSError:
+        return False
+    if st.st_size != entry["size"]:
+        return False
+    if st.st_mtime_ns == entry.get("mtime_ns"):
+        return True
+    return _file_crc(path) == entry["crc"]
+
+
+def _walk_backup_files(config_folder: str):
+    """(full path, archive name) of every file to back up, in a stable order."""
+    for dirpath, dirnames, filenames in os.walk(config_folder):
+        dirnames.sort()
+        for fname in sorted(filenames):
+            full = os.path.join(dirpath, fname)
+            arcname = os.path.relpath(full, config_folder).replace(os.sep, "/")
+            if arcname != BACKUP_MANIFEST:
+                yield full, arcname
+
+
+def load_backup_manifest(config_folder: str) -> dict | None:
+    """Manifest of the last full backup exported or imported here, if any."""
+    try:
+        with open(os.path.join(config_folder, BACKUP_MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("type") == "full" else None
+
+
+def save_backup_manifest(config_folder: str, manifest: dict):
+    """Make manifest, of a full backup that was saved, the base of differential backups."""
+    with open(os.path.join(config_folder, BACKUP_MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+
+def export_backup(config_folder: str, dest, differential: bool = False) -> dict:
+    """Stream a zip backup of config_folder into dest, a path or binary file object.
+
+    Pending config changes are written first. Files are compressed one at a
+    time straight into dest. The archive holds a manifest of every backed-up
+    file (size, mtime, CRC). A differential backup leaves out the journals
+    (.csv) unchanged since the last full backup, as recorded by its
+    manifest; the other files are always included. Returns the manifest:
+    pass it to save_backup_manifest() once a full backup has been saved.
+    """
+    flush_all()
+    base = load_backup_manifest(config_folder) if differential else None
+    if differential and base is None:
+        raise ValueError("No full backup to compare with: export a full backup first.")
+    base_files = base["files"] if base else {}
+    files = {}
+    with zipfile.ZipFile(dest, "w", zipfile.ZIP_DEFLATED) as zf:
+        for full, arcname in _walk_backup_files(config_folder):
+            st = os.stat(full)
+            entry = base_files.get(arcname)
+            if entry is not None and _is_journal(arcname) and _file_unchanged(full, entry):
+                files[arcname] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "crc": entry["crc"]}
+                continue
+            zf.write(full, arcname)
+            files[arcname] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "crc": zf.getinfo(arcname).CRC}
+        manifest = {
+            "version": 1,
+            "id": uuid.uuid4().hex,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "type": "differential" if differential else "full",
+            "base": base["id"] if base else None,
+            "files": files,
+        }
+        zf.writestr(BACKUP_MANIFEST, json.dumps(manifest))
+    return manifest
+
+
+def _valid_manifest(manifest) -> bool:
+    if not isinstance(manifest, dict) or manifest.get("type") not in ("full", "differential"):
+        return False
+    files = manifest.get("files")
+    return isinstance(files, dict) and all(
+        isinstance(entry, dict) and isinstance(entry.get("size"), int) and isinstance(entry.get("crc"), int)
+        for entry in files.values()
+    )
+
+
+def _read_manifest(zf: zipfile.ZipFile) -> dict | None:
+    """Manifest of an archive; None for backups made before manifests existed.
+
+    Raises ValueError if the manifest is not one export_backup() writes.
+    """
+    try:
+        raw = zf.read(BACKUP_MANIFEST)
+    except KeyError:
+        return None
+    manifest = json.loads(raw.decode("utf-8"))
+    if not _valid_manifest(manifest):
+        raise ValueError(f"{BACKUP_MANIFEST} is not a valid manifest.")
+    return manifest
 
-    names = zf.namelist()
 
-    # config.ini must exist
-    if "config.ini" not in names:
-        return False, "Missing config.ini in backup."
+def _link_or_copy(src: str, dst: str):
+    """Hard-link src to dst (instant, same data), or copy it where links are unsupported."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _read_csv_header(zf: zipfile.ZipFile, name: str) -> set[str]:
+    """Column names of a CSV in the archive, decompressing only its first line."""
+    with zf.open(name) as raw:
+        header_line = io.TextIOWrapper(raw, encoding="utf-8", newline="").readline()
+    return {c.strip() for c in header_line.split(",")}
+
+
+def _missing_base_files(config_folder: str, manifest: dict, names: set[str]) -> list[str]:
+    """Files a differential backup relies on that do not match in config_folder."""
+    return [
+        arcname for arcname, entry in manifest["files"].items()
+        if arcname not in names
+        and not _file_unchanged(os.path.join(config_folder, *arcname.split("/")), entry)
+    ]
 
-    config = configparser.ConfigParser()
+
+def validate_backup(config_folder: str, source, t) -> tuple[bool, str]:
+    """Check that source (a path, binary file object or bytes) is a backup config_folder can import.
+
+    Only config files and the header line of each journal are read. Journals
+    a differential backup leaves out must match the files in config_folder.
+    """
     try:
-        config.read_string(zf.read("config.ini").decode("utf-8"))
+        zf = _backup_source(source)
     except Exception:
-        return False, "config.ini is not a valid configuration file."
-
-    # Multi-user backup: root config has [Users], per-user configs have [Brokers]
-    if config.has_section("Users") and config.options("Users"):
-        for key in config.options("Users"):
-            username = config.get("Users", key)
-            user_config_path = f"users/{username}/config.ini"
-            if user_config_path not in names:
-                return False, f"Missing config for user '{username}'."
-            user_config = configparser.ConfigParser()
-            try:
-                user_config.read_string(zf.read(user_config_path).decode("utf-8"))
-            except Exception:
-                return False, f"Cannot parse config for user '{username}'."
-            if not user_config.has_section("Brokers") or not user_config.options("Brokers"):
-                return False, f"User '{username}' has no broker entries."
-            for bkey in user_config.options("Brokers"):
-                broker_name = user_config.get("Brokers", bkey)
-                expected = f"users/{username}/resources/Report {broker_name}.csv"
-                if expected not in names:
-                    return False, f"Missing CSV for broker '{broker_name}' (user '{username}')."
-            csv_names = [n for n in names
-                         if n.startswith(f"users/{username}/resources/") and n.endswith(".csv")]
-            for csv_name in csv_names:
+        return False, t.get("settings.account.import_error")
+
+    with zf:
+        try:
+            manifest = _read_manifest(zf)
+        except Exception:
+            return False, f"{BACKUP_MANIFEST} is not a valid manifest."
+        names = set(zf.namelist())
+        # Files of the backed-up tree: a differential backup omits unchanged journals
+        present = names | set(manifest["files"]) if manifest else names
+
+        # config.ini must exist
+        if "config.ini" not in names:
+            return False, "Missing config.ini in backup."
+
+        config = configparser.ConfigParser()
+        try:
+            config.read_string(zf.read("config.ini").decode("utf-8"))
+        except Exception:
+            return False, "config.ini is not a valid configuration file."
+
+        # Multi-user backup: root config has [Users], per-user configs have [Brokers]
+        if config.has_section("Users") and config.options("Users"):
+            csv_names = []
+            for key in config.options("Users"):
+                username = config.get("Users", key)
+                user_config_path = f"users/{username}/config.ini"
+                if user_config_path not in names:
+                    return False, f"Missing config for user '{username}'."
+                user_config = configparser.ConfigParser()
                 try:
-                    header_line = zf.read(csv_name).decode("utf-8").split("\n", 1)[0]
-                    columns = {c.strip() for c in header_line.split(",")}
+                    user_config.read_string(zf.read(user_config_path).decode("utf-8"))
                 except Exception:
-                    return False, f"Cannot read header of {csv_name}."
-                missing = _CRITICAL_COLUMNS - columns
-                if missing:
-                    return False, f"{csv_name} is missing columns: {', '.join(sorted(missing))}"
-    elif config.has_section("Brokers") and config.options("Brokers"):
-        # Legacy single-user backup
-        csv_names = [n for n in names if n.startswith("resources/") and n.endswith(".csv")]
-        if not csv_names:
-            return False, "No CSV files found in resources/."
-        for key in config.options("Brokers"):
-            broker_name = config.get("Brokers", key)
-            expected = f"resources/Report {broker_name}.csv"
-            if expected not in names:
-                return False, f"Missing CSV for broker '{broker_name}': {expected}"
+                    return False, f"Cannot parse config for user '{username}'."
+                if not user_config.has_section("Brokers") or not user_config.options("Brokers"):
+                    return False, f"User '{username}' has no broker entries."
+                for bkey in user_config.options("Brokers"):
+                    broker_name = user_config.get("Brokers", bkey)
+                    expected = f"users/{username}/resources/Report {broker_name}.csv"
+                    if expected not in present:
+                        return False, f"Missing CSV for broker '{broker_name}' (user '{username}')."
+                csv_names += [n for n in names
+                              if n.startswith(f"users/{username}/resources/") and n.endswith(".csv")]
+        elif config.has_section("Brokers") and config.options("Brokers"):
+            # Legacy single-user backup
+            if not any(n.startswith("resources/") and n.endswith(".csv") for n in present):
+                return False, "No CSV files found in resources/."
+            for key in config.options("Brokers"):
+                broker_name = config.get("Brokers", key)
+                expected = f"resources/Report {broker_name}.csv"
+                if expected not in present:
+                    return False, f"Missing CSV for broker '{broker_name}': {expected}"
+            csv_names = [n for n in names if n.startswith("resources/") and n.endswith(".csv")]
+        else:
+            return False, "config.ini has no user or broker entries."
+
         for csv_name in csv_names:
             try:
-                header_line = zf.read(csv_name).decode("utf-8").split("\n", 1)[0]
-                columns = {c.strip() for c in header_line.split(",")}
+                columns = _read_csv_header(zf, csv_name)
             except Exception:
                 return False, f"Cannot read header of {csv_name}."
             missing = _CRITICAL_COLUMNS - columns
             if missing:
                 return False, f"{csv_name} is missing columns: {', '.join(sorted(missing))}"
-    else:
-        return False, "config.ini has no user or broker entries."
 
-    zf.close()
+    if manifest and manifest["type"] == "differential":
+        changed = _missing_base_files(config_folder, manifest, names)
+        if changed:
+            return False, ("This backup only holds the changes since a previous full backup, "
+                           f"and the current data no longer matches it: {changed[0]}")
     return True, ""
 
 
-def import_backup(config_folder: str, zip_bytes: bytes):
-    zf = zipfile.ZipFile(io.BytesIO(zip_bytes))
+def import_backup(config_folder: str, source):
+    """Replace config_folder with the content of the backup source.
+
+    The archive is extracted, member by member, into a staging folder next
+    to config_folder, which then takes its place. The journals a
+    differential backup leaves out are linked (or copied) over from the
+    current folder, with the manifest of the full backup it is based on, so
+    the current data stays untouched until the final swap.
+    """
+    config_folder = os.path.normpath(config_folder)
+    staging = config_folder + ".import"
+    with _backup_source(source) as zf:
+        manifest = _read_manifest(zf)
+        names = set(zf.namelist())
+
+        # path traversal check
+        target = os.path.realpath(config_folder)
+        for member in names:
+            resolved = os.path.realpath(os.path.join(config_folder, member))
+            if not resolved.startswith(target + os.sep) and resolved != target:
+                raise ValueError(f"Unsafe path in archive: {member}")
+
+        kept = []
+        if manifest and manifest["type"] == "differential":
+            changed = _missing_base_files(config_folder, manifest, names)
+            if changed:
+                raise ValueError(f"Current data does not match the backup base: {changed[0]}")
+            kept = [n for n in manifest["files"] if n not in names]
+            if os.path.exists(os.path.join(config_folder, BACKUP_MANIFEST)):
+                kept.append(BACKUP_MANIFEST)
+
+        if os.path.exists(staging):
+            shutil.rmtree(staging)
+        os.makedirs(staging)
+        try:
+            for member in names:
+                if manifest and manifest["type"] == "differential" and member == BACKUP_MANIFEST:
+                    continue
+                zf.extract(member, staging)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
 
-    # path traversal check
-    target = os.path.realpath(config_folder)
-    for member in zf.namelist():
-        resolved = os.path.realpath(os.path.join(config_folder, member))
-        if not resolved.startswith(target + os.sep) and resolved != target:
-            raise ValueError(f"Unsafe path in archive: {member}")
-
-    if os.path.exists(config_folder):
-        shutil.rmtree(config_folder)
-    os.makedirs(config_folder, exist_ok=True)
-    zf.extractall(config_folder)
-    zf.close()
+    try:
+        for arcname in kept:
+            dst = os.path.join(staging, *arcname.split("/"))
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            _link_or_copy(os.path.join(config_folder, *arcname.split("/")), dst)
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    # The stores hold the data being replaced
+    _discard_stores(config_folder)
+    previous = config_folder + ".old"
+    if os.path.exists(previous):
+        shutil.rmtree(previous)
+    had_folder = os.path.exists(config_folder)
+    if had_folder:
+        os.replace(config_folder, previous)
+    try:
+        os.replace(staging, config_folder)
+    except OSError:
+        if had_folder:
+            os.replace(previous, config_folder)
+        raise
+    shutil.rmtree(previous, ignore_errors=True)
@@ -0,0 +1,100 @@
+import gzip
+import io
+from importlib.util import find_spec
+
+import numpy as np
+import pandas as pd
+
+# Export format -> file extension
+EXPORT_FORMATS = {"csv": ".csv", "csv.gz": ".csv.gz", "parquet": ".parquet"}
+EXPORT_LABELS = {"csv": "CSV", "csv.gz": "CSV (gzip)", "parquet": "Parquet"}
+
+# Rows converted and written at a time: bounds the memory of an export
+_CHUNK_ROWS = 50_000
+
+
+def available_formats():
+    """Export formats usable here: Parquet needs the optional pyarrow package."""
+    return [fmt for fmt in EXPORT_FORMATS if fmt != "parquet" or find_spec("pyarrow") is not None]
+
+
+def _chunks(df, order, chunk_rows):
+    """(chunk, row positions) pairs of df, in order; one empty chunk for an empty df."""
+    n = len(df) if order is None else len(order)
+    for start in range(0, max(n, 1), chunk_rows):
+        if order is None:
+            rows = np.arange(start, min(start + chunk_rows, n))
+            yield df.iloc[start:start + chunk_rows], rows
+        else:
+            rows = order[start:start + chunk_rows]
+            yield df.take(rows), rows
+
+
+def write_frame(dest, df, fmt="csv", *, order=None, transform=None, index=False, chunk_rows=_CHUNK_ROWS):
+    """Write df to dest, a binary file object, in chunks of chunk_rows rows.
+
+    order optionally gives the row positions to write, in order (e.g. a
+    sort); transform(chunk, rows) returns the frame to write for a chunk,
+    e.g. with localized headers and values. Only one converted chunk is in
+    memory at a time, so the peak memory does not grow with the export.
+    dest is flushed but left open.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    chunks = (
+        (transform(chunk, rows) if transform else chunk)
+        for chunk, rows in _chunks(df, order, chunk_rows)
+    )
+    if fmt == "parquet":
+        _write_parquet(dest, chunks, index)
+        return
+
+    raw = gzip.GzipFile(fileobj=dest, mode="wb") if fmt == "csv.gz" else dest
+    text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+    try:
+        for k, chunk in enumerate(chunks):
+            chunk.to_csv(text, index=index, header=(k == 0))
+    finally:
+        text.flush()
+        text.detach()
+        if raw is not dest:
+            raw.close()
+    dest.flush()
+
+
+def _write_parquet(dest, chunks, index):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=index)
+            if writer is None:
+                writer = pq.ParquetWriter(dest, table.schema)
+            else:
+                # An all-missing column infers another type in a later chunk
+                table = table.cast(writer.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def export_bytes(df, fmt="csv", **kwargs):
+    """write_frame() into memory, for platforms that need the file content up front."""
+    buf = io.BytesIO()
+    write_frame(buf, df, fmt, **kwargs)
+    return buf.getvalue()
+
+
+def export_file(path, df, fmt="csv", **kwargs):
+    """write_frame() straight to the file at path."""
+    with open(path, "wb") as f:
+        write_frame(f, df, fmt, **kwargs)
+
+
+def date_order(dates, ascending=False):
+    """Row positions sorting ledger date strings (day first), missing dates last."""
+    parsed = pd.to_datetime(pd.Series(dates).reset_index(drop=True), dayfirst=True, errors="coerce")
+    return parsed.sort_values(ascending=ascending, kind="stable").index.to_numpy()
@@ -0,0 +1,103 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Bounded worker pools: network fetches, ledger loading, user-requested computations,
+# speculative work and ledger writes, which run one at a time in submission order
+_POOLS = {
+    "io": ThreadPoolExecutor(max_workers=4, thread_name_prefix="jobs-io"),
+    "ledgers": ThreadPoolExecutor(max_workers=4, thread_name_prefix="jobs-ledgers"),
+    "compute": ThreadPoolExecutor(max_workers=2, thread_name_prefix="jobs-compute"),
+    "background": ThreadPoolExecutor(max_workers=2, thread_name_prefix="jobs-background"),
+    "writes": ThreadPoolExecutor(max_workers=1, thread_name_prefix="jobs-writes"),
+}
+
+_lock = threading.Lock()
+# key -> Job queued or running under that key
+_jobs = {}
+
+
+class Cancelled(BaseException):
+    """Raised in a job by CancelToken.raise_if_cancelled().
+
+    Derives from BaseException, like asyncio.CancelledError, so the
+    `except Exception` handlers of the workers do not report it as an error.
+    """
+
+
+class CancelToken:
+    """Cancellation flag shared by a job and whoever submitted or superseded it."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def wait(self, timeout):
+        """Sleep up to timeout seconds; True if the job was cancelled meanwhile."""
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise Cancelled()
+
+
+class Job:
+    def __init__(self, key, token):
+        self.key = key
+        self.token = token
+        self.future = None
+
+    def cancel(self):
+        self.token.cancel()
+
+
+def _run(job, fn, args, kwargs):
+    try:
+        if not job.token.cancelled:
+            fn(job.token, *args, **kwargs)
+    except Cancelled:
+        pass
+    finally:
+        with _lock:
+            if _jobs.get(job.key) is job:
+                del _jobs[job.key]
+
+
+def submit(key, fn, *args, pool="io", latest=True, **kwargs):
+    """Run fn(token, *args, **kwargs) on a bounded worker pool and return its Job.
+
+    Jobs sharing a key are coalesced. With latest=True a new job cancels the
+    queued or running job with its key, so only the latest one publishes its
+    result; with latest=False the new job is dropped while one is pending and
+    the pending Job is returned (e.g. for writes that must not run twice).
+    key=None runs the job unkeyed.
+
+    A job cancelled before it starts never runs. A running job is not
+    interrupted: fn must check token.cancelled, or call
+    token.raise_if_cancelled(), before touching shared state or the page.
+    """
+    token = CancelToken()
+    job = Job(key, token)
+    with _lock:
+        current = _jobs.get(key) if key is not None else None
+        if current is not None:
+            if not latest and not current.token.cancelled:
+                return current
+            current.cancel()
+        if key is not None:
+            _jobs[key] = job
+        job.future = _POOLS[pool].submit(_run, job, fn, args, kwargs)
+    return job
+
+
+def cancel(key):
+    """Cancel the job queued or running under key, if any."""
+    with _lock:
+        job = _jobs.get(key)
+        if job is not None:
+            job.cancel()
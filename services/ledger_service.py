@@ -0,0 +1,125 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from utils.columns import COLUMNS
+
+_LEDGER_CACHE_SIZE = 8
+# Columns added to the ledger columns: parsed date, account index and row position in its ledger
+HELPER_COLUMNS = ["_date", "_acc", "_pos"]
+
+# Sort key: day number << 40 | account rank << 32 | row position; rows without a date sort last
+_NO_DAY = (1 << 22) - 1
+_RANK_SHIFT = 32
+_DAY_SHIFT = 40
+
+_lock = threading.Lock()
+# tuple of account indexes -> ConsolidatedLedger over them
+_ledgers = OrderedDict()
+
+
+def _same_prefix(old, new, n):
+    """Whether the first n rows of two ledgers hold the same values.
+
+    Appending a row can widen a column's dtype (e.g. int to float), so only
+    columns whose dtypes differ are compared as objects.
+    """
+    if list(old.columns) != list(new.columns):
+        return False
+    for col in old.columns:
+        a = old[col].iloc[:n].reset_index(drop=True)
+        b = new[col].iloc[:n].reset_index(drop=True)
+        if a.dtype != b.dtype:
+            a, b = a.astype(object), b.astype(object)
+        if not a.equals(b):
+            return False
+    return True
+
+
+def _opening_rows(df):
+    """1 if the ledger starts with its account-opening row (no operation), else 0."""
+    if df.empty or "operation" not in df.columns:
+        return 0
+    return 1 if pd.isna(df["operation"].iloc[0]) else 0
+
+
+class ConsolidatedLedger:
+    """Transactions of several accounts in one frame, sorted by (date, account, row).
+
+    The opening row of each ledger, recognized by its missing operation, is
+    left out, and HELPER_COLUMNS are added.
+    When a ledger only gained or lost rows at the end, update() merges or
+    drops just those rows: their sort keys are placed with a binary search
+    into the keys of the frame, so the other accounts are neither re-parsed
+    nor re-sorted. Any other change re-reads that account alone.
+    """
+
+    def __init__(self, acc_ids):
+        self._ranks = {acc: rank for rank, acc in enumerate(acc_ids)}
+        self._sources = {}
+        self._keys = np.empty(0, dtype=np.int64)
+        self.frame = pd.DataFrame(columns=COLUMNS + HELPER_COLUMNS)
+
+    def update(self, ledgers):
+        """Bring the frame up to date with ledgers, a list of (acc_idx, DataFrame)."""
+        for acc, df in ledgers:
+            old = self._sources.get(acc)
+            if old is df:
+                continue
+            skip = _opening_rows(df)
+            n = 0
+            if old is not None:
+                n = min(len(old), len(df))
+                if _opening_rows(old) != skip or not _same_prefix(old, df, n):
+                    n = 0
+                self._drop(acc, n)
+            self._insert(acc, df, max(n, skip))
+            self._sources[acc] = df
+
+    def _drop(self, acc, start):
+        keep = ~((self.frame["_acc"].to_numpy() == acc) & (self.frame["_pos"].to_numpy() >= start))
+        if not keep.all():
+            self.frame = self.frame[keep].reset_index(drop=True)
+            self._keys = self._keys[keep]
+
+    def _insert(self, acc, df, start):
+        rows = df.iloc[start:]
+        if rows.empty:
+            return
+        dates = pd.to_datetime(rows["date"], dayfirst=True, errors="coerce")
+        positions = np.arange(start, len(df))
+        days = dates.to_numpy(dtype="datetime64[D]").astype(np.int64)
+        days = np.where(dates.isna().to_numpy(), _NO_DAY, days - np.datetime64("1900-01-01", "D").astype(np.int64))
+        keys = (days << _DAY_SHIFT) | (self._ranks[acc] << _RANK_SHIFT) | positions
+        rows = rows.assign(_date=dates.to_numpy(), _acc=acc, _pos=positions)
+
+        by_key = np.argsort(keys, kind="stable")
+        slots = np.searchsorted(self._keys, keys[by_key])
+        n = len(self._keys)
+        order = np.insert(np.arange(n), slots, n + by_key)
+        self._keys = np.insert(self._keys, slots, keys[by_key])
+        frame = rows if self.frame.empty else pd.concat([self.frame, rows], ignore_index=True)
+        self.frame = frame.take(order).reset_index(drop=True)
+
+
+def consolidated(ledgers):
+    """Consolidated ledger of ledgers, a list of (acc_idx, DataFrame) in account order.
+
+    Returns the frame of a ConsolidatedLedger kept per set of accounts and
+    updated incrementally. The frame is shared: callers must not modify it
+    in place.
+    """
+    ledgers = [(acc, df) for acc, df in ledgers]
+    key = tuple(acc for acc, _ in ledgers)
+    with _lock:
+        ledger = _ledgers.get(key)
+        if ledger is None:
+            ledger = ConsolidatedLedger(key)
+        _ledgers[key] = ledger
+        _ledgers.move_to_end(key)
+        while len(_ledgers) > _LEDGER_CACHE_SIZE:
+            _ledgers.popitem(last=False)
+        ledger.update(ledgers)
+        return ledger.frame
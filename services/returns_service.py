@@ -0,0 +1,207 @@
+import threading
+from collections import OrderedDict
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from services.market_data import download_close
+from utils.moments import MomentAccumulator
+
+FX_TICKER = "USDEUR=X"
+
+_CLOSE_CACHE_SIZE = 16
+_MATRIX_CACHE_SIZE = 16
+_MOMENTS_CACHE_SIZE = 16
+
+_lock = threading.Lock()
+_epoch = 0
+# key: (frozenset of tickers, start, end) -> raw close DataFrame on the union of trading dates
+_close_cache = OrderedDict()
+# key: (tickers, currencies, start, end, common_dates) -> aligned prices and returns
+_matrix_cache = OrderedDict()
+# key: (columns, currencies, start, returns kind) -> MomentAccumulator of the settled rows
+_moments_cache = OrderedDict()
+
+
+def _as_timestamp(dt):
+    return pd.Timestamp(dt).tz_localize(None) if dt is not None else None
+
+
+def _cache_put(cache, key, value, size):
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > size:
+        cache.popitem(last=False)
+
+
+def _cached_closes(tickers, start, end):
+    """Slice of a cached download covering all tickers over [start, end), or None."""
+    with _lock:
+        for key, closes in reversed(_close_cache.items()):
+            cached_tickers, cached_start, cached_end = key
+            if not tickers <= cached_tickers:
+                continue
+            if (start, end) == (cached_start, cached_end):
+                pass
+            elif None in (start, end, cached_start, cached_end):
+                continue
+            elif start < cached_start or end > cached_end:
+                continue
+            _close_cache.move_to_end(key)
+            columns = [t for t in closes.columns if t in tickers]
+            if start is None or end is None:
+                return closes[columns]
+            mask = (closes.index >= start.normalize()) & (closes.index < end)
+            return closes.loc[mask, columns]
+    return None
+
+
+def get_close_matrix(tickers, start, end):
+    """Raw closing prices of tickers between start and end, one column per ticker.
+
+    Downloads are cached per ticker set and date range: a request for a subset
+    of the tickers, or a narrower range, of a cached download is served by
+    slicing it. Tickers that could not be downloaded are missing from the
+    columns. The returned frame is shared: callers must not modify it in place.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return pd.DataFrame()
+    start, end = _as_timestamp(start), _as_timestamp(end)
+
+    closes = _cached_closes(frozenset(tickers), start, end)
+    if closes is not None:
+        return closes
+
+    closes, _ = download_close(tickers, start=start, end=end)
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(name=tickers[0])
+
+    with _lock:
+        _cache_put(_close_cache, (frozenset(tickers), start, end), closes, _CLOSE_CACHE_SIZE)
+    return closes
+
+
+def get_returns_matrix(tickers, start, end, currencies=None, common_dates=True):
+    """Calendar-aligned prices and daily returns of tickers between start and end.
+
+    currencies maps each ticker to "EUR" or "USD"; when given, USD prices are
+    converted to EUR with the daily USDEUR rate. Prices are forward-filled on
+    the union of trading dates and restricted to the dates where every ticker
+    (and the exchange rate, when used) has a price. With common_dates=False
+    the dates before a ticker's first price are kept, as NaN, so one young
+    ticker does not shorten the history of the others.
+
+    Returns dict, or None when no prices are available:
+    {
+        "prices": DataFrame,          # aligned close prices, columns in ticker order
+        "simple_returns": DataFrame,  # pct_change, first row dropped
+        "log_returns": DataFrame,     # log(p_t / p_t-1), first row dropped
+    }
+    Results are cached and shared: callers must not modify them in place.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return None
+    start, end = _as_timestamp(start), _as_timestamp(end)
+    currency_key = tuple(sorted(currencies.items())) if currencies else None
+    key = (tuple(tickers), currency_key, start, end, common_dates)
+
+    with _lock:
+        if key in _matrix_cache:
+            _matrix_cache.move_to_end(key)
+            return _matrix_cache[key]
+
+    usd_tickers = [t for t in tickers if currencies and currencies.get(t) == "USD"]
+    closes = get_close_matrix(tickers + ([FX_TICKER] if usd_tickers else []), start, end)
+    available = [t for t in tickers if t in closes.columns]
+    if not available or (usd_tickers and FX_TICKER not in closes.columns):
+        return None
+
+    closes = closes.ffill()
+    prices = closes[available].copy()
+    if usd_tickers:
+        usd_available = [t for t in usd_tickers if t in available]
+        prices[usd_available] = prices[usd_available].mul(closes[FX_TICKER], axis=0)
+        prices = prices[closes[FX_TICKER].notna()]
+    prices = prices.dropna(how="any" if common_dates else "all")
+    if prices.empty:
+        return None
+
+    values = prices.to_numpy()
+    ratio = values[1:] / values[:-1]
+    matrix = {
+        "prices": prices,
+        "simple_returns": pd.DataFrame(ratio - 1, index=prices.index[1:], columns=prices.columns),
+        "log_returns": pd.DataFrame(np.log(ratio), index=prices.index[1:], columns=prices.columns),
+    }
+
+    with _lock:
+        _cache_put(_matrix_cache, key, matrix, _MATRIX_CACHE_SIZE)
+    return matrix
+
+
+def get_moments(tickers, start, end, currencies=None, returns="log_returns"):
+    """Mean and covariance accumulator of the returns matrix of tickers.
+
+    Accumulators are kept per ticker set, currencies and start date. When the
+    same series is requested again with a later end, only the new trading
+    days are folded in; a shorter range or a restated history rebuilds the
+    accumulator. The last row is never stored, since today's close may still
+    move, and is added to the returned copy instead.
+
+    Returns (MomentAccumulator, columns), or None when no prices are available.
+    """
+    matrix = get_returns_matrix(tickers, start, end, currencies=currencies)
+    if matrix is None:
+        return None
+    returns_df = matrix[returns]
+    columns = list(returns_df.columns)
+    if returns_df.empty:
+        return MomentAccumulator(len(columns)), columns
+
+    values = returns_df.to_numpy()
+    dates = returns_df.index
+    settled = len(values) - 1
+    currency_key = tuple(sorted(currencies.items())) if currencies else None
+    key = (tuple(columns), currency_key, _as_timestamp(start), returns)
+
+    with _lock:
+        state = _moments_cache.get(key)
+        last_pos = -1
+        if state is not None and state["last_date"] is not None:
+            last_pos = dates.searchsorted(state["last_date"])
+            if (dates[0] != state["first_date"] or last_pos >= settled
+                    or dates[last_pos] != state["last_date"]
+                    or not np.allclose(values[last_pos], state["last_row"])):
+                state = None
+                last_pos = -1
+        if state is None or state["last_date"] is None:
+            state = {"first_date": dates[0], "last_date": None, "last_row": None,
+                     "accumulator": MomentAccumulator(len(columns))}
+        _cache_put(_moments_cache, key, state, _MOMENTS_CACHE_SIZE)
+
+        if settled > 0:
+            state["accumulator"].update(values[last_pos + 1:settled])
+            state["last_date"] = dates[settled - 1]
+            state["last_row"] = values[settled - 1].copy()
+        moments = state["accumulator"].copy()
+
+    moments.update(values[settled:])
+    return moments, columns
+
+
+def market_data_epoch():
+    """Token that changes whenever cached prices may be stale: every day, and on clear_cache()."""
+    return date.today().isoformat(), _epoch
+
+
+def clear_cache():
+    """Drop every cached download, matrix and accumulator (e.g. to force fresh prices)."""
+    global _epoch
+    with _lock:
+        _epoch += 1
+        _close_cache.clear()
+        _matrix_cache.clear()
+        _moments_cache.clear()
@@ -2,7 +2,9 @@ import pandas as pd
 import numpy as np
 import warnings
 
+from services.ledger_service import consolidated
 from services.market_data import download_close
+from services.returns_service import get_close_matrix, FX_TICKER
 from decimal import Decimal
 
 from utils.other_utils import round_down, D, to_money, ValidationError
@@ -13,18 +15,19 @@ warnings.simplefilter(action='ignore', category=Warning)
 
 
 def get_tickers(translator, data):
-    total_tickers = []
-    active_tickers = []
-    for account in data:
-        total_assets, active_assets = get_asset_value(translator, account[1], just_assets=True)
+    """(ticker, currency) pairs ever traded and currently held across the accounts in data.
 
-        total_ticker_list = total_assets[["ticker", "curr"]].dropna(subset=["ticker", "curr"]).drop_duplicates().apply(tuple, axis=1).tolist()
-        active_ticker_list = active_assets[["ticker", "curr"]].dropna(subset=["ticker", "curr"]).drop_duplicates().apply(tuple, axis=1).tolist()
+    Reads the consolidated ledger: the last trade of each ticker in each
+    account, in ledger order, tells its currency and whether it is held.
+    """
+    ledger = consolidated(data)
+    trades = ledger[ledger["operation"].isin(["Buy", "Sell", "Split"]) & ledger["ticker"].notna()]
+    assets = trades.sort_values(["_acc", "_pos"]).groupby(["_acc", "ticker"]).last().reset_index()
 
-        total_tickers.extend(total_ticker_list)
-        active_tickers.extend(active_ticker_list)
-
-    return list(set(total_tickers)), list(set(active_tickers))
+    total_assets = assets[["ticker", "curr"]].dropna()
+    active_assets = assets.loc[assets["qt_held"] > 0, ["ticker", "curr"]].dropna()
+    return (list(set(total_assets.itertuples(index=False, name=None))),
+            list(set(active_assets.itertuples(index=False, name=None))))
 
 
 def _compute_total_liquidity(final_df):
@@ -82,18 +85,14 @@ def _download_price_data(translator, only_tickers, start_ref_date, end_ref_date)
     prices_df = pd.DataFrame([])
     exch_df = pd.DataFrame([])
     fallback_index = pd.date_range(start=start_ref_date, end=end_ref_date)
+    if not only_tickers:
+        return prices_df, exch_df, fallback_index
 
     try:
-        prices_df, _ = download_close(only_tickers, start=start_ref_date, end=end_ref_date)
-        exch_series, _ = download_close("USDEUR=X", start=start_ref_date, end=end_ref_date)
-
-        if isinstance(prices_df, pd.Series):
-            prices_df = prices_df.to_frame(name=only_tickers[0] if len(only_tickers) == 1 else "Close")
-
-        if isinstance(exch_series, pd.Series):
-            exch_df = exch_series.to_frame(name="USDEUR=X")
-        elif not exch_series.empty:
-            exch_df = exch_series
+        closes = get_close_matrix(only_tickers + [FX_TICKER], start_ref_date, end_ref_date)
+        prices_df = closes[[t for t in only_tickers if t in closes.columns]].dropna(how="all")
+        if FX_TICKER in closes.columns:
+            exch_df = closes[[FX_TICKER]].dropna()
         else:
             exch_df = pd.DataFrame()
 
@@ -200,17 +199,9 @@ def portfolio_history(translator, start_ref_date, end_ref_date, data):
     total_tickers, _ = get_tickers(translator, data)
     only_tickers = [t[0] for t in total_tickers]
 
-    all_dfs = []
-    for account in data:
-        df_copy = account[1].copy()
-        df_copy["date"] = pd.to_datetime(df_copy["date"], dayfirst=True, errors="coerce")
-        df_copy = df_copy[["date", "account", "ticker", "curr", "qt_held", "cash_held", "committed_cash"]]
-        all_dfs.append(df_copy)
-
-    final_df = pd.concat(all_dfs, ignore_index=True)
-    final_df = final_df.sort_values(by="date", ascending=True, kind="mergesort")
-    final_df = final_df.iloc[len(data):]
-    final_df = final_df.reset_index(drop=True)
+    # Transactions of every account after its opening row, in date order
+    final_df = consolidated(data)[["_date", "account", "ticker", "curr", "qt_held", "cash_held", "committed_cash"]]
+    final_df = final_df.rename(columns={"_date": "date"}).reset_index(drop=True)
 
     final_df = _compute_total_liquidity(final_df)
     final_df = _compute_total_quantities(final_df)
@@ -0,0 +1,45 @@
+import numpy as np
+
+
+def correlation_clusters(corr, n_clusters=1):
+    """Average-linkage hierarchical clustering of assets by correlation.
+
+    The distance between two assets is sqrt((1 - rho) / 2): 0 for perfectly
+    correlated assets, 1 for perfectly anti-correlated ones; undefined
+    correlations count as 0. Clusters are merged with the Lance-Williams
+    update of the distance matrix, O(N^3) over the N - 1 merges, which is
+    milliseconds for a few hundred assets.
+
+    Returns (order, clusters): order is the dendrogram leaf order of the
+    asset positions, so that similar assets are adjacent, and clusters the
+    tree cut at n_clusters groups, each a list of positions. Every cluster
+    is a contiguous run of order, and clusters are listed in that order.
+    """
+    corr = np.nan_to_num(np.asarray(corr, dtype=float), nan=0.0)
+    n = len(corr)
+    if n == 0:
+        return [], []
+    dist = np.sqrt(np.clip((1.0 - corr) / 2.0, 0.0, 1.0))
+    np.fill_diagonal(dist, np.inf)
+    n_clusters = min(max(n_clusters, 1), n)
+    members = {i: [i] for i in range(n)}
+    cut = None
+    for step in range(n - 1):
+        if n - step == n_clusters:
+            cut = list(members.values())
+        i, j = sorted(map(int, np.unravel_index(int(np.argmin(dist)), dist.shape)))
+        size_i, size_j = len(members[i]), len(members[j])
+        merged = (size_i * dist[i] + size_j * dist[j]) / (size_i + size_j)
+        dist[i, :] = merged
+        dist[:, i] = merged
+        dist[j, :] = np.inf
+        dist[:, j] = np.inf
+        dist[i, i] = np.inf
+        members[i] = members[i] + members.pop(j)
+    # The lower index survives each merge, so the root cluster is members[0]
+    order = members[0]
+    if cut is None:
+        cut = [order]
+    rank = {asset: pos for pos, asset in enumerate(order)}
+    clusters = sorted((sorted(c, key=rank.get) for c in cut), key=lambda c: rank[c[0]])
+    return order, clusters
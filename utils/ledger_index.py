@@ -0,0 +1,149 @@
+import re
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+# Columns with an inverted index: value -> positions of the rows holding it
+KEY_FIELDS = ("ticker", "operation", "product", "account")
+# Columns whose lowercased words make up the token index
+_TEXT_FIELDS = ("asset_name", "ticker")
+_TOKEN_RE = re.compile(r"\w+")
+# Day number of rows without a valid date: sorts before every real date
+_NO_DATE = np.iinfo(np.int64).min
+
+
+def _day_numbers(dates):
+    """Days since the epoch of ledger date strings (day first), _NO_DATE where invalid."""
+    parsed = pd.to_datetime(pd.Series(dates), dayfirst=True, errors="coerce")
+    return parsed.to_numpy(dtype="datetime64[D]").astype(np.int64)
+
+
+def _day_number(dt):
+    return int(pd.Timestamp(dt).to_datetime64().astype("datetime64[D]").astype(np.int64))
+
+
+class LedgerIndex:
+    """In-memory search index over the rows of a ledger, by row position.
+
+    Keeps the positions sorted by (date, position), an inverted index on the
+    KEY_FIELDS and a token index on the words of the asset name and ticker,
+    so a combined query intersects a few posting lists instead of scanning
+    the DataFrame. Ledgers only grow or shrink at the end, and the index
+    follows them with append() and truncate() instead of being rebuilt.
+    """
+
+    def __init__(self, df=None):
+        self._days = np.empty(0, dtype=np.int64)
+        self._order = np.empty(0, dtype=np.int64)
+        self._sorted_days = np.empty(0, dtype=np.int64)
+        self._postings = {field: defaultdict(list) for field in KEY_FIELDS}
+        self._tokens = defaultdict(list)
+        # (field, value) -> posting list as an array; dropped on every change
+        self._arrays = {}
+        if df is not None:
+            self.append(df)
+
+    def __len__(self):
+        return len(self._days)
+
+    def append(self, rows):
+        """Index the rows of a DataFrame as the next positions of the ledger."""
+        k = len(rows)
+        if k == 0:
+            return
+        start = len(self._days)
+        positions = np.arange(start, start + k)
+        days = _day_numbers(rows["date"].to_numpy()) if "date" in rows else np.full(k, _NO_DATE)
+        self._days = np.concatenate([self._days, days])
+
+        # Merge the new rows into the date order; ties keep the position order
+        by_day = np.argsort(days, kind="stable")
+        slots = np.searchsorted(self._sorted_days, days[by_day], side="right")
+        self._order = np.insert(self._order, slots, positions[by_day])
+        self._sorted_days = np.insert(self._sorted_days, slots, days[by_day])
+
+        for field in KEY_FIELDS:
+            if field not in rows:
+                continue
+            postings = self._postings[field]
+            for pos, value in zip(positions.tolist(), rows[field].tolist()):
+                if not pd.isna(value):
+                    postings[value].append(pos)
+
+        text = [rows[field].tolist() for field in _TEXT_FIELDS if field in rows]
+        for pos, values in zip(positions.tolist(), zip(*text)):
+            words = set()
+            for value in values:
+                if isinstance(value, str):
+                    words.update(_TOKEN_RE.findall(value.lower()))
+            for word in words:
+                self._tokens[word].append(pos)
+        self._arrays.clear()
+
+    def truncate(self, n):
+        """Drop every row from position n on, e.g. after the last transaction is removed."""
+        if n >= len(self._days):
+            return
+        keep = self._order < n
+        self._order = self._order[keep]
+        self._sorted_days = self._sorted_days[keep]
+        self._days = self._days[:n]
+        for postings in (*self._postings.values(), self._tokens):
+            for key in list(postings):
+                positions = postings[key]
+                while positions and positions[-1] >= n:
+                    positions.pop()
+                if not positions:
+                    del postings[key]
+        self._arrays.clear()
+
+    def _posting_array(self, field, value):
+        key = (field, value)
+        array = self._arrays.get(key)
+        if array is None:
+            source = self._tokens if field is None else self._postings[field]
+            array = self._arrays[key] = np.array(source.get(value, ()), dtype=np.int64)
+        return array
+
+    def _union_mask(self, arrays):
+        mask = np.zeros(len(self._days), dtype=bool)
+        for array in arrays:
+            mask[array] = True
+        return mask
+
+    def query(self, start=None, end=None, text=None, **criteria):
+        """Positions of the rows matching every given criterion, sorted by (date, position).
+
+        start and end bound the date, inclusive; rows without a valid date
+        only match when neither is given. criteria maps KEY_FIELDS to a value
+        or a collection of accepted values; text matches word prefixes of the
+        asset name and ticker. Criteria left to None are ignored.
+        """
+        masks = []
+        for field, value in criteria.items():
+            if value is None:
+                continue
+            if field not in self._postings:
+                raise ValueError(f"Unknown ledger index field: {field}")
+            values = [value] if isinstance(value, str) or not hasattr(value, "__iter__") else value
+            masks.append(self._union_mask(self._posting_array(field, v) for v in values))
+        for word in _TOKEN_RE.findall(text.lower()) if text else ():
+            masks.append(self._union_mask(
+                self._posting_array(None, token) for token in self._tokens if token.startswith(word)
+            ))
+
+        # The date range is a slice of the date order; the other criteria filter it
+        lo, hi = 0, len(self._order)
+        if start is not None or end is not None:
+            lo = np.searchsorted(self._sorted_days, _NO_DATE + 1 if start is None else _day_number(start))
+            if end is not None:
+                hi = np.searchsorted(self._sorted_days, _day_number(end), side="right")
+        rows = self._order[lo:hi]
+        if not masks:
+            return rows.copy()
+        return rows[np.logical_and.reduce(masks)[rows]]
+
+    def day_numbers(self, positions):
+        """Date of the rows at positions, as days since the epoch (very negative if invalid)."""
+        return self._days[positions]
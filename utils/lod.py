@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+# Calendar buckets of the aggregated levels, finest first
+_LEVEL_FREQS = ("W", "M")
+
+
+class LodPyramid:
+    """Level-of-detail pyramid of aligned daily series, for charts.
+
+    Level 0 is every row; the next levels bucket the rows by calendar week and
+    month and keep, per bucket, the rows holding the minimum and the maximum
+    of the first series and the bucket's last row. Levels are stored as
+    sorted row positions, so a view of any date range at any level is two
+    binary searches and a slice: changing the visible range never recomputes.
+    Values must be finite.
+    """
+
+    def __init__(self, dates, values):
+        self.dates = pd.DatetimeIndex(dates)
+        self.values = np.asarray(values, dtype=float).reshape(len(self.dates), -1)
+        n = len(self.dates)
+        self.levels = [np.arange(n)]
+        for freq in _LEVEL_FREQS:
+            if n == 0:
+                break
+            self.levels.append(self._aggregate(freq))
+
+    def _aggregate(self, freq):
+        bucket = self.dates.to_period(freq).asi8
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+        ends = np.r_[starts[1:], len(bucket)] - 1
+        # Rows sorted by bucket, then by value: each bucket keeps its [start, end] slots
+        order = np.lexsort((self.values[:, 0], bucket))
+        return np.unique(np.concatenate([order[starts], order[ends], ends]))
+
+    def rows(self, start=None, end=None, max_points=150):
+        """Row positions to draw for dates in [start, end] (None: open-ended).
+
+        Picks the finest level with at most max_points rows in the range, or
+        the coarsest one; the first and last rows of the range are always
+        included. Returns (rows, lo, hi) where [lo, hi) are the range's rows.
+        """
+        lo = 0 if start is None else int(self.dates.searchsorted(pd.Timestamp(start)))
+        hi = len(self.dates) if end is None else int(self.dates.searchsorted(pd.Timestamp(end), side="right"))
+        if hi <= lo:
+            return np.empty(0, dtype=np.int64), lo, hi
+        for level in self.levels:
+            a, b = level.searchsorted([lo, hi])
+            if b - a <= max_points:
+                break
+        return np.union1d(level[a:b], [lo, hi - 1]), lo, hi
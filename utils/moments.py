@@ -0,0 +1,48 @@
+import numpy as np
+
+
+class MomentAccumulator:
+    """Streaming count, means and co-moments of N return series.
+
+    Rows are folded in with Welford's update, generalised to batches by Chan's
+    parallel formula, so adding k new days costs O(k * N^2) whatever the
+    length of the history already accumulated.
+    """
+
+    def __init__(self, n_series):
+        self.count = 0
+        self.mean = np.zeros(n_series)
+        self.comoment = np.zeros((n_series, n_series))
+
+    def update(self, rows):
+        """Fold a (k, N) block of observations into the accumulator."""
+        rows = np.atleast_2d(np.asarray(rows, dtype=float))
+        k = len(rows)
+        if k == 0:
+            return
+        batch_mean = rows.mean(axis=0)
+        deviations = rows - batch_mean
+        total = self.count + k
+        delta = batch_mean - self.mean
+        self.comoment += deviations.T @ deviations + np.outer(delta, delta) * (self.count * k / total)
+        self.mean += delta * (k / total)
+        self.count = total
+
+    def copy(self):
+        other = MomentAccumulator(len(self.mean))
+        other.count = self.count
+        other.mean = self.mean.copy()
+        other.comoment = self.comoment.copy()
+        return other
+
+    def covariance(self, ddof=1):
+        if self.count <= ddof:
+            return np.full_like(self.comoment, np.nan)
+        return self.comoment / (self.count - ddof)
+
+    def correlation(self):
+        cov = self.covariance()
+        std = np.sqrt(np.diag(cov))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(std, std)
+        return np.clip(corr, -1.0, 1.0)
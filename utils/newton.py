@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def secant(f, x0, x1, tol=1e-7, max_iter=100):
     """
     Finds a root of the function f using the Secant method.
@@ -44,4 +47,118 @@ def secant(f, x0, x1, tol=1e-7, max_iter=100):
         x_n = x_n_plus_1
 
     # If the loop finishes without converging
-    raise RuntimeError
\ No newline at end of file
+    raise RuntimeError
+
+
+def newton_vec(f, fprime, x0, tol=1e-10, max_iter=50, lower=None):
+    """
+    Runs Newton's method on many independent root-finding problems at once.
+
+    Args:
+        f (callable): Vectorized function, maps an array of guesses to an array of values.
+        fprime (callable): Vectorized analytic derivative of f.
+        x0 (array-like): Initial guesses, one per problem.
+        tol (float): Stops a problem when its Newton step falls below tol.
+        max_iter (int): The maximum number of iterations.
+        lower (float or None): Open lower bound of the domain. Steps that would
+            cross it are halved towards the bound instead.
+
+    Returns:
+        tuple: (roots, converged) arrays. Roots of problems that did not
+        converge are left at their last iterate.
+    """
+    x = np.array(x0, dtype=float, copy=True)
+    converged = np.zeros(x.shape, dtype=bool)
+
+    for i in range(max_iter):
+        active = ~converged
+        if not active.any():
+            break
+
+        with np.errstate(all="ignore"):
+            fx = f(x)
+            dfx = fprime(x)
+            step = fx / dfx
+
+        # A flat or non-finite derivative cannot be stepped through
+        bad = ~np.isfinite(step)
+        step[bad | converged] = 0.0
+
+        x_new = x - step
+        if lower is not None:
+            crossed = x_new <= lower
+            x_new[crossed] = (x[crossed] + lower) / 2
+
+        converged |= active & ~bad & (np.abs(step) < tol)
+        x = x_new
+
+    with np.errstate(all="ignore"):
+        converged &= np.isfinite(f(x))
+    return x, converged
+
+
+def brent(f, a, b, tol=1e-12, max_iter=100):
+    """
+    Finds a root of f inside the bracket [a, b] using Brent's method.
+
+    Args:
+        f (callable): The function to find the root of (f(x)).
+        a (float): Lower end of the bracket.
+        b (float): Upper end of the bracket. f(a) and f(b) must have opposite signs.
+        tol (float): The tolerance on the bracket width.
+        max_iter (int): The maximum number of iterations.
+
+    Returns:
+        float: The estimated root.
+    """
+    fa = f(a)
+    fb = f(b)
+    if fa * fb > 0:
+        raise ValueError("Root is not bracketed")
+
+    # b is the best estimate, c the contrapoint keeping the root bracketed,
+    # a the previous estimate
+    c, fc = b, fb
+    d = e = b - a
+
+    for i in range(max_iter):
+        if fb * fc > 0:
+            c, fc = a, fa
+            d = e = b - a
+        if abs(fc) < abs(fb):
+            a, fa = b, fb
+            b, fb = c, fc
+            c, fc = a, fa
+
+        tol1 = 2 * np.finfo(float).eps * abs(b) + tol / 2
+        m = (c - b) / 2
+        if abs(m) <= tol1 or fb == 0:
+            return b
+
+        if abs(e) >= tol1 and abs(fa) > abs(fb):
+            # Inverse quadratic interpolation, or secant when only two points differ
+            s = fb / fa
+            if a == c:
+                p = 2 * m * s
+                q = 1 - s
+            else:
+                q = fa / fc
+                r = fb / fc
+                p = s * (2 * m * q * (q - r) - (b - a) * (r - 1))
+                q = (q - 1) * (r - 1) * (s - 1)
+            if p > 0:
+                q = -q
+            p = abs(p)
+            if 2 * p < min(3 * m * q - abs(tol1 * q), abs(e * q)):
+                e, d = d, p / q
+            else:
+                d = e = m
+        else:
+            # Fall back to bisection
+            d = e = m
+
+        a, fa = b, fb
+        b = b + d if abs(d) > tol1 else b + np.copysign(tol1, m)
+        fb = f(b)
+
+    raise RuntimeError
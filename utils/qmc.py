@@ -0,0 +1,202 @@
+from functools import lru_cache
+
+import numpy as np
+
+
+# Initial direction numbers m_1..m_s of Joe & Kuo (2008) for Sobol' dimensions 2-21.
+# The primitive polynomial of each dimension is found by _primitive_polynomials(),
+# in the same order as the reference table. Later dimensions use seeded random odd m_k.
+_SOBOL_M = [
+    [1],
+    [1, 3],
+    [1, 3, 1],
+    [1, 1, 1],
+    [1, 1, 3, 3],
+    [1, 3, 5, 13],
+    [1, 1, 5, 5, 17],
+    [1, 1, 5, 5, 5],
+    [1, 1, 7, 11, 19],
+    [1, 1, 5, 1, 1],
+    [1, 1, 1, 3, 11],
+    [1, 3, 5, 5, 31],
+    [1, 3, 3, 9, 7, 49],
+    [1, 1, 1, 15, 21, 21],
+    [1, 3, 1, 13, 27, 49],
+    [1, 1, 1, 15, 7, 5],
+    [1, 3, 1, 15, 13, 25],
+    [1, 1, 5, 5, 19, 61],
+    [1, 3, 7, 11, 23, 15, 103],
+    [1, 3, 7, 13, 13, 15, 69],
+]
+
+_SOBOL_BITS = 32
+
+# Coefficients of Acklam's rational approximation of the inverse normal CDF
+_PPF_A = [-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+          1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00]
+_PPF_B = [-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+          6.680131188771972e+01, -1.328068155288572e+01]
+_PPF_C = [-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+          -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00]
+_PPF_D = [7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00,
+          3.754408661907416e+00]
+
+
+def norm_ppf(u):
+    """Inverse standard normal CDF (Acklam's approximation, relative error < 1.2e-9).
+
+    u must lie strictly inside (0, 1).
+    """
+    u = np.asarray(u, dtype=float)
+    z = np.empty_like(u)
+    low = u < 0.02425
+    high = u > 1 - 0.02425
+    mid = ~(low | high)
+
+    q = u[mid] - 0.5
+    r = q * q
+    a, b = _PPF_A, _PPF_B
+    z[mid] = ((((((a[0] * r + a[1]) * r + a[2]) * r + a[3]) * r + a[4]) * r + a[5]) * q /
+              (((((b[0] * r + b[1]) * r + b[2]) * r + b[3]) * r + b[4]) * r + 1))
+
+    c, d = _PPF_C, _PPF_D
+    for mask, sign, tail in ((low, 1.0, u[low]), (high, -1.0, 1 - u[high])):
+        q = np.sqrt(-2 * np.log(tail))
+        z[mask] = sign * ((((((c[0] * q + c[1]) * q + c[2]) * q + c[3]) * q + c[4]) * q + c[5]) /
+                          ((((d[0] * q + d[1]) * q + d[2]) * q + d[3]) * q + 1))
+    return z
+
+
+def _poly_mulmod(a, b, poly, degree):
+    """Multiply two GF(2) polynomials (as bit masks) modulo poly."""
+    result = 0
+    while b:
+        if b & 1:
+            result ^= a
+        b >>= 1
+        a <<= 1
+        if a >> degree & 1:
+            a ^= poly
+    return result
+
+
+def _poly_powmod(base, exp, poly, degree):
+    result = 1
+    while exp:
+        if exp & 1:
+            result = _poly_mulmod(result, base, poly, degree)
+        base = _poly_mulmod(base, base, poly, degree)
+        exp >>= 1
+    return result
+
+
+def _prime_factors(n):
+    factors = set()
+    p = 2
+    while p * p <= n:
+        while n % p == 0:
+            factors.add(p)
+            n //= p
+        p += 1
+    if n > 1:
+        factors.add(n)
+    return factors
+
+
+def _primitive_polynomials():
+    """Yield (degree, a) for primitive GF(2) polynomials, ordered by degree then a.
+
+    a holds the interior coefficients, as in the Joe & Kuo tables.
+    """
+    degree = 1
+    while True:
+        order = (1 << degree) - 1
+        factors = _prime_factors(order)
+        for a in range(1 << (degree - 1)):
+            poly = (1 << degree) | (a << 1) | 1
+            x = 0b10 if degree > 1 else 1
+            if _poly_powmod(x, order, poly, degree) != 1:
+                continue
+            if all(_poly_powmod(x, order // f, poly, degree) != 1 for f in factors if f != order):
+                yield degree, a
+        degree += 1
+
+
+@lru_cache(maxsize=8)
+def _sobol_directions(dim):
+    """Direction numbers V[d, k] (as 32-bit integers) for the first dim Sobol' dimensions."""
+    directions = np.zeros((dim, _SOBOL_BITS), dtype=np.uint64)
+    directions[0] = [1 << (_SOBOL_BITS - k - 1) for k in range(_SOBOL_BITS)]
+    if dim == 1:
+        return directions
+
+    extra_rng = np.random.default_rng(20080101)
+    polys = _primitive_polynomials()
+    for d in range(1, dim):
+        degree, a = next(polys)
+        if d - 1 < len(_SOBOL_M):
+            m = _SOBOL_M[d - 1]
+        else:
+            m = [int(extra_rng.integers(0, 1 << (k - 1))) * 2 + 1 for k in range(1, degree + 1)]
+
+        v = [0] * _SOBOL_BITS
+        for k in range(min(degree, _SOBOL_BITS)):
+            v[k] = m[k] << (_SOBOL_BITS - k - 1)
+        for k in range(degree, _SOBOL_BITS):
+            v[k] = v[k - degree] ^ (v[k - degree] >> degree)
+            for j in range(1, degree):
+                if (a >> (degree - 1 - j)) & 1:
+                    v[k] ^= v[k - j]
+        directions[d] = v
+    return directions
+
+
+def sobol(n, dim, rng, skip=0):
+    """n points of a digitally shifted Sobol' sequence in (0, 1)^dim.
+
+    Each call with a fresh rng is an independent randomization, so repeated
+    calls can be used as replicates to estimate the error.
+    """
+    index = np.arange(skip, skip + n, dtype=np.uint64)
+    gray = index ^ (index >> np.uint64(1))
+    directions = _sobol_directions(dim)
+
+    points = np.zeros((n, dim), dtype=np.uint64)
+    for k in range(int(skip + n).bit_length()):
+        bit_set = ((gray >> np.uint64(k)) & np.uint64(1)).astype(bool)
+        points[bit_set] ^= directions[:, k]
+
+    shift = rng.integers(0, 1 << _SOBOL_BITS, size=dim, dtype=np.uint64)
+    points ^= shift
+    return (points.astype(float) + 0.5) / float(1 << _SOBOL_BITS)
+
+
+def _first_primes(count):
+    primes = []
+    candidate = 2
+    while len(primes) < count:
+        if all(candidate % p for p in primes if p * p <= candidate):
+            primes.append(candidate)
+        candidate += 1
+    return primes
+
+
+def halton(n, dim, rng):
+    """n points of a randomly started, digit-permuted Halton sequence in (0, 1)^dim."""
+    start = int(rng.integers(1, 1 << 20))
+    index = np.arange(start, start + n, dtype=np.int64)
+    points = np.empty((n, dim))
+
+    for d, base in enumerate(_first_primes(dim)):
+        # Random digit permutation keeping 0 fixed, so trailing zeros stay zeros
+        perm = np.concatenate([[0], rng.permutation(np.arange(1, base))])
+        remaining = index.copy()
+        value = np.zeros(n)
+        scale = 1.0 / base
+        while remaining.any():
+            value += perm[remaining % base] * scale
+            remaining //= base
+            scale /= base
+        points[:, d] = value
+
+    return np.clip(points, 1e-12, 1 - 1e-12)
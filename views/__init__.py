@@ -20,13 +20,28 @@ _ANALYSIS_GLOSSARY_PAGE_OFFSET = 2
 def _rebuild_page(page: ft.Page, state, selected_index: int = 0):
     t = state.translator
     state._last_nav_index = selected_index
+    state.on_account_loaded = None
     is_small_screen = page.width < 600
     page.on_view_pop = None
     if page.views:
         page.views[0].can_pop = True
         page.views[0].on_confirm_pop = None
 
-    current_view = _VIEW_BUILDERS[selected_index](page, state).build()
+    if selected_index != 0 and state.accounts_pending:
+        # Only Home can show accounts still loading; the other views need every
+        # ledger, so show a placeholder and build the view once they are loaded
+        current_view = ft.Container(
+            ft.ProgressRing(width=32, height=32),
+            alignment=ft.alignment.Alignment.CENTER, expand=True,
+        )
+
+        async def _when_loaded():
+            await asyncio.to_thread(state.wait_for_accounts)
+            if state._last_nav_index == selected_index:
+                _rebuild_page(page, state, selected_index=selected_index)
+        page.run_task(_when_loaded)
+    else:
+        current_view = _VIEW_BUILDERS[selected_index](page, state).build()
 
 # ── Right Drawer menu ────────────────────────────────────
 
@@ -1,17 +1,24 @@
-import io
+import threading
+import time
 import flet as ft
 import numpy as np
 import pandas as pd
 from datetime import date, datetime, timedelta
 
+from components.export_dialog import show_export_dialog
 from components.focus_chain import chain_focus
 from components.snack import show_snack
 
 _DATE_FILTER = ft.InputFilter(r"^[0-9\-]*$")
 _DECIMAL_FILTER = ft.InputFilter(r"^[0-9\.]*$")
 _INT_FILTER = ft.NumbersOnlyInputFilter()
+_PORTFOLIO_ROLLING_METRICS = ("volatility", "sharpe", "sortino", "downside_deviation")
+_BENCHMARK_ROLLING_METRICS = ("beta", "alpha", "tracking_error", "information_ratio",
+                              "up_capture", "down_capture", "correlation")
+# Visible ranges of the time-series charts: locale key -> months back from the last date
+_CHART_RANGES = (("3m", 3), ("1y", 12), ("5y", 60), ("all", None))
 from components.ticker_search import TickerSearchField
-from services import analysis_service, chart_service
+from services import analysis_service, chart_service, job_service
 from utils.constants import DATE_FORMAT
 from utils.date_utils import parse_date_input
 
@@ -39,6 +46,8 @@ class AnalysisView:
         self._rolling_corr = None
         self._dd_data = None
         self._var_data = None
+        # Tabs the user has submitted: background results must not replace theirs
+        self._user_submitted = set()
 
         has_account = self.state.analysis_acc_idx is not None or len(self.state.accounts) > 0
 
@@ -70,6 +79,9 @@ class AnalysisView:
             expand=True,
         )
 
+        if has_account:
+            self._start_precompute()
+
         return ft.Row(
             controls=[
                 ft.Column([
@@ -115,6 +127,26 @@ class AnalysisView:
     def _on_tab_change(self, e):
         self.state._analysis_tab_index = e.control.selected_index
 
+    def _build_range_selector(self, on_change) -> ft.Control:
+        t = self.state.translator
+        return ft.RadioGroup(
+            value="all",
+            content=ft.Row([
+                ft.Radio(value=key, label=t.get(f"analysis.range.{key}")) for key, _ in _CHART_RANGES
+            ], wrap=True, spacing=0),
+            on_change=on_change,
+            visible=False,
+        )
+
+    @staticmethod
+    def _visible_range(selector, last_date):
+        """(start, end) dates selected on a range selector, or None for the whole series."""
+        months = dict(_CHART_RANGES)[selector.value]
+        if months is None:
+            return None
+        end = pd.Timestamp(last_date)
+        return end - pd.DateOffset(months=months), end
+
     def _on_account_selected(self, e):
         val = e.control.value
         if val == "all":
@@ -140,6 +172,10 @@ class AnalysisView:
                 return []
             return [[s.analysis_acc_idx, acc["df"]]]
 
+    def _analysis_ledger(self, data):
+        """Ledger versions of the accounts in data, used as the result cache key."""
+        return analysis_service.ledger_key(self.state.accounts, [account[0] for account in data])
+
     # ── Statistics Tab ────────────────────────────────────────────────
 
     def _build_summary_tab(self) -> ft.Control:
@@ -159,12 +195,39 @@ class AnalysisView:
             on_click=self._open_sum_date_picker,
         )
         self.sum_date_value = None
+        self.sum_benchmarks = ft.TextField(
+            label=t.get("analysis.summary.benchmark.tickers"),
+            hint_text=t.get("analysis.summary.benchmark.tickers_hint"),
+            border_radius=ft.border_radius.all(15),
+            border_color=ft.Colors.with_opacity(0.40, ft.Colors.GREY),
+            capitalization=ft.TextCapitalization.CHARACTERS,
+        )
         self.sum_loading = ft.ProgressRing(visible=False, width=30, height=30)
         self.sum_results = ft.Column([], spacing=5)
         self.sum_chart = ft.Container()
+        self.sum_range = self._build_range_selector(self._on_sum_range_change)
+        self._sum_chart_dates = None
+        self.sum_rolling_source = ft.Dropdown(
+            menu_style=ft.MenuStyle(
+                shape=ft.RoundedRectangleBorder(radius=15),
+            ),
+            options=[],
+            on_select=self._on_sum_rolling_source_change,
+            border_radius=ft.border_radius.all(15),
+            visible=False,
+        )
+        self.sum_rolling_metric = ft.RadioGroup(
+            value="volatility",
+            content=ft.Row([], wrap=True, spacing=0),
+            on_change=self._on_sum_rolling_metric_change,
+            visible=False,
+        )
+        self.sum_rolling_chart = ft.Container()
+        self._sum_rolling_metrics = None
+        self._sum_benchmark = None
         self.sum_export_row = ft.Row([
             ft.ElevatedButton(t.get("analysis.export_plot_csv"), icon=ft.Icons.ASSESSMENT,
-                          on_click=lambda _: self.page.run_task(self._export_sum_csv)),
+                          on_click=lambda _: self._export_sum()),
         ], visible=False)
 
         sum_submit_btn = ft.FilledButton(
@@ -179,10 +242,15 @@ class AnalysisView:
         col = ft.Column([
             ft.Container(height=5),
             ft.Row([self.sum_date_field, self.sum_date_icon]),
+            self.sum_benchmarks,
             ft.Row([ft.Container(width=5), self.sum_loading]),
             ft.Row([sum_submit_btn], alignment=ft.MainAxisAlignment.CENTER),
             self.sum_results,
+            self.sum_range,
             self.sum_chart,
+            self.sum_rolling_source,
+            self.sum_rolling_metric,
+            self.sum_rolling_chart,
             self.sum_export_row,
             ft.Container(height=20),
         ], spacing=12, scroll=ft.ScrollMode.AUTO)
@@ -193,9 +261,66 @@ class AnalysisView:
 
         self.sum_date_field.key = "sum_date"
         self.sum_date_field.on_focus = on_focus
+        self.sum_benchmarks.key = "sum_benchmarks"
+        self.sum_benchmarks.on_focus = on_focus
 
         return ft.Container(content=col, padding=10, expand=True)
 
+    def _on_sum_range_change(self, e):
+        self._show_sum_chart()
+        self.page.update()
+
+    def _show_sum_chart(self):
+        if self._sum_history is None:
+            self.sum_range.visible = False
+            self.sum_chart.content = None
+            return
+        self.sum_range.visible = True
+        self.sum_chart.content = chart_service.chart_summary(
+            self.state.translator, self._sum_history, *self._sum_chart_dates,
+            visible_range=self._visible_range(self.sum_range, self._sum_history["Date"].iloc[-1]),
+        )
+
+    def _on_sum_rolling_metric_change(self, e):
+        self._show_sum_rolling_chart()
+        self.page.update()
+
+    def _on_sum_rolling_source_change(self, e):
+        self._set_sum_rolling_metrics()
+        self._show_sum_rolling_chart()
+        self.page.update()
+
+    def _set_sum_rolling_metrics(self):
+        """Offer the portfolio risk metrics, or the benchmark metrics of the selected benchmark."""
+        t = self.state.translator
+        if self.sum_rolling_source.value in (None, "portfolio"):
+            metrics = _PORTFOLIO_ROLLING_METRICS
+        else:
+            metrics = _BENCHMARK_ROLLING_METRICS
+        self.sum_rolling_metric.content.controls = [
+            ft.Radio(value=m, label=t.get(f"analysis.summary.rolling.{m}")) for m in metrics
+        ]
+        if self.sum_rolling_metric.value not in metrics:
+            self.sum_rolling_metric.value = metrics[0]
+
+    def _show_sum_rolling_chart(self):
+        if self._sum_rolling_metrics is None:
+            self.sum_rolling_source.visible = False
+            self.sum_rolling_metric.visible = False
+            self.sum_rolling_chart.content = None
+            return
+        source = self.sum_rolling_source.value
+        if source in (None, "portfolio") or self._sum_benchmark is None:
+            rolling_metrics = self._sum_rolling_metrics
+        else:
+            rolling_metrics = self._sum_benchmark["rolling"][source]
+        self.sum_rolling_source.visible = self._sum_benchmark is not None
+        self.sum_rolling_metric.visible = True
+        self.sum_rolling_chart.content = chart_service.chart_rolling_metrics(
+            self.state.translator, self._sum_history["Date"], rolling_metrics,
+            self.sum_rolling_metric.value,
+        )
+
     def _open_sum_date_picker(self, e):
         dp = ft.DatePicker(
             first_date=datetime(2000, 1, 1),
@@ -225,30 +350,40 @@ class AnalysisView:
             show_snack(self.page, t.get("misc_errors.date_future"), error=True)
             return
 
+        benchmarks = list(dict.fromkeys(
+            b.strip().upper() for b in (self.sum_benchmarks.value or "").split(",") if b.strip()
+        ))
+
         data = self._get_analysis_data()
         if not data:
             show_snack(self.page, t.get("operations.select_account"), error=True)
             return
 
+        self._user_submitted.add("summary")
         self.sum_loading.visible = True
         self.page.update()
 
-        def worker():
+        def worker(token):
             try:
                 ref_date = self.sum_date_value
                 dt_str = ref_date.strftime(DATE_FORMAT)
 
-                result = analysis_service.compute_summary(
-                    t, s.brokers, data, ref_date, dt_str
+                result = analysis_service.memoized(
+                    "summary", self._analysis_ledger(data),
+                    (ref_date, tuple(benchmarks), tuple(sorted(s.brokers.items()))), t,
+                    analysis_service.compute_summary,
+                    t, s.brokers, data, ref_date, dt_str, benchmarks=benchmarks,
                 )
+                token.raise_if_cancelled()
                 self._display_summary(result, dt_str)
             except Exception as ex:
                 show_snack(self.page, str(ex), error=True)
             finally:
-                self.sum_loading.visible = False
-                self.page.update()
+                if not token.cancelled:
+                    self.sum_loading.visible = False
+                    self.page.update()
 
-        self.page.run_thread(worker)
+        job_service.submit("analysis.summary", worker, pool="compute")
 
     def _display_summary(self, result, dt_str):
         t = self.state.translator
@@ -292,6 +427,11 @@ class AnalysisView:
             pf_text += t.get("analysis.summary.volatility", volatility=pf["volatility"])
             pf_text += "\n" + t.get("analysis.summary.sharpe_ratio", sharpe_ratio=pf["sharpe_ratio"])
 
+        benchmark = result.get("benchmark")
+        if benchmark is not None:
+            for ticker, row in benchmark["metrics"].iterrows():
+                pf_text += "\n" + t.get("analysis.summary.benchmark.result", ticker=ticker, **row.to_dict())
+
         controls.append(ft.Text(pf_text, size=12, weight=ft.FontWeight.BOLD, selectable=True))
 
         self.sum_results.controls = controls
@@ -299,16 +439,25 @@ class AnalysisView:
         pf_history = result.get("pf_history")
         min_date = result.get("min_date")
         if pf_history is not None and not pf_history.empty and min_date is not None:
-            min_date_str = min_date.strftime(DATE_FORMAT)
-            self.sum_chart.content = chart_service.chart_summary(
-                self.state.translator, pf_history, min_date_str, dt_str
-            )
             self._sum_history = pf_history
+            self._sum_chart_dates = (min_date.strftime(DATE_FORMAT), dt_str)
+            self._sum_rolling_metrics = result.get("rolling_metrics")
+            self._sum_benchmark = benchmark
             self.sum_export_row.visible = True
         else:
-            self.sum_chart.content = None
             self._sum_history = None
+            self._sum_chart_dates = None
+            self._sum_rolling_metrics = None
+            self._sum_benchmark = None
             self.sum_export_row.visible = False
+        self._show_sum_chart()
+
+        self.sum_rolling_source.options = [
+            ft.dropdown.Option(key="portfolio", text=t.get("analysis.summary.benchmark.portfolio"))
+        ] + [ft.dropdown.Option(key=ticker, text=ticker) for ticker in (benchmark or {}).get("tickers", [])]
+        self.sum_rolling_source.value = "portfolio"
+        self._set_sum_rolling_metrics()
+        self._show_sum_rolling_chart()
 
         self.page.update()
 
@@ -394,10 +543,15 @@ class AnalysisView:
         self.corr_loading = ft.ProgressRing(visible=False, width=30, height=30)
         self.corr_results = ft.Column([], spacing=5)
         self.corr_heatmap = ft.Container()
+        # Ticker subsets the user drilled into on a clustered heatmap, innermost last
+        self._corr_drill = []
+        self._corr_heatmap_dates = None
         self.corr_rolling_chart = ft.Container()
+        self.corr_range = self._build_range_selector(self._on_corr_range_change)
+        self._corr_chart_args = None
         self.corr_export_row = ft.Row([
             ft.ElevatedButton(t.get("analysis.export_plot_csv"), icon=ft.Icons.ASSESSMENT,
-                          on_click=lambda _: self.page.run_task(self._export_corr_csv)),
+                          on_click=lambda _: self._export_corr()),
         ], visible=False)
 
         corr_submit_btn = ft.FilledButton(
@@ -419,6 +573,7 @@ class AnalysisView:
             ft.Row([corr_submit_btn], alignment=ft.MainAxisAlignment.CENTER),
             self.corr_results,
             self.corr_heatmap,
+            self.corr_range,
             self.corr_rolling_chart,
             self.corr_export_row,
             ft.Container(height=20),
@@ -442,12 +597,48 @@ class AnalysisView:
         self.corr_rolling_fields.visible = (self.corr_type.value == "rolling")
         self.corr_results.controls = []
         self.corr_heatmap.content = None
-        self.corr_rolling_chart.content = None
         self._corr_matrix = None
         self._rolling_corr = None
+        self._show_corr_rolling_chart()
         self.corr_export_row.visible = False
         self.page.update()
 
+    def _show_corr_heatmap(self):
+        matrix = self._corr_matrix
+        if self._corr_drill:
+            tickers = self._corr_drill[-1]
+            matrix = matrix.loc[tickers, tickers]
+        self.corr_heatmap.content = chart_service.chart_correlation_heatmap(
+            self.state.translator, matrix, *self._corr_heatmap_dates,
+            on_drill_down=self._on_corr_drill_down,
+            on_back=self._on_corr_drill_up if self._corr_drill else None,
+        )
+
+    def _on_corr_drill_down(self, tickers):
+        self._corr_drill.append(tickers)
+        self._show_corr_heatmap()
+        self.page.update()
+
+    def _on_corr_drill_up(self, e):
+        self._corr_drill.pop()
+        self._show_corr_heatmap()
+        self.page.update()
+
+    def _on_corr_range_change(self, e):
+        self._show_corr_rolling_chart()
+        self.page.update()
+
+    def _show_corr_rolling_chart(self):
+        if self._rolling_corr is None:
+            self.corr_range.visible = False
+            self.corr_rolling_chart.content = None
+            return
+        self.corr_range.visible = True
+        self.corr_rolling_chart.content = chart_service.chart_rolling_correlation(
+            self.state.translator, self._rolling_corr, *self._corr_chart_args,
+            visible_range=self._visible_range(self.corr_range, self._rolling_corr.index[-1]),
+        )
+
     def _open_corr_date_picker(self, e, which):
         first = datetime(2000, 1, 1)
         last = datetime.now()
@@ -517,25 +708,31 @@ class AnalysisView:
             show_snack(self.page, t.get("operations.select_account"), error=True)
             return
 
+        self._user_submitted.add("correlation")
         self.corr_loading.visible = True
         self.page.update()
 
-        def worker():
+        def worker(token):
             try:
                 start_dt = self.corr_start_value.strftime("%Y-%m-%d")
                 end_dt = self.corr_end_value.strftime("%Y-%m-%d")
 
-                result = analysis_service.compute_correlation(
-                    t, data, start_dt, end_dt, asset1, asset2, window
+                result = analysis_service.memoized(
+                    "correlation", self._analysis_ledger(data),
+                    (start_dt, end_dt, asset1, asset2, window), t,
+                    analysis_service.compute_correlation,
+                    t, data, start_dt, end_dt, asset1, asset2, window,
                 )
+                token.raise_if_cancelled()
                 self._display_correlation(result, start_dt, end_dt, asset1, asset2, window)
             except Exception as ex:
                 show_snack(self.page, str(ex), error=True)
             finally:
-                self.corr_loading.visible = False
-                self.page.update()
+                if not token.cancelled:
+                    self.corr_loading.visible = False
+                    self.page.update()
 
-        self.page.run_thread(worker)
+        job_service.submit("analysis.correlation", worker, pool="compute")
 
     def _display_correlation(self, result, start_dt, end_dt, asset1, asset2, window):
         t = self.state.translator
@@ -545,10 +742,10 @@ class AnalysisView:
         if is_simple:
             corr_matrix = result.get("correlation_matrix")
             if corr_matrix is not None:
-                self.corr_heatmap.content = chart_service.chart_correlation_heatmap(
-                    t, corr_matrix, start_dt, end_dt
-                )
                 self._corr_matrix = corr_matrix
+                self._corr_heatmap_dates = (start_dt, end_dt)
+                self._corr_drill = []
+                self._show_corr_heatmap()
                 self._rolling_corr = None
                 self.corr_export_row.visible = True
             else:
@@ -556,21 +753,18 @@ class AnalysisView:
                 self.corr_heatmap.content = None
                 self._corr_matrix = None
                 self.corr_export_row.visible = False
-            self.corr_rolling_chart.content = None
         else:
             rolling_corr = result.get("rolling_corr")
             if rolling_corr is not None and not rolling_corr.empty:
-                self.corr_rolling_chart.content = chart_service.chart_rolling_correlation(
-                    t, rolling_corr, window, asset1, asset2, start_dt, end_dt
-                )
                 self._rolling_corr = rolling_corr
+                self._corr_chart_args = (window, asset1, asset2, start_dt, end_dt)
                 self._corr_matrix = None
                 self.corr_export_row.visible = True
             else:
-                self.corr_rolling_chart.content = None
                 self._rolling_corr = None
                 self.corr_export_row.visible = False
             self.corr_heatmap.content = None
+        self._show_corr_rolling_chart()
 
         self.corr_results.controls = controls
         self.page.update()
@@ -617,9 +811,10 @@ class AnalysisView:
         self.dd_loading = ft.ProgressRing(visible=False, width=30, height=30)
         self.dd_result_text = ft.Text("", size=14, selectable=True)
         self.dd_chart = ft.Container()
+        self.dd_range = self._build_range_selector(self._on_dd_range_change)
         self.dd_export_row = ft.Row([
             ft.ElevatedButton(t.get("analysis.export_plot_csv"), icon=ft.Icons.ASSESSMENT,
-                          on_click=lambda _: self.page.run_task(self._export_dd_csv)),
+                          on_click=lambda _: self._export_dd()),
         ], visible=False)
 
         dd_submit_btn = ft.FilledButton(
@@ -638,6 +833,7 @@ class AnalysisView:
             ft.Row([ft.Container(width=5), self.dd_loading]),
             ft.Row([dd_submit_btn], alignment=ft.MainAxisAlignment.CENTER),
             self.dd_result_text,
+            self.dd_range,
             self.dd_chart,
             self.dd_export_row,
             ft.Container(height=20),
@@ -704,50 +900,99 @@ class AnalysisView:
             show_snack(self.page, t.get("operations.select_account"), error=True)
             return
 
+        self._user_submitted.add("drawdown")
         self.dd_loading.visible = True
         self.page.update()
 
-        def worker():
+        def worker(token):
             try:
                 start_dt = self.dd_start_value
                 end_dt = self.dd_end_value
 
-                result = analysis_service.compute_drawdown(t, data, start_dt, end_dt)
-
-                if not result["has_data"]:
-                    self.dd_result_text.value = t.get("analysis.drawdown.error")
-                    self.dd_chart.content = None
-                    self._dd_data = None
-                    self.dd_export_row.visible = False
-                elif len(result["pf_history"]) < 10:
-                    show_snack(self.page, t.get("analysis.drawdown.min_range"), error=True)
-                    self.dd_result_text.value = ""
-                    self.dd_chart.content = None
-                    self._dd_data = None
-                    self.dd_export_row.visible = False
-                else:
-                    start_str = start_dt.strftime(DATE_FORMAT)
-                    end_str = end_dt.strftime(DATE_FORMAT)
-                    self.dd_result_text.value = t.get(
-                        "analysis.drawdown.result",
-                        start_dt=start_str, end_dt=end_str, mdd=result["mdd"] * 100
-                    )
-                    self.dd_chart.content = chart_service.chart_drawdown(
-                        t, result["pf_history"], result["drawdown"],
-                        result["mdd"], start_str, end_str
-                    )
-                    self._dd_data = {
-                        "pf_history": result["pf_history"],
-                        "drawdown": result["drawdown"],
-                    }
-                    self.dd_export_row.visible = True
+                result = analysis_service.memoized(
+                    "drawdown", self._analysis_ledger(data), (start_dt, end_dt), t,
+                    analysis_service.compute_drawdown, t, data, start_dt, end_dt,
+                )
+
+                token.raise_if_cancelled()
+                self._display_drawdown(result, start_dt, end_dt)
             except Exception as ex:
                 show_snack(self.page, str(ex), error=True)
             finally:
-                self.dd_loading.visible = False
-                self.page.update()
+                if not token.cancelled:
+                    self.dd_loading.visible = False
+                    self.page.update()
 
-        self.page.run_thread(worker)
+        job_service.submit("analysis.drawdown", worker, pool="compute")
+
+    def _display_drawdown(self, result, start_dt, end_dt):
+        t = self.state.translator
+        if not result["has_data"]:
+            self.dd_result_text.value = t.get("analysis.drawdown.error")
+            self._dd_data = None
+            self.dd_export_row.visible = False
+        elif len(result["pf_history"]) < 10:
+            show_snack(self.page, t.get("analysis.drawdown.min_range"), error=True)
+            self.dd_result_text.value = ""
+            self._dd_data = None
+            self.dd_export_row.visible = False
+        else:
+            start_str = start_dt.strftime(DATE_FORMAT)
+            end_str = end_dt.strftime(DATE_FORMAT)
+            result_text = t.get(
+                "analysis.drawdown.result",
+                start_dt=start_str, end_dt=end_str, mdd=result["mdd"] * 100
+            )
+            result_text += "\n" + t.get("analysis.drawdown.twrr_result", mdd=result["twrr_mdd"] * 100)
+            result_text += "\n" + t.get(
+                "analysis.drawdown.ulcer",
+                ulcer=result["ulcer_index"], underwater=result["time_under_water"]
+            )
+            if result["episodes"]:
+                result_text += "\n" + t.get("analysis.drawdown.episodes")
+                for episode in result["episodes"]:
+                    if episode["recovery"] is not None:
+                        recovery = t.get(
+                            "analysis.drawdown.recovered",
+                            date=episode["recovery"].strftime(DATE_FORMAT), days=episode["days"]
+                        )
+                    else:
+                        recovery = t.get("analysis.drawdown.not_recovered", days=episode["days"])
+                    result_text += "\n" + t.get(
+                        "analysis.drawdown.episode",
+                        depth=episode["depth"] * 100,
+                        peak=episode["peak"].strftime(DATE_FORMAT),
+                        trough=episode["trough"].strftime(DATE_FORMAT),
+                        recovery=recovery,
+                    )
+            self.dd_result_text.value = result_text
+            self._dd_data = {
+                "pf_history": result["pf_history"],
+                "drawdown": result["drawdown"],
+                "mdd": result["mdd"],
+                "episodes": result["episodes"],
+                "dates": (start_str, end_str),
+            }
+            self.dd_export_row.visible = True
+        self._show_dd_chart()
+        self.page.update()
+
+    def _on_dd_range_change(self, e):
+        self._show_dd_chart()
+        self.page.update()
+
+    def _show_dd_chart(self):
+        dd = self._dd_data
+        if dd is None:
+            self.dd_range.visible = False
+            self.dd_chart.content = None
+            return
+        self.dd_range.visible = True
+        self.dd_chart.content = chart_service.chart_drawdown(
+            self.state.translator, dd["pf_history"], dd["drawdown"], dd["mdd"], *dd["dates"],
+            episodes=dd["episodes"],
+            visible_range=self._visible_range(self.dd_range, dd["pf_history"]["Date"].iloc[-1]),
+        )
 
     # ── VaR Tab ───────────────────────────────────────────────────────
 
@@ -765,15 +1010,36 @@ class AnalysisView:
             border_color=ft.Colors.with_opacity(0.40, ft.Colors.GREY),
             keyboard_type=ft.KeyboardType.NUMBER, input_filter=_INT_FILTER, value="10",
             col={"xs": 6, "md": 6})
+        self.var_method = ft.RadioGroup(
+            value="mc",
+            content=ft.Column([
+                ft.Radio(value="mc", label=t.get("analysis.var.method_mc")),
+                ft.Radio(value="hs", label=t.get("analysis.var.method_hs")),
+                ft.Radio(value="fhs", label=t.get("analysis.var.method_fhs")),
+            ], spacing=0),
+            on_change=self._on_var_method_change,
+        )
+        self.var_lookback = ft.TextField(
+            label=t.get("analysis.var.lookback"),
+            border_radius=ft.border_radius.all(15),
+            border_color=ft.Colors.with_opacity(0.40, ft.Colors.GREY),
+            keyboard_type=ft.KeyboardType.NUMBER, input_filter=_INT_FILTER, value="500",
+            col={"xs": 12, "md": 6}, visible=False)
         # Chain on_submit for keyboard "next field" navigation
-        chain_focus([self.var_ci, self.var_days])
+        chain_focus([self.var_ci, self.var_days, self.var_lookback])
 
         self.var_loading = ft.ProgressRing(visible=False, width=30, height=30)
         self.var_result_text = ft.Text("", size=14, selectable=True)
         self.var_chart = ft.Container()
+        self._var_stop = threading.Event()
+        self._var_live_chart = False  # var_chart holds the histogram of a run still streaming
+        self.var_stop_btn = ft.OutlinedButton(
+            t.get("analysis.var.stop"), icon=ft.Icons.STOP,
+            on_click=lambda _: self._var_stop.set(), visible=False,
+        )
         self.var_export_row = ft.Row([
             ft.ElevatedButton(t.get("analysis.export_plot_csv"), icon=ft.Icons.ASSESSMENT,
-                          on_click=lambda _: self.page.run_task(self._export_var_csv)),
+                          on_click=lambda _: self._export_var()),
         ], visible=False)
 
         var_submit_btn = ft.FilledButton(
@@ -787,9 +1053,11 @@ class AnalysisView:
 
         col = ft.Column([
             ft.Container(height=5),
+            self.var_method,
             ft.ResponsiveRow([self.var_ci, self.var_days]),
+            ft.ResponsiveRow([self.var_lookback]),
             ft.Row([ft.Container(width=5), self.var_loading]),
-            ft.Row([var_submit_btn], alignment=ft.MainAxisAlignment.CENTER),
+            ft.Row([var_submit_btn, self.var_stop_btn], alignment=ft.MainAxisAlignment.CENTER),
             self.var_result_text,
             self.var_chart,
             self.var_export_row,
@@ -804,9 +1072,19 @@ class AnalysisView:
         self.var_ci.on_focus = on_focus
         self.var_days.key = "var_days"
         self.var_days.on_focus = on_focus
+        self.var_lookback.key = "var_lookback"
+        self.var_lookback.on_focus = on_focus
 
         return ft.Container(content=col, padding=10, expand=True)
 
+    def _on_var_method_change(self, e):
+        self.var_lookback.visible = (self.var_method.value != "mc")
+        self.var_result_text.value = ""
+        self.var_chart.content = None
+        self._var_data = None
+        self.var_export_row.visible = False
+        self.page.update()
+
     def _submit_var(self, e):
         s = self.state
         t = s.translator
@@ -825,6 +1103,16 @@ class AnalysisView:
         except (ValueError, TypeError):
             show_snack(self.page, t.get("analysis.var.days_error"), error=True)
             return
+        method = self.var_method.value
+        lookback = None
+        if method != "mc":
+            try:
+                lookback = int(self.var_lookback.value)
+                if lookback <= days:
+                    raise ValueError
+            except (ValueError, TypeError):
+                show_snack(self.page, t.get("analysis.var.lookback_error"), error=True)
+                return
 
         data = self._get_analysis_data()
         if not data:
@@ -834,37 +1122,117 @@ class AnalysisView:
         self.var_loading.visible = True
         self.page.update()
 
-        def worker():
+        def worker(token):
             try:
-                result = analysis_service.compute_var_mc(t, data, ci, days)
-
-                if not result["has_positions"]:
-                    self.var_result_text.value = t.get("analysis.var.error")
-                    self.var_chart.content = None
-                    self._var_data = None
-                    self.var_export_row.visible = False
+                ledger = self._analysis_ledger(data)
+                if method == "mc":
+                    result = analysis_service.cached_result("var_mc", ledger, (ci, days), t)
+                    if result is None:
+                        result = self._stream_var_mc(token, data, ledger, ci, days)
                 else:
-                    self.var_result_text.value = t.get(
-                        "analysis.var.result",
-                        ci=ci, days=days, var=result["var"]
+                    result = analysis_service.memoized(
+                        "var_hist", ledger, (ci, days, lookback, method), t,
+                        analysis_service.compute_var_hist,
+                        t, data, ci, days, lookback=lookback, filtered=(method == "fhs"),
                     )
-                    self.var_chart.content = chart_service.chart_var_mc(
-                        t, result["scenario_return"], result["var"], ci, days
-                    )
-                    self._var_data = {
-                        "scenario_return": result["scenario_return"],
-                        "var": result["var"],
-                        "ci": ci,
-                        "days": days,
-                    }
-                    self.var_export_row.visible = True
+
+                token.raise_if_cancelled()
+                self._display_var(result, ci, days)
             except Exception as ex:
                 show_snack(self.page, str(ex), error=True)
             finally:
-                self.var_loading.visible = False
-                self.page.update()
+                if not token.cancelled:
+                    self.var_loading.visible = False
+                    self.var_stop_btn.visible = False
+                    self.page.update()
 
-        self.page.run_thread(worker)
+        job_service.submit("analysis.var", worker, pool="compute")
+
+    def _stream_var_mc(self, token, data, ledger, ci, days):
+        """Run the Monte Carlo VaR chunk by chunk, showing the converging estimate.
+
+        Partial results are drawn at most every 0.1 s, updating the histogram in
+        place. Only a run that was not stopped early is cached.
+        """
+        t = self.state.translator
+        self._var_stop.clear()
+        self._var_live_chart = False
+        self.var_stop_btn.visible = True
+        self.page.update()
+
+        last_shown = 0.0
+        for result in analysis_service.iter_var_mc(
+            t, data, ci, days, num_simulations=65536, chunk_size=4096,
+            sampler="sobol", antithetic=True, target_rel_se=0.005,
+        ):
+            token.raise_if_cancelled()
+            if result["done"]:
+                analysis_service.store_result("var_mc", ledger, (ci, days), t, result)
+                return result
+            if self._var_stop.is_set():
+                return {**result, "scenario_return": result["scenario_return"].copy()}
+            now = time.monotonic()
+            if now - last_shown >= 0.1:
+                self._display_var(result, ci, days)
+                last_shown = now
+        return result
+
+    def _display_var(self, result, ci, days):
+        t = self.state.translator
+        if not result["has_positions"]:
+            self.var_result_text.value = t.get("analysis.var.error")
+            self.var_chart.content = None
+            self._var_data = None
+            self.var_export_row.visible = False
+            self.page.update()
+            return
+
+        result_text = t.get(
+            "analysis.var.result",
+            ci=ci, days=days, var=result["var"]
+        )
+        result_text += "\n" + t.get(
+            "analysis.var.result_es", ci=ci, days=days, es=result["es"]
+        )
+        if np.isfinite(result.get("var_se", np.nan)):
+            result_text += "\n" + t.get(
+                "analysis.var.se", se=result["var_se"], n=result["num_simulations"]
+            )
+        contributions = result.get("contributions")
+        if contributions and result["var"]:
+            result_text += "\n" + t.get("analysis.var.contributions")
+            for ticker, value in sorted(contributions.items(), key=lambda x: -x[1]):
+                result_text += "\n" + t.get(
+                    "analysis.var.contribution",
+                    ticker=ticker, value=value, share=value / result["var"]
+                )
+        self.var_result_text.value = result_text
+
+        histogram = result.get("histogram")
+        if histogram is not None and self._var_live_chart:
+            # Same bins as the chart drawn for the previous chunk of this run
+            chart_service.update_chart_var_mc(
+                self.var_chart.content, t, histogram, result["var"], ci, es_value=result["es"]
+            )
+        else:
+            self.var_chart.content = chart_service.chart_var_mc(
+                t, result["scenario_return"], result["var"], ci, days,
+                es_value=result["es"], histogram=histogram,
+            )
+            self._var_live_chart = histogram is not None and not result.get("done", True)
+
+        if result.get("done", True) or self._var_stop.is_set():
+            self._var_live_chart = False
+            self._var_data = {
+                "scenario_return": result["scenario_return"],
+                "rolling": result["rolling"],
+                "var": result["var"],
+                "es": result["es"],
+                "ci": ci,
+                "days": days,
+            }
+            self.var_export_row.visible = True
+        self.page.update()
 
     # ── Allocation Tab ───────────────────────────────────────────────
 
@@ -944,69 +1312,166 @@ class AnalysisView:
             show_snack(self.page, t.get("operations.select_account"), error=True)
             return
 
+        self._user_submitted.add("allocation")
         self.alloc_loading.visible = True
         self.page.update()
 
-        def worker():
+        def worker(token):
             try:
-                allocation = analysis_service.compute_allocation(t, data, self.alloc_date_value)
-                self.alloc_chart.content = chart_service.chart_allocation(allocation, t)
+                allocation = analysis_service.memoized(
+                    "allocation", self._analysis_ledger(data), (self.alloc_date_value,), t,
+                    analysis_service.compute_allocation, t, data, self.alloc_date_value,
+                )
+                token.raise_if_cancelled()
+                self._display_allocation(allocation)
             except Exception as ex:
                 show_snack(self.page, str(ex), error=True)
             finally:
-                self.alloc_loading.visible = False
-                self.page.update()
+                if not token.cancelled:
+                    self.alloc_loading.visible = False
+                    self.page.update()
+
+        job_service.submit("analysis.allocation", worker, pool="compute")
+
+    def _display_allocation(self, allocation):
+        self.alloc_chart.content = chart_service.chart_allocation(allocation, self.state.translator)
+        self.page.update()
+
+    # ── Background precompute ─────────────────────────────────────────
+
+    def _start_precompute(self):
+        """Warm the price cache, then compute Allocation, Summary, Correlation and Drawdown
+        with their default parameters in the background.
+
+        Jobs go through analysis_service.memoized with the same keys as the
+        Calculate buttons, so submitting the defaults is a cache hit. Each result
+        is shown in its tab as it completes, unless the user has already picked
+        a date or submitted that tab. Failures are left to the user's own submit.
+        """
+        s = self.state
+        t = s.translator
+        # The analyses only read the ledgers (filtering goes through ledger_service.consolidated),
+        # so every job shares the same data list
+        data = self._get_analysis_data()
+        if not data:
+            return
+        ledger = self._analysis_ledger(data)
+        today = date.today()
+        year_ago = today - timedelta(days=365)
+        dt_str = today.strftime(DATE_FORMAT)
+        corr_start, corr_end = year_ago.strftime("%Y-%m-%d"), today.strftime("%Y-%m-%d")
 
-        self.page.run_thread(worker)
+        def speculate(token, kind, params, publish, compute, *args, **kwargs):
+            try:
+                result = analysis_service.memoized(kind, ledger, params, t, compute, *args, **kwargs)
+                if not token.cancelled and kind not in self._user_submitted:
+                    publish(result)
+            except Exception:
+                pass
+
+        def precompute(token):
+            try:
+                first_date = analysis_service.warm_cache(t, data)
+            except Exception:
+                return
+            if first_date is None or token.cancelled:
+                return
+
+            # Keyed like the precompute itself: reopening the view supersedes them
+            job_service.submit(
+                "analysis.precompute.allocation", speculate, "allocation", (today,),
+                lambda r: self._publish_allocation(r, today),
+                analysis_service.compute_allocation, t, data, today, pool="background",
+            )
+            job_service.submit(
+                "analysis.precompute.summary", speculate, "summary",
+                (today, (), tuple(sorted(s.brokers.items()))),
+                lambda r: self._publish_summary(r, today),
+                analysis_service.compute_summary, t, s.brokers, data, today, dt_str,
+                pool="background", benchmarks=[],
+            )
+            job_service.submit(
+                "analysis.precompute.correlation", speculate, "correlation",
+                (corr_start, corr_end, None, None, None),
+                lambda r: self._publish_correlation(r, year_ago, today),
+                analysis_service.compute_correlation, t, data, corr_start, corr_end, None, None, None,
+                pool="background",
+            )
+            if first_date < today:
+                job_service.submit(
+                    "analysis.precompute.drawdown", speculate, "drawdown", (first_date, today),
+                    lambda r: self._publish_drawdown(r, first_date, today),
+                    analysis_service.compute_drawdown, t, data, first_date, today, pool="background",
+                )
+
+        job_service.submit("analysis.precompute", precompute, pool="background")
+
+    def _publish_allocation(self, allocation, ref_date):
+        if self.alloc_date_value is not None:
+            return
+        self.alloc_date_value = ref_date
+        self.alloc_date_field.value = ref_date.strftime(DATE_FORMAT)
+        self._display_allocation(allocation)
+
+    def _publish_summary(self, result, ref_date):
+        if self.sum_date_value is not None or self.sum_benchmarks.value:
+            return
+        self.sum_date_value = ref_date
+        self.sum_date_field.value = ref_date.strftime(DATE_FORMAT)
+        self._display_summary(result, ref_date.strftime(DATE_FORMAT))
+
+    def _publish_correlation(self, result, start_dt, end_dt):
+        if (self.corr_type.value != "simple"
+                or self.corr_start_value is not None or self.corr_end_value is not None):
+            return
+        self.corr_start_value, self.corr_end_value = start_dt, end_dt
+        self.corr_start_field.value = start_dt.strftime(DATE_FORMAT)
+        self.corr_end_field.value = end_dt.strftime(DATE_FORMAT)
+        self._display_correlation(result, start_dt.strftime("%Y-%m-%d"), end_dt.strftime("%Y-%m-%d"),
+                                  None, None, None)
+
+    def _publish_drawdown(self, result, start_dt, end_dt):
+        if self.dd_start_value is not None or self.dd_end_value is not None:
+            return
+        if result["has_data"] and len(result["pf_history"]) < 10:
+            return
+        self.dd_start_value, self.dd_end_value = start_dt, end_dt
+        self.dd_start_field.value = start_dt.strftime(DATE_FORMAT)
+        self.dd_end_field.value = end_dt.strftime(DATE_FORMAT)
+        self._display_drawdown(result, start_dt, end_dt)
 
     # ── Export helpers ────────────────────────────────────────────────
 
-    async def _save_csv(self, file_name, csv_bytes):
-        t = self.state.translator
-        path = await self.file_picker.save_file(
-            file_name=file_name,
-            allowed_extensions=["csv"],
-            src_bytes=csv_bytes,
-        )
-        if path:
-            if not self.page.web and not self.page.platform.is_mobile():
-                with open(path, "wb") as f:
-                    f.write(csv_bytes)
-            show_snack(self.page, t.get("transactions.export_success"))
-
-    def _df_to_csv_bytes(self, df):
-        buf = io.StringIO()
-        df.to_csv(buf, index=False)
-        return buf.getvalue().encode("utf-8")
-
-    async def _export_sum_csv(self):
+    def _export(self, base_name, df, **write_kwargs):
+        show_export_dialog(self.page, self.state.translator, self.file_picker, base_name, df, **write_kwargs)
+
+    def _export_sum(self):
         if self._sum_history is None:
             return
-        csv_bytes = self._df_to_csv_bytes(self._sum_history)
-        await self._save_csv("Portfolio History.csv", csv_bytes)
+        self._export("Portfolio History", self._sum_history)
 
-    async def _export_corr_csv(self):
+    def _export_corr(self):
         if self._corr_matrix is not None:
-            buf = io.StringIO()
-            self._corr_matrix.to_csv(buf)
-            csv_bytes = buf.getvalue().encode("utf-8")
-            await self._save_csv("Correlation Matrix.csv", csv_bytes)
+            self._export("Correlation Matrix", self._corr_matrix, index=True)
         elif self._rolling_corr is not None:
-            df = pd.DataFrame({"Date": self._rolling_corr.index, "Correlation": self._rolling_corr.values})
-            csv_bytes = self._df_to_csv_bytes(df)
-            await self._save_csv("Rolling Correlation.csv", csv_bytes)
+            df = pd.DataFrame({"Date": self._rolling_corr.index, "Correlation": self._rolling_corr.to_numpy()})
+            self._export("Rolling Correlation", df)
 
-    async def _export_dd_csv(self):
+    def _export_dd(self):
         if self._dd_data is None:
             return
-        pf = self._dd_data["pf_history"].copy()
-        pf["Drawdown %"] = self._dd_data["drawdown"].values * 100
-        csv_bytes = self._df_to_csv_bytes(pf)
-        await self._save_csv("Drawdown.csv", csv_bytes)
+        drawdown_pct = self._dd_data["drawdown"].to_numpy() * 100
+        self._export(
+            "Drawdown", self._dd_data["pf_history"],
+            transform=lambda chunk, rows: chunk.assign(**{"Drawdown %": drawdown_pct[rows]}),
+        )
 
-    async def _export_var_csv(self):
+    def _export_var(self):
         if self._var_data is None:
             return
-        df = pd.DataFrame({"Scenario Return": self._var_data["scenario_return"]})
-        csv_bytes = self._df_to_csv_bytes(df)
-        await self._save_csv("VaR Monte Carlo.csv", csv_bytes)
+        rolling = self._var_data.get("rolling")
+        if rolling is not None:
+            self._export("VaR Historical", rolling)
+            return
+        df = pd.DataFrame({"Scenario Return": self._var_data["scenario_return"]}, copy=False)
+        self._export("VaR Monte Carlo", df)
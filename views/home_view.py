@@ -4,7 +4,7 @@ from datetime import datetime
 
 from components.snack import show_snack
 from components.ticker_search import TickerSearchField
-from services import account_service, config_service, operations_service
+from services import account_service, analysis_service, config_service, job_service, operations_service, returns_service
 from services.market_data import detect_unrecorded_splits, download_close
 from utils.constants import DATE_FORMAT
 from utils.other_utils import round_half_up
@@ -86,7 +86,15 @@ class HomeView:
         _rebuild_page(self.page, self.state, selected_index=0)
 
     def _on_refresh(self, e):
-        self._fetch_live_values()
+        # A manual refresh asks for fresh prices: drop the cached downloads and
+        # the analyses computed on them, which are keyed by the market-data epoch
+        returns_service.clear_cache()
+        analysis_service.invalidate_results()
+        if getattr(self, "_watchlist_fetched", False):
+            self._fetch_watchlist_prices()
+        # The ledgers still loading trigger a fetch when they are ready
+        if not self._waiting_for_accounts():
+            self._fetch_live_values()
 
     def _build_content(self) -> ft.Control:
         sel = self.state.home_selection
@@ -235,12 +243,13 @@ class HomeView:
     def _fetch_watchlist_prices(self):
         tickers = self.state.watchlist[:]
         if not tickers:
+            job_service.cancel("home.watchlist")
             self._watchlist_items_container.controls = []
             return
         self._watchlist_loading.visible = True
         self.page.update()
 
-        def worker():
+        def worker(token):
             try:
                 data, names = download_close(tickers, period="2d")
                 if isinstance(data, pd.Series):
@@ -258,16 +267,18 @@ class HomeView:
                     prev_close = float(series.iloc[-2]) if len(series) >= 2 else None
                     rows.append(self._build_watchlist_item(tk, price, prev_close, name))
 
+                token.raise_if_cancelled()
                 self._watchlist_items_container.controls = rows
             except Exception:
                 self._watchlist_items_container.controls = [
                     self._build_watchlist_item(tk, None, None) for tk in tickers
                 ]
             finally:
-                self._watchlist_loading.visible = False
-                self.page.update()
+                if not token.cancelled:
+                    self._watchlist_loading.visible = False
+                    self.page.update()
 
-        self.page.run_thread(worker)
+        job_service.submit("home.watchlist", worker)
 
     def _build_watchlist_item(self, ticker: str, price, prev_close,
                               name: str = "") -> ft.Control:
@@ -370,7 +381,7 @@ class HomeView:
     def _build_overview(self) -> ft.Control:
         t = self.state.translator
         accounts = self.state.accounts
-        if not accounts:
+        if not accounts and not self.state.accounts_pending:
             return ft.Text(t.get("home.no_account"), size=14)
 
         # Start with stale values from DataFrame
@@ -415,10 +426,13 @@ class HomeView:
     def _build_single_account(self, idx: int) -> ft.Control:
         t = self.state.translator
         acc = self.state.get_account(idx)
-        if acc is None:
+        if acc is None and idx in self.state.account_errors:
+            return ft.Text(t.get("home.account_load_error", name=self.state.brokers.get(idx, idx),
+                                 error=self.state.account_errors[idx]), size=14, color=ft.Colors.ERROR)
+        if acc is None and idx not in self.state.accounts_pending:
             return ft.Text(t.get("home.no_account"), size=14)
 
-        df = acc["df"]
+        df = acc["df"] if acc is not None else pd.DataFrame()
 
         # Start with stale values
         nav = float(df.iloc[-1].get("nav", 0) or 0) if not df.empty else 0
@@ -452,14 +466,39 @@ class HomeView:
     # ── Live Value Fetch ──────────────────────────────────────────────
 
     def _auto_fetch_or_restore(self):
-        """Use cached data if fresh enough, otherwise fetch live values."""
+        """Use cached data if fresh enough, otherwise fetch live values.
+
+        While the ledgers shown are still loading, the values saved by the
+        last session are shown instead, and the fetch starts once they load.
+        """
         s = self.state
         cache = s._home_cache
         if (cache is not None
                 and cache.get("selection") == s.home_selection
                 and s._home_nav_count < s._home_nav_threshold):
             self._restore_from_cache(cache)
-        else:
+            return
+        # Listen before checking, so an account published in between is not missed
+        s.on_account_loaded = self._on_account_loaded
+        if not self._waiting_for_accounts():
+            s.on_account_loaded = None
+            self._fetch_live_values()
+            return
+        snapshot = s.home_snapshot.get(s.home_selection)
+        if snapshot:
+            self._restore_from_cache(snapshot)
+        self._refresh_loading.visible = True
+
+    def _waiting_for_accounts(self) -> bool:
+        """Whether a ledger the current selection needs is still loading."""
+        pending = self.state.accounts_pending
+        sel = self.state.home_selection
+        return bool(pending) if sel == "overview" else int(sel) in pending
+
+    def _on_account_loaded(self, idx):
+        # Runs on a loader thread, as each account is published
+        if self.state.on_account_loaded == self._on_account_loaded and not self._waiting_for_accounts():
+            self.state.on_account_loaded = None
             self._fetch_live_values()
 
     def _restore_from_cache(self, cache):
@@ -491,7 +530,7 @@ class HomeView:
         self._refresh_loading.visible = True
         self.page.update()
 
-        def worker():
+        def worker(token):
             try:
                 s = self.state
                 t = s.translator
@@ -505,6 +544,7 @@ class HomeView:
                     total_committed = 0.0
                     aggr = {}  # ticker -> {quantity, total_cost, price}
                     for idx, acc in s.accounts.items():
+                        token.raise_if_cancelled()
                         df = acc["df"]
                         if df is None or df.empty:
                             continue
@@ -595,6 +635,7 @@ class HomeView:
                 self._current_tpnl_pct_str = _fmt_pct(total_pnl, total_committed)
                 self._current_dpnl_pct_str = _fmt_pct(daily_pnl, prev_positions_value)
 
+                token.raise_if_cancelled()
                 hidden = getattr(s, '_home_values_hidden', False)
                 self._apply_subtotals()
                 if not hidden:
@@ -621,15 +662,18 @@ class HomeView:
                     "positions": all_positions,
                 }
                 s._home_nav_count = 0
+                s.save_home_snapshot(s._home_cache["selection"], s._home_cache)
             except Exception:
                 pass  # Silently fail - stale values remain
             finally:
-                self._refresh_loading.visible = False
-                self.page.update()
+                if not token.cancelled:
+                    self._refresh_loading.visible = False
+                    self.page.update()
 
             self._check_splits_async()
 
-        self.page.run_thread(worker)
+        # A newer refresh (e.g. another Home selection) supersedes a running one
+        job_service.submit("home.live_values", worker)
 
     def _check_splits_async(self):
         """Look for unrecorded splits on held tickers and prompt the user. Runs once per session."""
@@ -658,7 +702,7 @@ class HomeView:
         if not tickers:
             return
 
-        def worker():
+        def worker(token):
             s._split_checked_session = True
             for ticker in tickers:
                 if f"{ticker}|*" in s._split_ignores:
@@ -678,7 +722,7 @@ class HomeView:
                     self.page.run_task(_show)
                     return
 
-        self.page.run_thread(worker)
+        job_service.submit("home.split_check", worker, latest=False)
 
     def _prompt_split(self, acc_idx, ticker, ev_date, ratio):
         s = self.state
@@ -728,24 +772,25 @@ class HomeView:
         acc = s.get_account(acc_idx)
         if acc is None:
             return
-        df = acc["df"]
         broker = s.brokers.get(acc_idx)
         ref_date = datetime.strptime(ev_date, "%Y-%m-%d").date()
         date_str = ref_date.strftime(DATE_FORMAT)
 
-        def worker():
+        def worker(token):
             try:
+                # Re-read the ledger: an earlier queued write may have changed it
+                acc = s.accounts[acc_idx]
                 new_df = operations_service.execute_split(
-                    t, df, broker, date_str, ref_date, ticker, ratio,
+                    t, acc["df"], broker, date_str, ref_date, ticker, ratio,
                 )
-                s.accounts[acc_idx]["df"] = new_df
-                account_service.save_account(new_df, acc["path"])
+                account_service.update_account(acc, new_df)
                 show_snack(self.page, t.get("operations.added_transaction"))
                 self._fetch_live_values()
             except Exception as ex:
                 show_snack(self.page, str(ex), error=True)
 
-        self.page.run_thread(worker)
+        # Ledger writes are never cancelled and run one at a time, in order
+        job_service.submit(None, worker, pool="writes")
 
     # ── Shared Components ─────────────────────────────────────────────
 
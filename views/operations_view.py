@@ -10,7 +10,7 @@ from components.snack import show_snack
 _DATE_FILTER = ft.InputFilter(r"^[0-9\-]*$")
 _DECIMAL_FILTER = ft.InputFilter(r"^[0-9\.]*$")
 from components.ticker_search import TickerSearchField
-from services import account_service, operations_service
+from services import account_service, job_service, operations_service
 from utils.other_utils import round_half_up, ValidationError
 from utils.constants import DATE_FORMAT, CURRENCY_EUR, CURRENCY_USD
 from utils.date_utils import parse_date_input
@@ -362,14 +362,15 @@ class OperationsView:
         self.cash_loading.visible = True
         self.page.update()
 
-        def worker():
+        def worker(token):
             try:
+                # Re-read the ledger: an earlier queued write may have changed it
+                acc = s.accounts[acc_idx]
                 new_df = operations_service.execute_cash_operation(
-                    t, df, broker, service_kind, date_str, ref_date, amount,
+                    t, acc["df"], broker, service_kind, date_str, ref_date, amount,
                     ticker=ticker, description=descr,
                 )
-                s.accounts[acc_idx]["df"] = new_df
-                account_service.save_account(new_df, s.get_account(acc_idx)["path"])
+                account_service.update_account(acc, new_df)
                 show_snack(self.page, t.get("operations.added_transaction"))
                 self._refresh_page()
             except (RuntimeError, ValidationError, Exception) as ex:
@@ -378,7 +379,7 @@ class OperationsView:
                 self.cash_loading.visible = False
                 self.page.update()
 
-        self.page.run_thread(worker)
+        job_service.submit(None, worker, pool="writes")
 
     # ── ETF / Stock Tab ───────────────────────────────────────────────
 
@@ -855,7 +856,26 @@ class OperationsView:
 
         expected_type = "etf" if product_type == "ETF" else "equity"
 
-        def worker():
+        def write(token):
+            try:
+                # Re-read the ledger: an earlier queued write may have changed it
+                acc = s.accounts[acc_idx]
+                new_df = operations_service.execute_etf_stock(
+                    t, acc["df"], broker, date_str, ref_date,
+                    currency_int, conv_rate, ticker, quantity, price,
+                    fee, ter, stored_product, tax_rate=tax_rate, fee_mode=fee_mode,
+                )
+                account_service.update_account(acc, new_df)
+                show_snack(self.page, t.get("operations.added_transaction"))
+                self._refresh_page()
+            except (RuntimeError, ValidationError, Exception) as ex:
+                show_snack(self.page, str(ex), error=True)
+            finally:
+                tab["loading"].visible = False
+                self.page.update()
+
+        def validate(token):
+            # The lookup runs on the io pool, so a slow one does not hold up the queued writes
             try:
                 from services.market_data import search_tickers as _search
                 results = _search(ticker, quotes_count=1)
@@ -868,23 +888,14 @@ class OperationsView:
                         tab["loading"].visible = False
                         self.page.update()
                         return
-
-                new_df = operations_service.execute_etf_stock(
-                    t, df, broker, date_str, ref_date,
-                    currency_int, conv_rate, ticker, quantity, price,
-                    fee, ter, stored_product, tax_rate=tax_rate, fee_mode=fee_mode,
-                )
-                s.accounts[acc_idx]["df"] = new_df
-                account_service.save_account(new_df, s.get_account(acc_idx)["path"])
-                show_snack(self.page, t.get("operations.added_transaction"))
-                self._refresh_page()
             except (RuntimeError, ValidationError, Exception) as ex:
                 show_snack(self.page, str(ex), error=True)
-            finally:
                 tab["loading"].visible = False
                 self.page.update()
+                return
+            job_service.submit(None, write, pool="writes")
 
-        self.page.run_thread(worker)
+        job_service.submit(None, validate, pool="io")
 
     def _show_ticker_help(self, e):
         t = self.state.translator
@@ -994,13 +1005,14 @@ class OperationsView:
         self.cash_loading.visible = True
         self.page.update()
 
-        def worker():
+        def worker(token):
             try:
+                # Re-read the ledger: an earlier queued write may have changed it
+                acc = s.accounts[acc_idx]
                 new_df = operations_service.execute_split(
-                    t, df, broker, date_str, ref_date, ticker, ratio,
+                    t, acc["df"], broker, date_str, ref_date, ticker, ratio,
                 )
-                s.accounts[acc_idx]["df"] = new_df
-                account_service.save_account(new_df, s.get_account(acc_idx)["path"])
+                account_service.update_account(acc, new_df)
                 show_snack(self.page, t.get("operations.added_transaction"))
                 self._refresh_page()
             except (RuntimeError, ValidationError, Exception) as ex:
@@ -1009,7 +1021,7 @@ class OperationsView:
                 self.cash_loading.visible = False
                 self.page.update()
 
-        self.page.run_thread(worker)
+        job_service.submit(None, worker, pool="writes")
 
     def _refresh_page(self):
         from views import _rebuild_page
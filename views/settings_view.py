@@ -1,3 +1,5 @@
+import asyncio
+import io
 import os
 import flet as ft
 
@@ -359,20 +361,67 @@ class SettingsView:
             width=PAGE_WIDTH,
         )
 
-    async def _on_export_backup(self, e):
+    def _on_export_backup(self, e):
         t = self.state.translator
-        zip_bytes = config_service.export_backup(self.state.config_folder)
-        filename = "portfolio_backup.zip"
-        path = await self.file_picker.save_file(
-            file_name=filename,
-            allowed_extensions=["zip"],
-            src_bytes=zip_bytes,
+        if self.page.web or self.page.platform.is_mobile():
+            # The save cannot be confirmed here, so no backup can become the
+            # base of differential ones: always export a full backup
+            self.page.run_task(self._export_backup, False)
+            return
+        base = config_service.load_backup_manifest(self.state.config_folder)
+
+        def on_pick(differential):
+            self.page.pop_dialog()
+            self.page.run_task(self._export_backup, differential)
+
+        if base:
+            diff_descr = t.get("settings.account.backup_differential_descr", date=base["created"][:10])
+        else:
+            diff_descr = t.get("settings.account.backup_no_base")
+        dlg = ft.AlertDialog(
+            title=ft.Text(t.get("settings.account.export_backup")),
+            content=ft.Column([
+                ft.ListTile(
+                    title=ft.Text(t.get("settings.account.backup_full")),
+                    subtitle=ft.Text(t.get("settings.account.backup_full_descr"), size=11),
+                    on_click=lambda _: on_pick(False),
+                ),
+                ft.ListTile(
+                    title=ft.Text(t.get("settings.account.backup_differential")),
+                    subtitle=ft.Text(diff_descr, size=11),
+                    on_click=lambda _: on_pick(True),
+                    disabled=base is None,
+                ),
+            ], tight=True, spacing=0),
+            actions=[ft.TextButton(t.get("components.cancel"), on_click=lambda _: self.page.pop_dialog())],
         )
-        # On Android/iOS, save_file returns None (OS handles the save via src_bytes).
-        # On desktop, it returns the chosen path and we must write manually.
-        if path:
-            with open(path, "wb") as f:
-                f.write(zip_bytes)
+        self.page.show_dialog(dlg)
+
+    async def _export_backup(self, differential):
+        t = self.state.translator
+        folder = self.state.config_folder
+        filename = "portfolio_backup_changes.zip" if differential else "portfolio_backup.zip"
+        try:
+            if self.page.web or self.page.platform.is_mobile():
+                # The OS saves the bytes handed to the picker; save_file usually
+                # returns None, so whether the user saved or cancelled is unknown
+                buf = io.BytesIO()
+                manifest = await asyncio.to_thread(config_service.export_backup, folder, buf, differential)
+                path = await self.file_picker.save_file(
+                    file_name=filename, allowed_extensions=["zip"], src_bytes=buf.getvalue(),
+                )
+            else:
+                # On desktop the archive is streamed straight to the chosen path
+                path = await self.file_picker.save_file(file_name=filename, allowed_extensions=["zip"])
+                if not path:
+                    return
+                manifest = await asyncio.to_thread(config_service.export_backup, folder, path, differential)
+            # Only a backup known to be saved may become the base of differential ones
+            if not differential and path:
+                config_service.save_backup_manifest(folder, manifest)
+        except Exception as ex:
+            show_snack(self.page, str(ex), error=True)
+            return
         show_snack(self.page, t.get("settings.account.export_success", filename=filename))
 
     async def _on_import_backup(self, e):
@@ -385,25 +434,20 @@ class SettingsView:
         picked = files[0]
 
         # On Android, bytes come via the patched file_bytes attribute.
-        # On desktop, read from the file path.
-        zip_bytes = getattr(picked, "file_bytes", None)
-        if not zip_bytes and picked.path:
-            try:
-                with open(picked.path, "rb") as f:
-                    zip_bytes = f.read()
-            except OSError:
-                pass
-
-        if not zip_bytes:
+        # On desktop, the archive is read from the file path as needed.
+        source = getattr(picked, "file_bytes", None) or picked.path
+        if not source:
             show_snack(self.page, t.get("settings.account.import_error"), error=True)
             return
 
-        valid, err = config_service.validate_backup(zip_bytes, t)
+        valid, err = await asyncio.to_thread(
+            config_service.validate_backup, self.state.config_folder, source, t,
+        )
         if not valid:
             show_snack(self.page, err, error=True)
             return
 
-        self._pending_import = zip_bytes
+        self._pending_import = source
         self._show_import_confirm_dialog()
 
     def _show_import_confirm_dialog(self):
@@ -1,11 +1,17 @@
+import os
+
 import flet as ft
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 
+from components.export_dialog import show_export_dialog
 from components.snack import show_snack
-from services import account_service, config_service
+from components.virtual_table import VirtualTable
+from services import account_service, config_service, export_service, ledger_service
 from utils.columns import COLUMNS, rename_for_export, export_headers, OPERATION_LOCALE_KEYS, PRODUCT_LOCALE_KEYS
-from utils.constants import REPORT_PREFIX
+from utils.constants import DATE_FORMAT, REPORT_PREFIX
+from utils.date_utils import parse_date_input
 
 _DEFAULT_DISPLAY_COLS = [
     "date", "account", "operation", "product", "ticker", "qt_exch",
@@ -48,6 +54,18 @@ def _format_cell(col, val):
     return str(val)
 
 
+def _format_column(col, values, labels=None):
+    """Display strings of one column: "" for missing values, codes mapped through labels."""
+    out = []
+    for val in values:
+        if val is None or pd.isna(val):
+            out.append("")
+            continue
+        text = _format_cell(col, val)
+        out.append(labels.get(text, text) if labels else text)
+    return out
+
+
 class TransactionsView:
     def __init__(self, page: ft.Page, state):
         self.page = page
@@ -111,14 +129,9 @@ class TransactionsView:
     def _get_tx_df(self):
         sel = self.state.tx_selection
         if sel == "overview":
-            all_rows = []
-            for idx, acc in self.state.accounts.items():
-                df = acc["df"]
-                if df is not None and not df.empty and len(df) > 1:
-                    all_rows.append(df.iloc[1:].copy())
-            if all_rows:
-                return pd.concat(all_rows, ignore_index=True)
-            return None
+            ledgers = [(idx, acc["df"]) for idx, acc in self.state.accounts.items() if acc["df"] is not None]
+            df = ledger_service.consolidated(ledgers)
+            return df.drop(columns=ledger_service.HELPER_COLUMNS) if not df.empty else None
         else:
             idx = int(sel)
             acc = self.state.get_account(idx)
@@ -137,7 +150,12 @@ class TransactionsView:
         saved_mode, saved_value = config_service.load_tx_filter(self.state.user_config_folder)
         self._tx_filter_mode = saved_mode
         self._tx_filter_value = saved_value
+        # Search criteria of the filters dialog, kept for the session
+        self._tx_query = {"text": "", "operation": None, "product": None, "start": None, "end": None}
+        saved_cols = config_service.load_tx_columns(self.state.user_config_folder)
+        self._display_cols = saved_cols if saved_cols else list(_DEFAULT_DISPLAY_COLS)
 
+        self.tx_table = VirtualTable(self.page, page_size=_PAGE_SIZE, empty_text=t.get("transactions.empty"))
         self.tx_table_container = ft.Container(padding=ft.padding.only(top=10))
         self._update_tx_table()
 
@@ -168,9 +186,7 @@ class TransactionsView:
         )
 
         if acc_idx is not None:
-            async def on_export(e):
-                await self._on_export(e, acc_idx)
-            export_click = on_export
+            export_click = lambda e, i=acc_idx: self._on_export(e, i)
             remove_click = lambda e, i=acc_idx: self._on_remove_row(e, i)
         else:
             export_click = self._on_export_overview
@@ -232,9 +248,49 @@ class TransactionsView:
             self.page.update()
         dlg_radio.on_change = on_radio_change
 
+        # Search criteria, answered by the ledger indexes
+        query = self._tx_query
+        dlg_search = ft.TextField(
+            label=t.get("transactions.search"),
+            value=query["text"],
+            prefix_icon=ft.Icons.SEARCH,
+            border_radius=ft.border_radius.all(15),
+            border_color=ft.Colors.with_opacity(0.40, ft.Colors.GREY),
+        )
+
+        def criterion_dropdown(label_key, locale_keys, value):
+            return ft.Dropdown(
+                menu_style=ft.MenuStyle(shape=ft.RoundedRectangleBorder(radius=15)),
+                label=t.get(label_key),
+                value=value or "all",
+                options=[ft.dropdown.Option(key="all", text=t.get("transactions.any"))] + [
+                    ft.dropdown.Option(key=k, text=t.get(v).strip()) for k, v in locale_keys.items()
+                ],
+                border_radius=ft.border_radius.all(15),
+                border_color=ft.Colors.with_opacity(0.40, ft.Colors.GREY),
+                expand=True,
+            )
+
+        dlg_operation = criterion_dropdown("transactions.operation", OPERATION_LOCALE_KEYS, query["operation"])
+        dlg_product = criterion_dropdown("transactions.product", PRODUCT_LOCALE_KEYS, query["product"])
+
+        def date_field(label_key, value):
+            return ft.TextField(
+                label=t.get(label_key),
+                hint_text=t.get("components.date_format_hint"),
+                value=value.strftime(DATE_FORMAT) if value else "",
+                keyboard_type=ft.KeyboardType.DATETIME,
+                input_filter=ft.InputFilter(r"^[0-9\-]*$"),
+                border_radius=ft.border_radius.all(15),
+                border_color=ft.Colors.with_opacity(0.40, ft.Colors.GREY),
+                expand=True,
+            )
+
+        dlg_start = date_field("transactions.date_from", query["start"])
+        dlg_end = date_field("transactions.date_to", query["end"])
+
         # Column visibility checkboxes (all 29 columns)
-        saved_cols = config_service.load_tx_columns(self.state.user_config_folder)
-        visible_set = set(saved_cols) if saved_cols else set(_DEFAULT_DISPLAY_COLS)
+        visible_set = set(self._display_cols)
 
         checkboxes = {}
         for col in _ALL_COLS:
@@ -258,11 +314,21 @@ class TransactionsView:
             self._tx_filter_value = val
             config_service.save_tx_filter(self.state.user_config_folder, mode, val)
 
+            # Save search criteria
+            self._tx_query = {
+                "text": (dlg_search.value or "").strip(),
+                "operation": None if dlg_operation.value == "all" else dlg_operation.value,
+                "product": None if dlg_product.value == "all" else dlg_product.value,
+                "start": parse_date_input(dlg_start.value or ""),
+                "end": parse_date_input(dlg_end.value or ""),
+            }
+
             # Save column visibility
             visible = [col for col, cb in checkboxes.items() if cb.value]
             if not visible:
                 visible = list(_DEFAULT_DISPLAY_COLS)
             config_service.save_tx_columns(self.state.user_config_folder, visible)
+            self._display_cols = visible
 
             self.page.pop_dialog()
             self._update_tx_table()
@@ -278,6 +344,11 @@ class TransactionsView:
                         dlg_filter_field,
                     ], spacing=10, vertical_alignment=ft.CrossAxisAlignment.CENTER),
                     ft.Divider(),
+                    ft.Text(t.get("transactions.search_by"), size=14, weight=ft.FontWeight.BOLD),
+                    dlg_search,
+                    ft.Row([dlg_operation, dlg_product], spacing=10),
+                    ft.Row([dlg_start, dlg_end], spacing=10),
+                    ft.Divider(),
                     ft.Text(t.get("transactions.filter_columns"), size=14, weight=ft.FontWeight.BOLD),
                     ft.Column([checkboxes[col] for col in _ALL_COLS], spacing=0),
                 ], scroll=ft.ScrollMode.AUTO, spacing=10),
@@ -303,156 +374,92 @@ class TransactionsView:
             ], horizontal_alignment=ft.CrossAxisAlignment.CENTER)
             return
 
-        df_sorted = df.copy()
-        df_sorted["_date_parsed"] = pd.to_datetime(df_sorted["date"], dayfirst=True, errors="coerce")
-        df_sorted["_orig_idx"] = range(len(df_sorted))
-        df_sorted = df_sorted.sort_values(["_date_parsed", "_orig_idx"], ascending=[False, False])
-
-        if self._tx_filter_mode == "days":
-            cutoff = pd.Timestamp(datetime.now() - timedelta(days=self._tx_filter_value))
-            df_sorted = df_sorted[df_sorted["_date_parsed"] >= cutoff]
-        else:
-            df_sorted = df_sorted.head(self._tx_filter_value)
-
-        df_sorted = df_sorted.drop(columns=["_date_parsed", "_orig_idx"])
+        df_sorted = self._query_transactions()
         self._tx_filtered_df = df_sorted
 
-        if reset_page:
-            self._tx_page = 0
-
-        self._render_page()
-
-    def _render_page(self):
-        df = self._tx_filtered_df
-        total = len(df)
-        total_pages = max(1, (total + _PAGE_SIZE - 1) // _PAGE_SIZE)
-        self._tx_page = min(self._tx_page, total_pages - 1)
-
-        start = self._tx_page * _PAGE_SIZE
-        page_df = df.iloc[start:start + _PAGE_SIZE]
-
-        table = self._build_transactions_table(page_df)
-
-        if total_pages > 1:
-            pagination = ft.Row([
-                ft.IconButton(
-                    ft.Icons.CHEVRON_LEFT,
-                    on_click=self._on_prev_page,
-                    disabled=self._tx_page == 0,
-                ),
-                ft.Text(f"{self._tx_page + 1} / {total_pages}", size=13),
-                ft.IconButton(
-                    ft.Icons.CHEVRON_RIGHT,
-                    on_click=self._on_next_page,
-                    disabled=self._tx_page >= total_pages - 1,
-                ),
-            ], alignment=ft.MainAxisAlignment.CENTER, spacing=4)
-            self.tx_table_container.content = ft.Column(
-                [table, pagination], spacing=5,
-                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
-            )
-        else:
-            self.tx_table_container.content = table
-
-    def _on_prev_page(self, e):
-        if self._tx_page > 0:
-            self._tx_page -= 1
-            self._render_page()
-            self.page.update()
-
-    def _on_next_page(self, e):
-        self._tx_page += 1
-        self._render_page()
-        self.page.update()
-
-    # ── Table ──────────────────────────────────────────────────────
-
-    def _build_transactions_table(self, df) -> ft.Control:
-        t = self.state.translator
-        if df is None or df.empty:
-            return ft.Text(t.get("transactions.empty"), size=16)
+        # Format the filtered view once, column by column; paging only reads the matrix
+        available_cols = [c for c in self._display_cols if c in df_sorted.columns]
+        col_labels = export_headers(t)
+        code_labels = {
+            "operation": {k: t.get(v).strip() for k, v in OPERATION_LOCALE_KEYS.items()},
+            "product": {k: t.get(v).strip() for k, v in PRODUCT_LOCALE_KEYS.items()},
+        }
+        columns = [
+            _format_column(col, df_sorted[col].to_numpy(dtype=object), code_labels.get(col))
+            for col in available_cols
+        ]
+        self.tx_table.set_data(
+            [col_labels.get(col, col) for col in available_cols],
+            list(zip(*columns)),
+            reset_page=reset_page,
+        )
+        self.tx_table_container.content = self.tx_table.control
 
-        saved_cols = config_service.load_tx_columns(self.state.user_config_folder)
-        display_cols = saved_cols if saved_cols else list(_DEFAULT_DISPLAY_COLS)
-        available_cols = [c for c in display_cols if c in df.columns]
+    def _query_transactions(self):
+        """Transactions matching the filters, newest first, read through the ledger indexes."""
+        query = self._tx_query
+        start, end = query["start"], query["end"]
+        if self._tx_filter_mode == "days":
+            # Rows dated after the cutoff instant: from the day after it
+            cutoff = (datetime.now() - timedelta(days=self._tx_filter_value)).date() + timedelta(days=1)
+            start = max(start, cutoff) if start else cutoff
 
-        col_labels = export_headers(t)
-        op_map = {k: t.get(v).strip() for k, v in OPERATION_LOCALE_KEYS.items()}
-        prod_map = {k: t.get(v).strip() for k, v in PRODUCT_LOCALE_KEYS.items()}
-
-        columns = [ft.DataColumn(ft.Text(col_labels.get(col, col), size=11, weight=ft.FontWeight.BOLD)) for col in available_cols]
-        rows = []
-        for _, row in df.iterrows():
-            cells = []
-            for col in available_cols:
-                val = row.get(col, "")
-                if pd.isna(val) or val is None:
-                    val = ""
-                else:
-                    val = _format_cell(col, val)
-                    if col == "operation":
-                        val = op_map.get(val, val)
-                    elif col == "product":
-                        val = prod_map.get(val, val)
-                cells.append(ft.DataCell(ft.Text(val, size=10)))
-            rows.append(ft.DataRow(cells=cells))
-
-        return ft.Row([
-            ft.DataTable(
-                columns=columns,
-                rows=rows,
-                horizontal_lines=ft.BorderSide(1, ft.Colors.GREY_300),
-                column_spacing=12,
-            ),
-        ], scroll=ft.ScrollMode.ALWAYS,)
+        if self._acc_idx is None:
+            accounts = list(self.state.accounts.values())
+        else:
+            accounts = [self.state.get_account(self._acc_idx)]
+        frames, days, ranks, positions = [], [], [], []
+        for rank, acc in enumerate(accounts):
+            if acc is None or acc["df"] is None or len(acc["df"]) <= 1:
+                continue
+            index = account_service.get_ledger_index(acc)
+            pos = index.query(start=start, end=end, text=query["text"],
+                              operation=query["operation"], product=query["product"])
+            pos = pos[pos > 0]
+            frames.append(acc["df"].take(pos))
+            days.append(index.day_numbers(pos))
+            ranks.append(np.full(len(pos), rank))
+            positions.append(pos)
+        if not frames:
+            return pd.DataFrame()
+
+        # Newest first; same-day rows by account, then ledger order, latest first
+        order = np.lexsort((np.concatenate(positions), np.concatenate(ranks), np.concatenate(days)))[::-1]
+        if self._tx_filter_mode != "days":
+            order = order[:self._tx_filter_value]
+        return pd.concat(frames, ignore_index=True).take(order)
 
     # ── Export / Remove ───────────────────────────────────────────────
 
-    def _prepare_export_csv(self, df):
-        """Sort df by date descending, rename to locale headers, return CSV bytes."""
-        df = df.copy()
-        df["_date_parsed"] = pd.to_datetime(df["date"], dayfirst=True, errors="coerce")
-        df = df.sort_values("_date_parsed", ascending=False).drop(columns=["_date_parsed"])
-        df = rename_for_export(df, self.state.translator)
-        return df.to_csv(index=False).encode("utf-8")
+    def _export(self, base_name, df):
+        """Export df sorted by date descending, with locale headers and values, in chunks."""
+        t = self.state.translator
+        show_export_dialog(
+            self.page, t, self.file_picker, base_name, df,
+            order=export_service.date_order(df["date"]),
+            transform=lambda chunk, rows: rename_for_export(chunk, t),
+        )
 
-    async def _on_export(self, e, idx):
+    def _on_export(self, e, idx):
         acc = self.state.get_account(idx)
         if acc is None:
             return
-        csv_bytes = self._prepare_export_csv(acc["df"].iloc[1:])
-        await self._save_via_picker(acc["file"], csv_bytes)
+        self._export(os.path.splitext(acc["file"])[0], acc["df"].iloc[1:])
 
-    async def _on_export_overview(self, e):
+    def _on_export_overview(self, e):
         t = self.state.translator
         df = self._tx_df
         if df is None or df.empty:
             show_snack(self.page, t.get("transactions.no_data"), error=True)
             return
-        csv_bytes = self._prepare_export_csv(df)
-        await self._save_via_picker(REPORT_PREFIX + "All Accounts.csv", csv_bytes)
-
-    async def _save_via_picker(self, file_name, csv_bytes):
-        t = self.state.translator
-        path = await self.file_picker.save_file(
-            file_name=file_name,
-            allowed_extensions=["csv"],
-            src_bytes=csv_bytes,
-        )
-        if path:
-            # On desktop, save_file() only returns the path — we must write the file
-            if not self.page.web and not self.page.platform.is_mobile():
-                with open(path, "wb") as f:
-                    f.write(csv_bytes)
-            show_snack(self.page, t.get("transactions.export_success"))
+        self._export(REPORT_PREFIX + "All Accounts", df)
 
     def _on_remove_row(self, e, idx):
         s = self.state
         t = s.translator
         acc = s.get_account(idx)
         if acc and len(acc["df"]) > 1:
-            acc["df"] = acc["df"].iloc[:-1]
-            account_service.save_account(acc["df"], acc["path"])
+            account_service.update_account(acc, acc["df"].iloc[:-1])
             show_snack(self.page, t.get("transactions.row_removed"))
             from views import _rebuild_page
             _rebuild_page(self.page, s, selected_index=3)